@@ -0,0 +1,75 @@
+# FILE: agenda.py
+# Upcoming departures, read from the start-date index without loading trips:
+#     python agenda.py [--days N] [--from YYYY-MM-DD] [--coordinator ID] [--format csv|json] [--output PATH]
+# Non-interactive, so it can run from cron; the file is written next to the
+# other report exports (reports/data/agenda.csv by default).
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, TextIO
+
+import data_manager
+
+AGENDA_DIR = os.path.join("reports", "data")
+DEFAULT_DAYS = 14
+AGENDA_FORMATS = ('csv', 'json')
+AGENDA_FIELDS = ['start_date', 'trip_id', 'name', 'duration_days', 'coordinator', 'traveller_count']
+
+def upcoming_departures(days: int = DEFAULT_DAYS, start: Optional[datetime] = None,
+                        coordinator_id: Optional[str] = None, include_inactive: bool = False) -> List[Dict[str, Any]]:
+    """Trips starting in the `days` days from start (default: today), earliest first."""
+    if days < 1:
+        raise ValueError("The agenda must cover at least 1 day.")
+    start = (start or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    entries = data_manager.trips_starting_between(start, start + timedelta(days=days), coordinator_id)
+    if not include_inactive:
+        entries = [entry for entry in entries if entry['is_active']]
+    return entries
+
+def write_agenda(entries: List[Dict[str, Any]], fmt: str, out: TextIO) -> None:
+    """Write agenda entries as CSV or JSON, with coordinator IDs resolved to names."""
+    if fmt not in AGENDA_FORMATS:
+        raise ValueError(f"Unsupported agenda format '{fmt}'. Choose from: {', '.join(AGENDA_FORMATS)}.")
+    names = {user['user_id']: user['name'] for user in data_manager.iter_json_records(data_manager.USER_FILE)}
+    rows = [{'start_date': entry['start_date'][:10], 'trip_id': entry['trip_id'], 'name': entry['name'],
+             'duration_days': entry['duration_days'],
+             'coordinator': names.get(entry['coordinator_id'], entry['coordinator_id'] or ''),
+             'traveller_count': entry['traveller_count']} for entry in entries]
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=AGENDA_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump({'generated_at': datetime.now().isoformat(), 'departures': rows}, out, indent=2)
+        out.write("\n")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export the trips departing in the next few days.")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f"days to cover (default: {DEFAULT_DAYS})")
+    parser.add_argument('--from', dest='start', default=None, help="first day, YYYY-MM-DD (default: today)")
+    parser.add_argument('--coordinator', default=None, help="only this coordinator's trips (user ID)")
+    parser.add_argument('--format', default='csv', choices=AGENDA_FORMATS, help="output format (default: csv)")
+    parser.add_argument('--output', default=None, help=f"file to write (default: {AGENDA_DIR}/agenda.<format>)")
+    args = parser.parse_args(argv)
+
+    try:
+        start = datetime.strptime(args.start, '%Y-%m-%d') if args.start else None
+        entries = upcoming_departures(args.days, start, args.coordinator)
+        output = args.output or os.path.join(AGENDA_DIR, f"agenda.{args.format}")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        temp_path = output + ".tmp"
+        with open(temp_path, 'w', newline='') as f:
+            write_agenda(entries, args.format, f)
+        os.replace(temp_path, output)
+    except (OSError, ValueError) as e:
+        print(f"Agenda export failed: {e}", file=sys.stderr)
+        return 1
+    print(f"{output} ({len(entries)} departures)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# FILE: async_data_manager.py
+# asyncio front end to data_manager, for callers running an event loop.
+# File reads and writes run in the loop's default executor, so the loop is
+# never blocked on disk. Concurrent reads of the same file share one parse,
+# and writes to a file are queued on an asyncio lock so that at most one
+# executor thread per file is waiting on data_manager's file locks.
+
+import asyncio
+import functools
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+import data_manager
+
+class _LoopState:
+    """In-flight reads and write locks for one event loop."""
+
+    def __init__(self):
+        self.reads: Dict[str, asyncio.Future] = {}
+        self.write_locks: Dict[str, asyncio.Lock] = {}
+
+_loop_states: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]' = weakref.WeakKeyDictionary()
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_states:
+        _loop_states[loop] = _LoopState()
+    return _loop_states[loop]
+
+async def _run(func: Callable, *args) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+async def _read(filepath: str) -> List[Dict[str, Any]]:
+    """The records in filepath; callers that ask while a parse is running share its result.
+
+    The shared list must not be modified: the *_from_records builders only read it.
+    """
+    state = _state()
+    future = state.reads.get(filepath)
+    if future is None:
+        future = asyncio.ensure_future(_run(data_manager._load_json, filepath))
+        state.reads[filepath] = future
+
+        def _done(finished: asyncio.Future) -> None:
+            if state.reads.get(filepath) is finished:
+                del state.reads[filepath]
+        future.add_done_callback(_done)
+    # One caller being cancelled must not cancel the parse for the others
+    return await asyncio.shield(future)
+
+@asynccontextmanager
+async def _writing(*filepaths: str):
+    """Queue behind other writers of filepaths in this loop; reads started later see the new data."""
+    state = _state()
+    locks = []
+    try:
+        for filepath in sorted(set(filepaths), key=data_manager._lock_rank):
+            lock = state.write_locks.setdefault(filepath, asyncio.Lock())
+            await lock.acquire()
+            locks.append(lock)
+        yield
+    finally:
+        for filepath in filepaths:
+            # A parse still running may predate the write; later readers start a fresh one
+            state.reads.pop(filepath, None)
+        for lock in reversed(locks):
+            lock.release()
+
+async def _write(filepaths: Tuple[str, ...], func: Callable, *args) -> Any:
+    async with _writing(*filepaths):
+        return await _run(func, *args)
+
+# --- Loading ---
+
+async def load_users() -> List:
+    """Async version of data_manager.load_users."""
+    records = await _read(data_manager.USER_FILE)
+    return await _run(data_manager.users_from_records, records)
+
+async def load_travellers() -> List:
+    """Async version of data_manager.load_travellers."""
+    records = await _read(data_manager.TRAVELLER_FILE)
+    return await _run(data_manager.travellers_from_records, records)
+
+def _build_trips(user_records, traveller_records, trip_records) -> List:
+    return data_manager.trips_from_records(trip_records,
+                                           data_manager.users_from_records(user_records),
+                                           data_manager.travellers_from_records(traveller_records))
+
+async def load_trips() -> List:
+    """Async version of data_manager.load_trips; the three files are read concurrently."""
+    records = await asyncio.gather(_read(data_manager.USER_FILE), _read(data_manager.TRAVELLER_FILE),
+                                   _read(data_manager.TRIP_FILE))
+    return await _run(_build_trips, *records)
+
+def _build_invoices(user_records, traveller_records, trip_records, invoice_records) -> List:
+    return data_manager.invoices_from_records(invoice_records,
+                                              _build_trips(user_records, traveller_records, trip_records))
+
+async def load_invoices() -> List:
+    """Async version of data_manager.load_invoices; the four files are read concurrently."""
+    records = await asyncio.gather(_read(data_manager.USER_FILE), _read(data_manager.TRAVELLER_FILE),
+                                   _read(data_manager.TRIP_FILE), _read(data_manager.INVOICE_FILE))
+    return await _run(_build_invoices, *records)
+
+# --- Saving ---
+
+async def save_user(user) -> None:
+    await _write((data_manager.USER_FILE,), data_manager.save_user, user)
+
+async def delete_user(user_id: str) -> None:
+    await _write((data_manager.USER_FILE,), data_manager.delete_user, user_id)
+
+async def save_traveller(traveller) -> None:
+    await _write((data_manager.TRAVELLER_FILE,), data_manager.save_traveller, traveller)
+
+async def save_travellers(travellers: List) -> Tuple[int, int]:
+    return await _write((data_manager.TRAVELLER_FILE,), data_manager.save_travellers, travellers)
+
+async def delete_traveller(traveller_id: str) -> None:
+    await _write((data_manager.TRAVELLER_FILE, data_manager.TRIP_FILE), data_manager.delete_traveller, traveller_id)
+
+async def assign_traveller_to_trip(trip_id: str, traveller_id: str, allow_overlap: bool = True) -> bool:
+    return await _write((data_manager.TRIP_FILE,), data_manager.assign_traveller_to_trip,
+                        trip_id, traveller_id, allow_overlap)
+
+async def remove_traveller_from_trip(trip_id: str, traveller_id: str) -> bool:
+    return await _write((data_manager.TRIP_FILE,), data_manager.remove_traveller_from_trip, trip_id, traveller_id)
+
+async def save_trip(trip) -> None:
+    await _write((data_manager.TRIP_FILE,), data_manager.save_trip, trip)
+
+async def delete_trip(trip_id: str) -> None:
+    await _write((data_manager.TRIP_FILE,), data_manager.delete_trip, trip_id)
+
+async def save_invoice(invoice) -> None:
+    await _write((data_manager.INVOICE_FILE,), data_manager.save_invoice, invoice)
+
+async def delete_invoice(invoice_id: str) -> None:
+    await _write((data_manager.INVOICE_FILE,), data_manager.delete_invoice, invoice_id)
+
+print("Async Data Manager module loaded successfully.")
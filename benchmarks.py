@@ -0,0 +1,535 @@
+# FILE: benchmarks.py
+# Performance benchmarks for the Travel Management System.
+# Usage: python benchmarks.py [benchmark ...]   (no arguments runs them all)
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from models import TripCoordinator, Traveller, Trip, Invoice, Payment
+
+PAYMENT_METHODS = ["Cash", "Card", "Transfer"]
+
+def make_sample_data(num_trips: int, payments_per_invoice: int = 2, travellers_per_trip: int = 0,
+                     num_coordinators: int = 10, seed: int = 42):
+    """Build synthetic coordinators, trips and invoices for benchmarking."""
+    rng = random.Random(seed)
+    coordinators = [TripCoordinator(f"C{i:03d}", f"coord{i}", "x", f"Coordinator {i}")
+                    for i in range(num_coordinators)]
+    base_date = datetime(2022, 1, 1)
+    trips, invoices, travellers = [], [], []
+
+    for i in range(num_trips):
+        trip = Trip(f"TR{i:07d}", f"Trip {i}", base_date + timedelta(days=rng.randrange(1095)),
+                    rng.randint(1, 14), coordinators[i % num_coordinators])
+        trip.is_active = rng.random() < 0.8
+        for j in range(travellers_per_trip):
+            traveller = Traveller(f"T{i:07d}{j:02d}", f"Traveller {i}-{j}", "Address",
+                                  datetime(1940, 1, 1) + timedelta(days=rng.randrange(30000)),
+                                  "Contact", f"GOV{i}{j}")
+            trip.travellers.append(traveller)
+            travellers.append(traveller)
+        trips.append(trip)
+
+        invoice = Invoice(f"INV{i:07d}", trip, trip.start_date - timedelta(days=rng.randrange(120)),
+                          round(rng.uniform(100, 5000), 2))
+        for k in range(payments_per_invoice):
+            invoice.payments.append(Payment(f"PAY{i:07d}{k:02d}", invoice,
+                                            round(invoice.total_amount / (payments_per_invoice + 1), 2),
+                                            invoice.issue_date, rng.choice(PAYMENT_METHODS)))
+        invoices.append(invoice)
+
+    return trips, invoices, travellers
+
+def _timed(func: Callable, repeat: int = 1) -> float:
+    """Return the best wall-clock time of several runs in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_render_options():
+    """Render time and file size of the financial summary for each output option."""
+    from report_generator import ReportGenerator, RenderOptions
+
+    _, invoices, _ = make_sample_data(200)
+    variants = [
+        ("png 300dpi (default)", RenderOptions()),
+        ("png 150dpi", RenderOptions(dpi=150)),
+        ("png 100dpi", RenderOptions(dpi=100)),
+        ("png 100dpi 7x5in", RenderOptions(dpi=100, figsize=(7, 5))),
+        ("png budget 250KB", RenderOptions(max_bytes=250 * 1024)),
+        ("thumbnail", RenderOptions(thumbnail=True)),
+        ("svg", RenderOptions(fmt='svg')),
+        ("pdf", RenderOptions(fmt='pdf')),
+    ]
+
+    original_dir = ReportGenerator.REPORTS_DIR
+    try:
+        # Warm up matplotlib's font cache so the first variant is not penalised
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ReportGenerator.REPORTS_DIR = temp_dir
+            ReportGenerator.generate_financial_summary(invoices, RenderOptions(thumbnail=True))
+    finally:
+        ReportGenerator.REPORTS_DIR = original_dir
+
+    print(f"{'Option':<24}{'Time (s)':>10}{'Size (KB)':>12}")
+    try:
+        for label, options in variants:
+            # A fresh directory per variant so every run is a cache miss
+            with tempfile.TemporaryDirectory() as temp_dir:
+                ReportGenerator.REPORTS_DIR = temp_dir
+                result = {}
+                elapsed = _timed(lambda: result.update(
+                    path=ReportGenerator.generate_financial_summary(invoices, options)[1]))
+                size_kb = os.path.getsize(result['path']) / 1024
+            print(f"{label:<24}{elapsed:>10.3f}{size_kb:>12.1f}")
+    finally:
+        ReportGenerator.REPORTS_DIR = original_dir
+
+def _legacy_financial_summary(invoices: List) -> dict:
+    """The multi-pass aggregation ReportGenerator used before report_data."""
+    from collections import defaultdict
+
+    total_revenue = sum(inv.total_amount for inv in invoices)
+    total_paid = sum(sum(p.amount for p in inv.payments) for inv in invoices)
+    paid_count = sum(1 for inv in invoices if inv.is_fully_paid())
+    payment_methods = defaultdict(float)
+    for invoice in invoices:
+        for payment in invoice.payments:
+            payment_methods[payment.method] += payment.amount
+    sorted_invoices = sorted(invoices, key=lambda x: x.total_amount, reverse=True)[:5]
+    return {
+        'total_revenue': total_revenue,
+        'total_paid': total_paid,
+        'total_outstanding': total_revenue - total_paid,
+        'paid_count': paid_count,
+        'pending_count': len(invoices) - paid_count,
+        'payment_methods': list(payment_methods.items()),
+        'top_invoices': [(inv.trip.name, inv.total_amount) for inv in sorted_invoices]
+    }
+
+def bench_aggregation():
+    """Financial summary aggregation at 1M payments: legacy passes vs NumPy."""
+    import report_data
+
+    _, invoices, _ = make_sample_data(250_000, payments_per_invoice=4)
+    legacy_time = _timed(lambda: _legacy_financial_summary(invoices), repeat=3)
+    numpy_time = _timed(lambda: report_data.financial_summary(invoices), repeat=3)
+
+    legacy = _legacy_financial_summary(invoices)
+    vectorised = report_data.financial_summary(invoices)
+    same = (legacy['top_invoices'] == vectorised['top_invoices']
+            and legacy['paid_count'] == vectorised['paid_count']
+            and abs(legacy['total_paid'] - vectorised['total_paid']) < 1e-6 * legacy['total_paid'])
+
+    print(f"Invoices: {len(invoices):,}, payments: {sum(len(i.payments) for i in invoices):,}")
+    print(f"Legacy (multi-pass):  {legacy_time:.3f}s")
+    print(f"NumPy (single pass):  {numpy_time:.3f}s  ({legacy_time / numpy_time:.1f}x)")
+    print(f"Results match: {same}")
+
+def _legacy_age_groups(travellers: List) -> dict:
+    """The per-traveller if/elif bucketing used before report_data (year difference only)."""
+    current_year = datetime.now().year
+    age_groups = {'0-18': 0, '19-30': 0, '31-50': 0, '51-70': 0, '70+': 0}
+    for traveller in travellers:
+        age = current_year - traveller.date_of_birth.year
+        if age <= 18:
+            age_groups['0-18'] += 1
+        elif age <= 30:
+            age_groups['19-30'] += 1
+        elif age <= 50:
+            age_groups['31-50'] += 1
+        elif age <= 70:
+            age_groups['51-70'] += 1
+        else:
+            age_groups['70+'] += 1
+    return age_groups
+
+def bench_age_buckets():
+    """Age bucketing of 1M travellers: legacy loop vs exact datetime64 + np.digitize."""
+    import report_data
+
+    rng = random.Random(7)
+    travellers = [Traveller(f"T{i}", "", "", datetime(1940, 1, 1) + timedelta(days=rng.randrange(30000)), "", "")
+                  for i in range(1_000_000)]
+    legacy_time = _timed(lambda: _legacy_age_groups(travellers), repeat=3)
+    numpy_time = _timed(lambda: report_data.traveller_statistics(travellers), repeat=3)
+
+    legacy = _legacy_age_groups(travellers)
+    exact = dict(report_data.traveller_statistics(travellers)['age_groups'])
+    moved = sum(abs(legacy[label] - exact[label]) for label in legacy) // 2
+
+    print(f"Travellers: {len(travellers):,}")
+    print(f"Legacy (year difference, if/elif): {legacy_time:.3f}s")
+    print(f"Exact ages, datetime64 + digitize: {numpy_time:.3f}s  ({legacy_time / numpy_time:.1f}x)")
+    print(f"Travellers the legacy calculation put in the wrong group: {moved:,}")
+
+def bench_figure_templates():
+    """Figures per second for per-coordinator reports: fresh figures vs reused templates."""
+    import report_data
+    from report_generator import ReportGenerator, RenderOptions
+
+    trips, invoices, _ = make_sample_data(4000, num_coordinators=40)
+    datasets = []
+    for coordinator_index in range(40):
+        name = f"Coordinator {coordinator_index}"
+        own_invoices = [inv for inv in invoices if inv.trip.coordinator.name == name]
+        datasets.append(('financial_summary', report_data.financial_summary(own_invoices)))
+        datasets.append(('revenue_trends', report_data.revenue_series(
+            own_invoices, [inv.trip for inv in own_invoices], 'quarter')))
+    options = RenderOptions(dpi=100)
+
+    original = (ReportGenerator.REPORTS_DIR, ReportGenerator.USE_TEMPLATES)
+    print(f"{'Mode':<24}{'Figures':>10}{'Time (s)':>10}{'Figures/s':>12}")
+    try:
+        for label, use_templates in (("fresh figure (today)", False), ("figure templates", True)):
+            ReportGenerator.USE_TEMPLATES = use_templates
+            ReportGenerator._thread_templates().clear()
+            # A fresh directory per mode so every render is a cache miss
+            with tempfile.TemporaryDirectory() as temp_dir:
+                ReportGenerator.REPORTS_DIR = temp_dir
+                elapsed = _timed(lambda: [ReportGenerator.render_report(kind, data, options) for kind, data in datasets])
+            print(f"{label:<24}{len(datasets):>10}{elapsed:>10.3f}{len(datasets) / elapsed:>12.1f}")
+    finally:
+        ReportGenerator.REPORTS_DIR, ReportGenerator.USE_TEMPLATES = original
+
+def bench_route_graph():
+    """Route graph with 100k edges: build, cold and cached cheapest-route queries, incremental updates."""
+    import route_graph
+
+    rng = random.Random(11)
+    locations = [f"City {i}" for i in range(5000)]
+    modes = ["Flight", "Train", "Bus", "Taxi", "Ship"]
+    records = []
+    for i in range(25000):
+        legs = []
+        for j in range(4):
+            legs.append({'start_location': rng.choice(locations), 'destination': rng.choice(locations),
+                         'transport_mode': rng.choice(modes), 'transport_provider': f"Provider {rng.randrange(50)}",
+                         'cost': round(rng.uniform(20, 800), 2)})
+        records.append({'trip_id': f"TR{i:07d}", 'trip_legs': legs})
+
+    build_time = _timed(lambda: route_graph.RouteGraph.from_records(records))
+    graph = route_graph.RouteGraph.from_records(records)
+    pairs = [(rng.choice(locations), rng.choice(locations)) for _ in range(200)]
+
+    start = time.perf_counter()
+    for origin, destination in pairs:
+        graph.cheapest_route(origin, destination)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for origin, destination in pairs:
+        graph.cheapest_route(origin, destination)
+    cached_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for origin, destination in pairs:
+        graph.cheapest_route(origin, destination, modes=["Train", "Bus"])
+    restricted_time = time.perf_counter() - start
+
+    updates = 1000
+    start = time.perf_counter()
+    for record in records[:updates]:
+        changed = dict(record, trip_legs=[dict(leg, cost=leg['cost'] + 1) for leg in record['trip_legs']])
+        graph.on_trip_change(record, changed)
+    update_time = time.perf_counter() - start
+
+    print(f"Legs: {graph.leg_count:,}  Edges: {graph.edge_count:,}  Locations: {len(graph.names):,}")
+    print(f"Build from records:             {build_time:.3f}s")
+    print(f"Full rebuild per saved trip:    {build_time * 1000:.1f}ms")
+    print(f"Incremental update per trip:    {update_time / updates * 1000:.3f}ms")
+    print(f"Cheapest route, cold:           {cold_time / len(pairs) * 1000:.2f}ms/query")
+    print(f"Cheapest route, Train/Bus only: {restricted_time / len(pairs) * 1000:.2f}ms/query")
+    print(f"Cheapest route, cached:         {cached_time / len(pairs) * 1e6:.2f}us/query")
+
+def _pairwise_conflicts(records):
+    """Baseline: compare every pair of each traveller's trips."""
+    import booking_index
+    per_traveller = {}
+    for record in records:
+        for traveller_id in record['traveller_ids']:
+            per_traveller.setdefault(traveller_id, []).append((booking_index.trip_interval(record), record['trip_id']))
+    count = 0
+    for bookings in per_traveller.values():
+        for i, ((start, end), _) in enumerate(bookings):
+            for (other_start, other_end), _ in bookings[i + 1:]:
+                if start < other_end and other_start < end:
+                    count += 1
+    return count
+
+def bench_booking_conflicts():
+    """Double-booking detection: pairwise comparison vs sorted sweep, and per-assignment lookups."""
+    import booking_index
+
+    rng = random.Random(5)
+    base = datetime(2022, 1, 1)
+    records = [{'trip_id': f"TR{i:07d}", 'start_date': (base + timedelta(days=rng.randrange(3650))).isoformat(),
+                'duration_days': rng.randint(1, 14),
+                'traveller_ids': [f"T{rng.randrange(1000):05d}" for _ in range(3)]}
+               for i in range(100000)]
+
+    pairwise_time = _timed(lambda: _pairwise_conflicts(records))
+    sweep_time = _timed(lambda: booking_index.booking_conflicts(records))
+    assert _pairwise_conflicts(records) == len(booking_index.booking_conflicts(records))
+
+    index = booking_index.BookingIndex.from_records(records)
+    queries = [(f"T{rng.randrange(1000):05d}", booking_index.trip_interval(record)) for record in records[:10000]]
+    lookup_time = _timed(lambda: [index.conflicts(traveller_id, start, end) for traveller_id, (start, end) in queries])
+    scan_time = _timed(lambda: [[b for b in index.bookings.get(traveller_id, []) if b[0] < end and b[1] > start]
+                                for traveller_id, (start, end) in queries])
+
+    print(f"Trips: {len(records):,}  Bookings: {sum(len(b) for b in index.bookings.values()):,}  "
+          f"Conflicts: {len(booking_index.booking_conflicts(records)):,}")
+    print(f"Conflict report, pairwise per traveller: {pairwise_time:.3f}s")
+    print(f"Conflict report, sort + sweep:           {sweep_time:.3f}s  ({pairwise_time / sweep_time:.1f}x)")
+    print(f"Assignment check, linear scan:  {scan_time / len(queries) * 1e6:.1f}us")
+    print(f"Assignment check, BookingIndex: {lookup_time / len(queries) * 1e6:.1f}us")
+
+def bench_start_index():
+    """Trips starting in the next 14 days: scanning every trip vs the start-date index."""
+    import data_manager
+
+    rng = random.Random(9)
+    base = datetime(2022, 1, 1)
+    records = [{'trip_id': f"TR{i:07d}", 'name': f"Trip {i}",
+                'start_date': (base + timedelta(days=rng.randrange(1095))).isoformat(),
+                'duration_days': rng.randint(1, 14), 'coordinator_id': None,
+                'traveller_ids': [], 'is_active': True, 'trip_legs': []} for i in range(100000)]
+    start = datetime(2023, 6, 1)
+    end = start + timedelta(days=14)
+
+    original = (data_manager.TRIP_FILE, data_manager.START_INDEX_FILE)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_manager.TRIP_FILE = os.path.join(temp_dir, "trips.json")
+        data_manager.START_INDEX_FILE = os.path.join(temp_dir, "trip_start_index.json")
+        try:
+            data_manager._save_json(data_manager.TRIP_FILE, records)
+            scan_time = _timed(lambda: [t for t in data_manager.load_trips() if start <= t.start_date < end])
+            raw_time = _timed(lambda: [r for r in data_manager._load_json(data_manager.TRIP_FILE)
+                                       if start.isoformat() <= r['start_date'] < end.isoformat()])
+            build_time = _timed(data_manager.rebuild_start_index)
+            data_manager._start_index_cache = None
+            cold_time = _timed(lambda: data_manager.trips_starting_between(start, end))
+            warm_time = _timed(lambda: data_manager.trips_starting_between(start, end), repeat=100)
+            found = len(data_manager.trips_starting_between(start, end))
+        finally:
+            data_manager.TRIP_FILE, data_manager.START_INDEX_FILE = original
+
+    print(f"Trips: {len(records):,}  Departing in the window: {found:,}")
+    print(f"load_trips() and filter:             {scan_time * 1000:.1f}ms")
+    print(f"Raw records and filter:              {raw_time * 1000:.1f}ms")
+    print(f"Index rebuild (once):                {build_time * 1000:.1f}ms")
+    print(f"Index query, first (reads index):    {cold_time * 1000:.1f}ms")
+    print(f"Index query, cached:                 {warm_time * 1e6:.1f}us")
+
+def _use_data_dir(data_manager, data_dir: str) -> Dict[str, str]:
+    """Point every data_manager file at data_dir; returns the original paths."""
+    original = {}
+    for name in dir(data_manager):
+        if name.endswith('_FILE') or name == 'DATA_DIR':
+            original[name] = getattr(data_manager, name)
+            setattr(data_manager, name, data_dir if name == 'DATA_DIR' else
+                    os.path.join(data_dir, os.path.basename(original[name])))
+    return original
+
+def _stress_writer(data_dir: str, worker: int, count: int) -> None:
+    """One concurrent writer: save `count` travellers and add each to the shared trip."""
+    import data_manager
+    if data_manager.DATA_DIR != data_dir:
+        _use_data_dir(data_manager, data_dir)
+    for i in range(count):
+        traveller_id = f"W{worker:02d}N{i:04d}"
+        data_manager.save_traveller(Traveller(traveller_id, f"Traveller {traveller_id}", "Address",
+                                              datetime(1990, 1, 1), "Contact", traveller_id))
+        data_manager.assign_traveller_to_trip("SHARED", traveller_id)
+
+def bench_concurrent_writes():
+    """Many writers saving travellers and assigning them to one trip: updates kept and writes/s."""
+    import contextlib
+    import multiprocessing
+    import threading
+    import data_manager
+
+    writers, per_writer = 8, 40
+    expected = writers * per_writer
+
+    def run(data_dir: str, use_processes: bool):
+        data_manager._save_json(data_manager.TRIP_FILE, [{
+            'trip_id': "SHARED", 'name': "Shared", 'start_date': datetime(2025, 1, 1).isoformat(),
+            'duration_days': 3, 'coordinator_id': None, 'traveller_ids': [], 'is_active': True, 'trip_legs': []}])
+        if use_processes:
+            context = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+            workers = [context.Process(target=_stress_writer, args=(data_dir, w, per_writer)) for w in range(writers)]
+        else:
+            workers = [threading.Thread(target=_stress_writer, args=(data_dir, w, per_writer)) for w in range(writers)]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        elapsed = time.perf_counter() - started
+        travellers = len(data_manager._load_json(data_manager.TRAVELLER_FILE))
+        trip = data_manager._load_json(data_manager.TRIP_FILE)
+        assigned = len(trip[0]['traveller_ids']) if trip else 0
+        return travellers, assigned, elapsed
+
+    rows = []
+    for label, use_processes, locking in (("threads, no locking", False, False),
+                                          ("threads, locked", False, True),
+                                          ("processes, locked", True, True)):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original = _use_data_dir(data_manager, temp_dir)
+            original_locked = data_manager.locked
+            if not locking:
+                data_manager.locked = lambda writes=(), reads=(): contextlib.nullcontext()
+            try:
+                rows.append((label,) + run(temp_dir, use_processes))
+            finally:
+                data_manager.locked = original_locked
+                for name, value in original.items():
+                    setattr(data_manager, name, value)
+
+    print(f"Writers: {writers}  Operations each: {per_writer} saves + {per_writer} assignments")
+    for label, travellers, assigned, elapsed in rows:
+        print(f"{label:<22} travellers kept {travellers:>4}/{expected}  assignments kept {assigned:>4}/{expected}  "
+              f"{2 * expected / elapsed:7.0f} writes/s")
+
+def bench_durable_writes():
+    """Saving travellers one by one: no fsync, an fsync per save, and one group commit (batched_writes)."""
+    import data_manager
+
+    count = 200
+    travellers = [Traveller(f"T{i:05d}", f"Traveller {i}", "Address", datetime(1990, 1, 1), "Contact", f"G{i}")
+                  for i in range(count)]
+
+    def save_all(batched: bool):
+        if batched:
+            with data_manager.batched_writes():
+                for traveller in travellers:
+                    data_manager.save_traveller(traveller)
+        else:
+            for traveller in travellers:
+                data_manager.save_traveller(traveller)
+
+    rows = []
+    original_fsync = data_manager.FSYNC_WRITES
+    # On the project's disk rather than /tmp, which may be memory-backed
+    for label, fsync, batched in (("no fsync", False, False), ("fsync every save", True, False),
+                                  ("batched_writes()", True, True)):
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            original = _use_data_dir(data_manager, temp_dir)
+            data_manager.FSYNC_WRITES = fsync
+            try:
+                rows.append((label, _timed(lambda: save_all(batched))))
+                assert len(data_manager._load_json(data_manager.TRAVELLER_FILE)) == count
+            finally:
+                data_manager.FSYNC_WRITES = original_fsync
+                for name, value in original.items():
+                    setattr(data_manager, name, value)
+
+    print(f"Saves: {count} (each rewrites travellers.json via a temp file and rename)")
+    for label, elapsed in rows:
+        print(f"{label:<18} {elapsed:.3f}s  {elapsed / count * 1000:.2f}ms per save")
+
+def _write_sample_files(data_manager, num_trips: int, travellers_per_trip: int = 2) -> None:
+    """Write make_sample_data() output to data_manager's user, traveller, trip and invoice files."""
+    trips, invoices, travellers = make_sample_data(num_trips, travellers_per_trip=travellers_per_trip)
+    coordinators = {trip.coordinator.user_id: trip.coordinator for trip in trips}.values()
+    data_manager._save_json(data_manager.USER_FILE, [
+        {'user_id': u.user_id, 'username': u.username, 'password': u.password, 'name': u.name,
+         'role': u.role.value, '_type': type(u).__name__} for u in coordinators])
+    data_manager._save_json(data_manager.TRAVELLER_FILE, [data_manager._traveller_dict(t) for t in travellers])
+    data_manager._save_json(data_manager.TRIP_FILE, [
+        {'trip_id': t.trip_id, 'name': t.name, 'start_date': t.start_date.isoformat(),
+         'duration_days': t.duration_days, 'coordinator_id': t.coordinator.user_id,
+         'traveller_ids': [tr.traveller_id for tr in t.travellers], 'is_active': t.is_active,
+         'trip_legs': []} for t in trips])
+    data_manager._save_json(data_manager.INVOICE_FILE, [
+        {'invoice_id': inv.invoice_id, 'trip_id': inv.trip.trip_id, 'issue_date': inv.issue_date.isoformat(),
+         'total_amount': inv.total_amount, 'status': inv.status,
+         'payments': [{'payment_id': p.payment_id, 'amount': p.amount, 'date': p.date.isoformat(),
+                       'method': p.method} for p in inv.payments]} for inv in invoices])
+
+def bench_async_loads():
+    """Many concurrent load_invoices() calls: one after another vs asyncio.gather with shared parses."""
+    import asyncio
+    import contextlib
+    import data_manager
+    import async_data_manager
+
+    callers = 20
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original = _use_data_dir(data_manager, temp_dir)
+        try:
+            _write_sample_files(data_manager, 5000)
+
+            async def gathered():
+                return await asyncio.gather(*[async_data_manager.load_invoices() for _ in range(callers)])
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                sequential_time = _timed(lambda: [data_manager.load_invoices() for _ in range(callers)])
+                gathered_time = _timed(lambda: asyncio.run(gathered()))
+        finally:
+            for name, value in original.items():
+                setattr(data_manager, name, value)
+
+    print(f"Callers: {callers}, each loading 5,000 invoices (with trips, travellers and users)")
+    print(f"Sequential load_invoices():      {sequential_time:.3f}s  (4 file parses per caller)")
+    print(f"asyncio.gather(load_invoices()): {gathered_time:.3f}s  (4 file parses in total)")
+
+def bench_parallel_load():
+    """Loading every data file: load_invoices() + load_travellers() vs load_all() with threads and processes."""
+    import contextlib
+    import data_manager
+
+    print(f"CPUs: {os.cpu_count()}")
+    for num_trips in (2000, 20000, 100000):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original = _use_data_dir(data_manager, temp_dir)
+            try:
+                _write_sample_files(data_manager, num_trips)
+                size = sum(os.path.getsize(f) for f in (data_manager.USER_FILE, data_manager.TRAVELLER_FILE,
+                                                         data_manager.TRIP_FILE, data_manager.INVOICE_FILE))
+                with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                    sequential_time = _timed(lambda: (data_manager.load_invoices(), data_manager.load_travellers()))
+                    thread_time = _timed(lambda: data_manager.load_all(use_processes=False))
+                    process_time = _timed(lambda: data_manager.load_all(use_processes=True))
+            finally:
+                for name, value in original.items():
+                    setattr(data_manager, name, value)
+        print(f"{num_trips:>7,} trips ({size / 1e6:.0f} MB): sequential {sequential_time:.3f}s  "
+              f"load_all threads {thread_time:.3f}s  load_all processes {process_time:.3f}s")
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    'render_options': bench_render_options,
+    'aggregation': bench_aggregation,
+    'age_buckets': bench_age_buckets,
+    'figure_templates': bench_figure_templates,
+    'route_graph': bench_route_graph,
+    'booking_conflicts': bench_booking_conflicts,
+    'start_index': bench_start_index,
+    'concurrent_writes': bench_concurrent_writes,
+    'durable_writes': bench_durable_writes,
+    'async_loads': bench_async_loads,
+    'parallel_load': bench_parallel_load,
+}
+
+def main(argv: List[str]) -> int:
+    names = argv or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+        return 2
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,183 @@
+# FILE: booking_index.py
+# Double-booking checks for travellers:
+#     python booking_index.py
+# A trip occupies the days [start_date, start_date + duration_days). The
+# BookingIndex keeps each traveller's trips sorted by start day, so the trips
+# overlapping a new assignment are found with a binary search instead of a
+# scan. booking_conflicts() reports every overlapping pair in the dataset
+# with one sort-and-sweep per traveller rather than comparing all pairs.
+# Code that may run alongside trip saves in other threads queries the
+# shared index inside shared_booking_index().
+
+import argparse
+import bisect
+import heapq
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+def _day_number(value) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.toordinal()
+
+def trip_interval(record: Dict[str, Any]) -> Tuple[int, int]:
+    """(first day, day after the last day) of a stored trip record, as date ordinals."""
+    start = _day_number(record['start_date'])
+    return start, start + max(int(record.get('duration_days', 1)), 1)
+
+def _interval_of(trip) -> Tuple[int, int]:
+    start = _day_number(trip.start_date)
+    return start, start + max(trip.duration_days, 1)
+
+class BookingIndex:
+    """Each traveller's trip date ranges, sorted by start day.
+
+    Only bookings that start after (new start - longest booking) can overlap
+    a new one, so a lookup is a binary search plus the few neighbours in that
+    window.
+    """
+
+    def __init__(self):
+        # traveller_id -> sorted [(start, end, trip_id)]
+        self.bookings: Dict[str, List[Tuple[int, int, str]]] = {}
+        # traveller_id -> longest current booking, the width of the lookup window
+        self.longest: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'BookingIndex':
+        index = cls()
+        for record in records:
+            index.add_trip_record(record)
+        return index
+
+    def add(self, traveller_id: str, trip_id: str, start: int, end: int) -> None:
+        bisect.insort(self.bookings.setdefault(traveller_id, []), (start, end, trip_id))
+        self.longest[traveller_id] = max(self.longest.get(traveller_id, 0), end - start)
+
+    def remove(self, traveller_id: str, trip_id: str, start: int, end: int) -> None:
+        bookings = self.bookings.get(traveller_id, [])
+        position = bisect.bisect_left(bookings, (start, end, trip_id))
+        if position < len(bookings) and bookings[position] == (start, end, trip_id):
+            bookings.pop(position)
+            if not bookings:
+                del self.bookings[traveller_id]
+                del self.longest[traveller_id]
+            elif end - start == self.longest[traveller_id]:
+                # The longest booking may be gone: narrow the window to what is left
+                self.longest[traveller_id] = max(booked_end - booked_start for booked_start, booked_end, _ in bookings)
+
+    def add_trip_record(self, record: Dict[str, Any]) -> None:
+        start, end = trip_interval(record)
+        for traveller_id in record.get('traveller_ids', []):
+            self.add(traveller_id, record['trip_id'], start, end)
+
+    def remove_trip_record(self, record: Dict[str, Any]) -> None:
+        start, end = trip_interval(record)
+        for traveller_id in record.get('traveller_ids', []):
+            self.remove(traveller_id, record['trip_id'], start, end)
+
+    def on_trip_change(self, old_record: Optional[Dict[str, Any]], new_record: Optional[Dict[str, Any]]) -> None:
+        """data_manager trip listener: replace the old record's bookings with the new one's."""
+        if old_record:
+            self.remove_trip_record(old_record)
+        if new_record:
+            self.add_trip_record(new_record)
+
+    def conflicts(self, traveller_id: str, start: int, end: int,
+                  exclude_trip_id: Optional[str] = None) -> List[str]:
+        """IDs of the traveller's trips overlapping [start, end), by start day."""
+        bookings = self.bookings.get(traveller_id)
+        if not bookings:
+            return []
+        low = bisect.bisect_right(bookings, (start - self.longest[traveller_id],))
+        high = bisect.bisect_left(bookings, (end,))
+        return [trip_id for booked_start, booked_end, trip_id in bookings[low:high]
+                if booked_end > start and trip_id != exclude_trip_id]
+
+    def assignment_conflicts(self, traveller_id: str, trip) -> List[str]:
+        """IDs of the traveller's other trips overlapping a Trip object's dates."""
+        return self.conflicts(traveller_id, *_interval_of(trip), trip.trip_id)
+
+def booking_conflicts(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Every pair of overlapping trips that share a traveller, across all trip records.
+
+    Each traveller's bookings are sorted once and swept with a min-heap of
+    the end days of the trips still in progress, so the cost is
+    O(n log n + number of conflicts) rather than O(n^2).
+    """
+    per_traveller: Dict[str, List[Tuple[int, int, str]]] = {}
+    for record in records:
+        start, end = trip_interval(record)
+        for traveller_id in record.get('traveller_ids', []):
+            per_traveller.setdefault(traveller_id, []).append((start, end, record['trip_id']))
+
+    conflicts = []
+    for traveller_id, bookings in per_traveller.items():
+        bookings.sort()
+        active: List[Tuple[int, str]] = []
+        for start, end, trip_id in bookings:
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for active_end, active_trip_id in active:
+                conflicts.append({
+                    'traveller_id': traveller_id,
+                    'trip_ids': (active_trip_id, trip_id),
+                    'overlap_start': date.fromordinal(start).isoformat(),
+                    'overlap_days': min(end, active_end) - start
+                })
+            heapq.heappush(active, (end, trip_id))
+    return conflicts
+
+_index = None
+
+def _view():
+    global _index
+    if _index is None:
+        import data_manager
+        _index = data_manager.TripFileView(BookingIndex.from_records)
+    return _index
+
+def get_booking_index() -> BookingIndex:
+    """The shared index over the trips file, built on first use, kept up to date on trip
+    saves, and rebuilt when another process has changed the file.
+
+    Saves change the index in place; query it inside shared_booking_index()
+    when other threads may save trips.
+    """
+    return _view().get()
+
+def shared_booking_index():
+    """Context manager giving the shared index, with trip saves held off until the block ends."""
+    return _view().reading()
+
+def reset_booking_index() -> None:
+    """Drop the shared index; the next call rebuilds it from the trips file."""
+    if _index is not None:
+        _index.reset()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report travellers booked on overlapping trips.")
+    parser.parse_args(argv)
+
+    import data_manager
+    names = {}
+    records = []
+    for record in data_manager.iter_json_records(data_manager.TRIP_FILE):
+        names[record['trip_id']] = record.get('name', '')
+        records.append({'trip_id': record['trip_id'], 'start_date': record['start_date'],
+                        'duration_days': record.get('duration_days', 1),
+                        'traveller_ids': record.get('traveller_ids', [])})
+    travellers = {t['traveller_id']: t['name'] for t in data_manager.iter_json_records(data_manager.TRAVELLER_FILE)}
+    conflicts = booking_conflicts(records)
+
+    for conflict in conflicts:
+        first, second = conflict['trip_ids']
+        traveller = travellers.get(conflict['traveller_id'], conflict['traveller_id'])
+        print(f"{traveller}: {names[first]} ({first}) and {names[second]} ({second}) overlap for "
+              f"{conflict['overlap_days']} day(s) from {conflict['overlap_start']}")
+    print(f"{len(records)} trip(s) checked, {len(conflicts)} double booking(s).")
+    return 1 if conflicts else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
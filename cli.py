@@ -0,0 +1,295 @@
+# FILE: cli.py
+# Non-interactive command-line interface for scripts, nightly jobs and bulk loads:
+#     python cli.py trips list [--coordinator ID|USERNAME] [--active] [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--json]
+#     python cli.py travellers list [--json]
+#     python cli.py travellers import FILE.csv [--dry-run]
+#     python cli.py invoices list [--outstanding] [--json]
+#     python cli.py reports render (--all | KIND ...) [--format png] [--dpi 150]
+#     python cli.py reports export (--all | KIND ...) [--formats csv json] [--output-dir DIR]
+#     python cli.py audit (itineraries | bookings)
+#     python cli.py rebuild
+# Listings are written one record at a time as the data files are read
+# (JSON Lines with --json), so they can be piped into other tools.
+# Exit status: 0 on success, 1 on failure or when an audit finds issues,
+# 2 on a usage error. Like the other batch tools it works on the data files
+# directly, so there is no login.
+
+import argparse
+import contextlib
+import csv
+import importlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+EXIT_OK, EXIT_FAILURE, EXIT_USAGE = 0, 1, 2
+
+# Columns accepted by `travellers import`; the others may be left out
+IMPORT_REQUIRED = ('name', 'date_of_birth')
+IMPORT_OPTIONAL = ('traveller_id', 'address', 'emergency_contact', 'government_id')
+
+def _load(name: str):
+    """Import a module with its "loaded" banner sent to stderr, keeping stdout machine-readable."""
+    with contextlib.redirect_stdout(sys.stderr):
+        return importlib.import_module(name)
+
+def _date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+def _emit(record: Dict[str, Any], as_json: bool, columns: List[str]) -> None:
+    if as_json:
+        print(json.dumps(record))
+    else:
+        print("\t".join(str(record.get(column, '')) for column in columns))
+
+# --- trips ----------------------------------------------------------------
+
+def _resolve_coordinator(data_manager, value: str) -> Optional[str]:
+    """User ID for a coordinator given by ID or username."""
+    for user in data_manager.iter_json_records(data_manager.USER_FILE):
+        if value in (user['user_id'], user['username']):
+            return user['user_id']
+    return None
+
+def trips_list(args) -> int:
+    data_manager = _load('data_manager')
+    coordinator_id = None
+    if args.coordinator:
+        coordinator_id = _resolve_coordinator(data_manager, args.coordinator)
+        if coordinator_id is None:
+            print(f"Unknown coordinator '{args.coordinator}'.", file=sys.stderr)
+            return EXIT_FAILURE
+
+    if args.start or args.end:
+        # A date range is looked up in the start-date index; only the matching
+        # records are kept from the file scan, then listed in the index's date order
+        start = args.start or datetime.min
+        end = args.end + timedelta(days=1) if args.end else datetime.max
+        order = [entry['trip_id'] for entry in data_manager.trips_starting_between(start, end, coordinator_id)]
+        wanted = set(order)
+        found = {record['trip_id']: record for record in data_manager.iter_json_records(data_manager.TRIP_FILE)
+                 if record['trip_id'] in wanted}
+        records: Iterator[Dict[str, Any]] = (found[trip_id] for trip_id in order if trip_id in found)
+    else:
+        records = data_manager.iter_json_records(data_manager.TRIP_FILE)
+
+    columns = ['trip_id', 'start_date', 'duration_days', 'name', 'coordinator_id', 'travellers', 'legs', 'is_active']
+    for record in records:
+        if coordinator_id and record.get('coordinator_id') != coordinator_id:
+            continue
+        if args.active and not record.get('is_active', True):
+            continue
+        if not args.json:
+            record = dict(record, start_date=record['start_date'][:10],
+                          travellers=len(record.get('traveller_ids', [])), legs=len(record.get('trip_legs', [])))
+        _emit(record, args.json, columns)
+    return EXIT_OK
+
+# --- travellers -------------------------------------------------------------
+
+def travellers_list(args) -> int:
+    data_manager = _load('data_manager')
+    columns = ['traveller_id', 'name', 'date_of_birth', 'government_id', 'emergency_contact']
+    for record in data_manager.iter_json_records(data_manager.TRAVELLER_FILE):
+        if not args.json:
+            record = dict(record, date_of_birth=record['date_of_birth'][:10])
+        _emit(record, args.json, columns)
+    return EXIT_OK
+
+def _read_travellers_csv(path: str, models) -> tuple:
+    """Parse an import file into Traveller objects. Returns (travellers, errors)."""
+    travellers, errors = [], []
+    prefix = f"T{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in IMPORT_REQUIRED if column not in (reader.fieldnames or [])]
+        if missing:
+            return [], [f"missing column(s): {', '.join(missing)}"]
+        for line, row in enumerate(reader, start=2):
+            name = (row.get('name') or '').strip()
+            if not name:
+                errors.append(f"line {line}: name is empty")
+                continue
+            try:
+                date_of_birth = datetime.strptime((row.get('date_of_birth') or '').strip(), '%Y-%m-%d')
+            except ValueError:
+                errors.append(f"line {line}: invalid date_of_birth '{row.get('date_of_birth')}', expected YYYY-MM-DD")
+                continue
+            travellers.append(models.Traveller(
+                traveller_id=(row.get('traveller_id') or '').strip() or f"{prefix}{line:05d}",
+                name=name,
+                address=(row.get('address') or '').strip(),
+                date_of_birth=date_of_birth,
+                emergency_contact=(row.get('emergency_contact') or '').strip(),
+                government_id=(row.get('government_id') or '').strip()
+            ))
+    return travellers, errors
+
+def travellers_import(args) -> int:
+    """Import travellers from CSV. Nothing is written unless every row is valid."""
+    models = _load('models')
+    data_manager = _load('data_manager')
+    try:
+        travellers, errors = _read_travellers_csv(args.file, models)
+    except OSError as e:
+        print(f"Cannot read {args.file}: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    for error in errors:
+        print(f"{args.file}: {error}", file=sys.stderr)
+    if errors:
+        print("No travellers imported.", file=sys.stderr)
+        return EXIT_FAILURE
+
+    if args.dry_run:
+        print(f"{len(travellers)} traveller(s) would be imported.")
+        return EXIT_OK
+    added, updated = data_manager.save_travellers(travellers)
+    print(f"Imported {len(travellers)} traveller(s): {added} added, {updated} updated.")
+    return EXIT_OK
+
+# --- invoices ---------------------------------------------------------------
+
+def invoices_list(args) -> int:
+    data_manager = _load('data_manager')
+    columns = ['invoice_id', 'trip_id', 'issue_date', 'total_amount', 'paid', 'balance']
+    for record in data_manager.iter_json_records(data_manager.INVOICE_FILE):
+        paid = round(sum(payment['amount'] for payment in record.get('payments', [])), 2)
+        balance = round(record['total_amount'] - paid, 2)
+        if args.outstanding and balance <= 0:
+            continue
+        record = dict(record, paid=paid, balance=balance)
+        if not args.json:
+            record['issue_date'] = record['issue_date'][:10]
+        _emit(record, args.json, columns)
+    return EXIT_OK
+
+# --- reports ----------------------------------------------------------------
+
+def _report_kinds(args, available: List[str]) -> Optional[List[str]]:
+    if args.all:
+        return list(available)
+    unknown = [kind for kind in args.kinds if kind not in available]
+    if unknown or not args.kinds:
+        message = f"unknown report(s): {', '.join(unknown)}" if unknown else "name the reports or use --all"
+        print(f"{message}. Available: {', '.join(available)}", file=sys.stderr)
+        return None
+    return args.kinds
+
+def reports_render(args) -> int:
+    report_export = _load('report_export')
+    kinds = _report_kinds(args, list(report_export.STREAMED_REPORTS))
+    if kinds is None:
+        return EXIT_USAGE
+    report_generator = _load('report_generator')
+    options = report_generator.RenderOptions(fmt=args.format, dpi=args.dpi)
+
+    status = EXIT_OK
+    for kind in kinds:
+        data = report_export.STREAMED_REPORTS[kind]()
+        success, result = report_generator.ReportGenerator.render_report(kind, data, options)
+        if success:
+            print(result)
+        else:
+            print(f"{kind}: {result}", file=sys.stderr)
+            status = EXIT_FAILURE
+        sys.stdout.flush()
+    return status
+
+def reports_export(args) -> int:
+    report_export = _load('report_export')
+    kinds = _report_kinds(args, list(report_export.STREAMED_REPORTS))
+    if kinds is None:
+        return EXIT_USAGE
+    for kind in kinds:
+        for path in report_export.export_reports([kind], args.formats, args.output_dir):
+            print(path)
+    return EXIT_OK
+
+# --- maintenance ------------------------------------------------------------
+
+def audit(args) -> int:
+    module = _load('itinerary_validator' if args.check == 'itineraries' else 'booking_index')
+    return module.main([])
+
+def rebuild(args) -> int:
+    """Recompute the derived files (monthly rollups, start-date index) from the data files."""
+    data_manager = _load('data_manager')
+    with data_manager.batched_writes():
+        rollups = data_manager.rebuild_monthly_rollups()
+        entries = data_manager.rebuild_start_index()
+    print(f"{data_manager.ROLLUP_FILE}: {len(rollups)} month(s)")
+    print(f"{data_manager.START_INDEX_FILE}: {len(entries)} trip(s)")
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='cli.py', description="Travel Management System command-line interface.")
+    groups = parser.add_subparsers(dest='group', required=True, metavar='COMMAND')
+
+    trips = groups.add_parser('trips', help="list trips").add_subparsers(dest='action', required=True)
+    listing = trips.add_parser('list', help="list trips, optionally filtered")
+    listing.add_argument('--coordinator', help="coordinator user ID or username")
+    listing.add_argument('--active', action='store_true', help="only active trips")
+    listing.add_argument('--from', dest='start', type=_date, help="first start date, YYYY-MM-DD")
+    listing.add_argument('--to', dest='end', type=_date, help="last start date, YYYY-MM-DD")
+    listing.add_argument('--json', action='store_true', help="one JSON record per line")
+    listing.set_defaults(handler=trips_list)
+
+    travellers = groups.add_parser('travellers', help="list or import travellers").add_subparsers(dest='action', required=True)
+    listing = travellers.add_parser('list', help="list travellers")
+    listing.add_argument('--json', action='store_true', help="one JSON record per line")
+    listing.set_defaults(handler=travellers_list)
+    importing = travellers.add_parser('import', help="add or update travellers from a CSV file")
+    importing.add_argument('file', help=f"CSV with columns {', '.join(IMPORT_REQUIRED)} "
+                                        f"(optional: {', '.join(IMPORT_OPTIONAL)})")
+    importing.add_argument('--dry-run', action='store_true', help="validate the file without saving")
+    importing.set_defaults(handler=travellers_import)
+
+    invoices = groups.add_parser('invoices', help="list invoices").add_subparsers(dest='action', required=True)
+    listing = invoices.add_parser('list', help="list invoices with paid amounts and balances")
+    listing.add_argument('--outstanding', action='store_true', help="only invoices with a balance due")
+    listing.add_argument('--json', action='store_true', help="one JSON record per line")
+    listing.set_defaults(handler=invoices_list)
+
+    reports = groups.add_parser('reports', help="render or export reports").add_subparsers(dest='action', required=True)
+    render = reports.add_parser('render', help="render report charts from the data files")
+    render.add_argument('kinds', nargs='*', metavar='KIND', help="reports to render")
+    render.add_argument('--all', action='store_true', help="render every report")
+    render.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'], help="chart format (default: png)")
+    render.add_argument('--dpi', type=int, default=150, help="chart resolution (default: 150)")
+    render.set_defaults(handler=reports_render)
+    export = reports.add_parser('export', help="write report aggregates as CSV/JSON")
+    export.add_argument('kinds', nargs='*', metavar='KIND', help="reports to export")
+    export.add_argument('--all', action='store_true', help="export every report")
+    export.add_argument('--formats', nargs='+', default=['csv', 'json'], choices=['csv', 'json'])
+    export.add_argument('--output-dir', default=None, help="directory for the files (default: reports/data)")
+    export.set_defaults(handler=reports_export)
+
+    checks = groups.add_parser('audit', help="check itineraries or double bookings")
+    checks.add_argument('check', choices=['itineraries', 'bookings'])
+    checks.set_defaults(handler=audit)
+
+    groups.add_parser('rebuild', help="recompute rollups and the start-date index").set_defaults(handler=rebuild)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Every command reads the data files; load data_manager here so its banner goes to stderr too
+    _load('data_manager')
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_FAILURE
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# FILE: dashboard.py
+# Self-contained HTML dashboard of the trip, financial, traveller and revenue
+# aggregates. Charts are written directly as inline SVG markup, so nothing is
+# rasterised and matplotlib is never imported:
+#     python dashboard.py [--output reports/dashboard.html]
+
+import argparse
+import math
+import os
+import sys
+from datetime import datetime
+from html import escape
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import report_data
+
+DASHBOARD_FILE = os.path.join("reports", "dashboard.html")
+PALETTE = ['#80b1d3', '#fb8072', '#8dd3c7', '#bebada', '#fdb462', '#b3de69', '#fccde5', '#ffffb3']
+
+CHART_WIDTH = 460
+CHART_HEIGHT = 260
+
+def _money(value: float) -> str:
+    return f"£{value:,.2f}"
+
+def _count(value: float) -> str:
+    return f"{int(value):,}"
+
+def _nice_max(value: float) -> float:
+    """Round an axis maximum up to 1, 2 or 5 times a power of ten."""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if value <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
+
+def _svg(body: List[str], title: str, width: int = CHART_WIDTH, height: int = CHART_HEIGHT) -> str:
+    return (f'<figure><figcaption>{escape(title)}</figcaption>'
+            f'<svg viewBox="0 0 {width} {height}" width="{width}" height="{height}" role="img" '
+            f'aria-label="{escape(title)}">{"".join(body)}</svg></figure>')
+
+def _empty(title: str, message: str = "No data") -> str:
+    return _svg([f'<text x="{CHART_WIDTH / 2}" y="{CHART_HEIGHT / 2}" text-anchor="middle">{escape(message)}</text>'],
+                title)
+
+def bar_chart(labels: Sequence[str], values: Sequence[float], title: str, fmt=_count,
+              colors: Optional[Sequence[str]] = None) -> str:
+    """Vertical bar chart with value labels and a gridded y axis; negative values hang below zero."""
+    if not labels:
+        return _empty(title)
+    left, right, top, bottom = 56, 10, 20, 50
+    plot_w, plot_h = CHART_WIDTH - left - right, CHART_HEIGHT - top - bottom
+    high_value, low_value = max(max(values), 0), min(min(values), 0)
+    if low_value < 0:
+        step = _nice_max((high_value - low_value) / 4)
+        low, high = math.floor(low_value / step) * step, math.ceil(high_value / step) * step
+    else:
+        low, high = 0, _nice_max(high_value)
+        step = high / 4
+    y_of = lambda value: top + plot_h * (high - value) / (high - low)
+    slot = plot_w / len(labels)
+    colors = colors or PALETTE
+    # Long series (e.g. months) only label every few bars and drop the value labels
+    label_every = max(1, len(labels) // 12)
+    body = []
+    for i in range(round((high - low) / step) + 1):
+        tick = low + step * i
+        y = y_of(tick)
+        body.append(f'<line x1="{left}" x2="{left + plot_w}" y1="{y:.1f}" y2="{y:.1f}" class="grid"/>'
+                    f'<text x="{left - 4}" y="{y + 4:.1f}" text-anchor="end" class="tick">{tick:,.0f}</text>')
+    for i, (label, value) in enumerate(zip(labels, values)):
+        height = plot_h * abs(value) / (high - low)
+        x = left + i * slot + slot * 0.15
+        color = colors[i % len(colors)]
+        body.append(f'<rect x="{x:.1f}" y="{y_of(max(value, 0)):.1f}" width="{slot * 0.7:.1f}" '
+                    f'height="{height:.1f}" fill="{color}"><title>{escape(str(label))}: {fmt(value)}</title></rect>')
+        if label_every == 1:
+            label_y = y_of(value) - 4 if value >= 0 else y_of(value) + 12
+            body.append(f'<text x="{x + slot * 0.35:.1f}" y="{label_y:.1f}" text-anchor="middle" '
+                        f'class="value">{fmt(value)}</text>')
+        if i % label_every == 0:
+            body.append(f'<text x="{x + slot * 0.35:.1f}" y="{top + plot_h + 16}" text-anchor="middle" '
+                        f'class="tick">{escape(str(label)[:14])}</text>')
+    return _svg(body, title)
+
+def hbar_chart(labels: Sequence[str], values: Sequence[float], title: str, fmt=_money, color: str = PALETTE[1]) -> str:
+    """Horizontal bar chart, largest entry first as given."""
+    if not labels:
+        return _empty(title)
+    left, right, top = 130, 90, 10
+    plot_w = CHART_WIDTH - left - right
+    row = min(36, (CHART_HEIGHT - 2 * top) / len(labels))
+    top_value = max(max(values), 1e-9)
+    body = []
+    for i, (label, value) in enumerate(zip(labels, values)):
+        y = top + i * row
+        width = plot_w * max(value, 0) / top_value
+        body.append(f'<text x="{left - 6}" y="{y + row / 2 + 4:.1f}" text-anchor="end" class="tick">'
+                    f'{escape(str(label)[:20])}</text>')
+        body.append(f'<rect x="{left}" y="{y + row * 0.15:.1f}" width="{width:.1f}" height="{row * 0.7:.1f}" '
+                    f'fill="{color}"><title>{escape(str(label))}: {fmt(value)}</title></rect>')
+        body.append(f'<text x="{left + width + 4:.1f}" y="{y + row / 2 + 4:.1f}" class="value">{fmt(value)}</text>')
+    return _svg(body, title)
+
+def pie_chart(labels: Sequence[str], values: Sequence[float], title: str, fmt=_count) -> str:
+    """Pie chart with a legend giving each slice's value and share."""
+    total = float(sum(values))
+    if total <= 0:
+        return _empty(title)
+    cx, cy, r = 120, CHART_HEIGHT / 2, 100
+    body = []
+    angle = -math.pi / 2
+    for i, (label, value) in enumerate(zip(labels, values)):
+        color = PALETTE[i % len(PALETTE)]
+        share = value / total
+        if share >= 1:
+            body.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{color}"/>')
+        elif share > 0:
+            end = angle + 2 * math.pi * share
+            x1, y1 = cx + r * math.cos(angle), cy + r * math.sin(angle)
+            x2, y2 = cx + r * math.cos(end), cy + r * math.sin(end)
+            large = 1 if share > 0.5 else 0
+            body.append(f'<path d="M{cx},{cy} L{x1:.2f},{y1:.2f} A{r},{r} 0 {large} 1 {x2:.2f},{y2:.2f} Z" '
+                        f'fill="{color}"><title>{escape(str(label))}: {fmt(value)}</title></path>')
+            angle = end
+        legend_y = 30 + i * 22
+        body.append(f'<rect x="250" y="{legend_y - 11}" width="14" height="14" fill="{color}"/>'
+                    f'<text x="270" y="{legend_y}" class="tick">{escape(str(label))}: {fmt(value)} '
+                    f'({100 * share:.1f}%)</text>')
+    return _svg(body, title)
+
+def line_chart(labels: Sequence[str], series: Sequence[Tuple[str, Sequence[float], str]], title: str) -> str:
+    """Line chart of one or more series over the same labels (None values are gaps)."""
+    if not labels:
+        return _empty(title)
+    left, right, top, bottom = 64, 10, 26, 50
+    plot_w, plot_h = CHART_WIDTH - left - right, CHART_HEIGHT - top - bottom
+    top_value = _nice_max(max((v for _, values, _ in series for v in values if v is not None), default=0))
+    step = plot_w / max(len(labels) - 1, 1)
+    label_every = max(1, len(labels) // 8)
+    body = []
+    for i in range(5):
+        y = top + plot_h - plot_h * i / 4
+        body.append(f'<line x1="{left}" x2="{left + plot_w}" y1="{y:.1f}" y2="{y:.1f}" class="grid"/>'
+                    f'<text x="{left - 4}" y="{y + 4:.1f}" text-anchor="end" class="tick">{top_value * i / 4:,.0f}</text>')
+    for i in range(0, len(labels), label_every):
+        body.append(f'<text x="{left + i * step:.1f}" y="{top + plot_h + 16}" text-anchor="middle" '
+                    f'class="tick">{escape(str(labels[i]))}</text>')
+    for s, (name, values, color) in enumerate(series):
+        segments, current = [], []
+        for i, value in enumerate(values):
+            if value is None:
+                if current:
+                    segments.append(current)
+                current = []
+                continue
+            current.append(f"{left + i * step:.1f},{top + plot_h - plot_h * value / top_value:.1f}")
+        if current:
+            segments.append(current)
+        for points in segments:
+            body.append(f'<polyline points="{" ".join(points)}" fill="none" stroke="{color}" stroke-width="2"/>')
+        body.append(f'<rect x="{left + 10 + s * 130}" y="6" width="12" height="3" fill="{color}"/>'
+                    f'<text x="{left + 26 + s * 130}" y="12" class="tick">{escape(name)}</text>')
+    return _svg(body, title)
+
+def dashboard_data(trips: List, invoices: List, travellers: List) -> Dict[str, Any]:
+    """All dashboard aggregates from one load of the data."""
+    data: Dict[str, Any] = {'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+                            'trip_stats': report_data.trip_statistics(trips)}
+    data['financial_summary'] = report_data.financial_summary(invoices)
+    data['traveller_stats'] = report_data.traveller_statistics(travellers)
+    data['revenue_trends'] = report_data.revenue_series(invoices, trips) if invoices else None
+    return data
+
+_STYLE = """
+body { font-family: -apple-system, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 24px; color: #222; background: #f6f7f9; }
+h1 { margin: 0 0 4px; } .generated { color: #666; margin-bottom: 20px; }
+.cards { display: flex; flex-wrap: wrap; gap: 12px; margin-bottom: 20px; }
+.card { background: #fff; border-radius: 6px; padding: 12px 18px; box-shadow: 0 1px 3px rgba(0,0,0,.12); }
+.card .label { color: #666; font-size: 13px; } .card .figure { font-size: 24px; font-weight: bold; color: #4682b4; }
+section { margin-bottom: 24px; } .charts { display: flex; flex-wrap: wrap; gap: 12px; }
+figure { background: #fff; margin: 0; padding: 10px; border-radius: 6px; box-shadow: 0 1px 3px rgba(0,0,0,.12); }
+figcaption { font-weight: bold; margin-bottom: 6px; }
+svg text { font-size: 11px; } .tick { fill: #444; } .value { fill: #222; font-size: 10px; }
+.grid { stroke: #ddd; stroke-width: 1; }
+"""
+
+def render_dashboard(data: Dict[str, Any]) -> str:
+    """The complete HTML document for dashboard_data()."""
+    trip_stats = data['trip_stats']
+    financial = data['financial_summary']
+    travellers = data['traveller_stats']
+    trends = data['revenue_trends']
+
+    cards = [
+        ("Trips", _count(trip_stats['active'] + trip_stats['inactive'])),
+        ("Active trips", _count(trip_stats['active'])),
+        ("Travellers", _count(travellers['total_travellers'])),
+        ("Revenue", _money(financial['total_revenue'])),
+        ("Outstanding", _money(financial['total_outstanding'])),
+    ]
+    sections = [
+        ("Trips", [
+            bar_chart([name for name, _ in trip_stats['coordinators']],
+                      [count for _, count in trip_stats['coordinators']], "Trips per Coordinator",
+                      colors=[PALETTE[0]]),
+            pie_chart(["Active", "Inactive"], [trip_stats['active'], trip_stats['inactive']], "Trip Status"),
+        ]),
+        ("Finance", [
+            bar_chart(["Revenue", "Paid", "Outstanding"],
+                      [financial['total_revenue'], financial['total_paid'], financial['total_outstanding']],
+                      "Financial Overview", fmt=_money, colors=['#8dd3c7', '#80b1d3', '#fb8072']),
+            pie_chart(["Paid", "Pending"], [financial['paid_count'], financial['pending_count']], "Invoice Status"),
+            hbar_chart([m for m, _ in financial['payment_methods']],
+                       [a for _, a in financial['payment_methods']], "Payment Methods"),
+            hbar_chart([n for n, _ in financial['top_invoices']],
+                       [a for _, a in financial['top_invoices']], "Top Invoices by Value", color=PALETTE[0]),
+        ]),
+        ("Travellers", [
+            bar_chart([g for g, _ in travellers['age_groups']], [c for _, c in travellers['age_groups']],
+                      "Traveller Age Distribution"),
+        ]),
+        ("Revenue", [
+            line_chart(trends['periods'], [("Revenue (£)", trends['revenues'], '#4682b4')], "Monthly Revenue")
+            if trends else _empty("Monthly Revenue"),
+            bar_chart(trends['periods'], trends['trip_counts'], "Trips Starting per Month", colors=['#f08080'])
+            if trends else _empty("Trips Starting per Month"),
+        ]),
+    ]
+
+    html = ['<!DOCTYPE html>', '<html lang="en"><head><meta charset="utf-8">',
+            '<title>Travel Management Dashboard</title>', f'<style>{_STYLE}</style></head><body>',
+            '<h1>Travel Management Dashboard</h1>',
+            f'<div class="generated">Generated {escape(data["generated_at"])}</div>', '<div class="cards">']
+    html += [f'<div class="card"><div class="label">{escape(label)}</div><div class="figure">{escape(value)}</div></div>'
+             for label, value in cards]
+    html.append('</div>')
+    for heading, charts in sections:
+        html.append(f'<section><h2>{escape(heading)}</h2><div class="charts">{"".join(charts)}</div></section>')
+    html.append('</body></html>')
+    return "\n".join(html)
+
+def generate_dashboard(trips: Optional[List] = None, invoices: Optional[List] = None,
+                       travellers: Optional[List] = None, output_path: Optional[str] = None) -> str:
+    """Load the data once (unless given), write the dashboard and return its path."""
+    if trips is None or invoices is None or travellers is None:
+        import data_manager
+        _, all_travellers, all_trips, all_invoices = data_manager.load_all()
+        trips = all_trips if trips is None else trips
+        invoices = all_invoices if invoices is None else invoices
+        travellers = all_travellers if travellers is None else travellers
+
+    output_path = output_path or DASHBOARD_FILE
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = output_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(render_dashboard(dashboard_data(trips, invoices, travellers)))
+    os.replace(temp_path, output_path)
+    return output_path
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a single-file HTML dashboard of all report data.")
+    parser.add_argument('--output', default=DASHBOARD_FILE, help=f"output file (default: {DASHBOARD_FILE})")
+    args = parser.parse_args(argv)
+    try:
+        print(generate_dashboard(output_path=args.output))
+    except OSError as e:
+        print(f"Dashboard failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
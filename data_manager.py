@@ -1,10 +1,16 @@
 # FILE: data_manager.py
 # Handles all data persistence using JSON files.
 
+import bisect
+import copy
 import json
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Callable, Optional, Sequence, Tuple
 from models import User, TripCoordinator, TripManager, Administrator, Traveller, Trip, TripLeg, Invoice, Payment, TransportMode, TripLegType
 
 DATA_DIR = "data"
@@ -12,53 +18,628 @@ USER_FILE = os.path.join(DATA_DIR, "users.json")
 TRAVELLER_FILE = os.path.join(DATA_DIR, "travellers.json")
 TRIP_FILE = os.path.join(DATA_DIR, "trips.json")
 INVOICE_FILE = os.path.join(DATA_DIR, "invoices.json")
+ROLLUP_FILE = os.path.join(DATA_DIR, "monthly_rollups.json")
+START_INDEX_FILE = os.path.join(DATA_DIR, "trip_start_index.json")
+
+# Per-month totals kept in ROLLUP_FILE
+ROLLUP_FIELDS = ('revenue', 'paid', 'outstanding', 'invoice_count', 'trip_count', 'traveller_count')
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: files are then only locked within this process
+    fcntl = None
+
+class ReadWriteLock:
+    """Any number of readers or one writer. Waiting writers go first, so a
+    stream of readers cannot starve them.
+
+    Re-entrant: a thread holding the lock may take it again, including a read
+    inside its own write, but a read cannot be upgraded to a write.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers: Dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            self._readers[me] -= 1
+            if not self._readers[me]:
+                del self._readers[me]
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("A read lock cannot be upgraded to a write lock.")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+class _FileLock:
+    """The lock for one data file: a ReadWriteLock between threads, plus an
+    fcntl lock on <file>.lock so other processes (a second console, the API
+    server) are excluded too. The fcntl lock is taken by a thread's outermost
+    acquisition and released with it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rw = ReadWriteLock()
+        self._held = threading.local()
+
+    def acquire(self, exclusive: bool) -> None:
+        (self.rw.acquire_write if exclusive else self.rw.acquire_read)()
+        depth = getattr(self._held, 'depth', 0)
+        if not depth and fcntl is not None:
+            try:
+                fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                (self.rw.release_write if exclusive else self.rw.release_read)()
+                raise
+            self._held.fd = fd
+        self._held.depth = depth + 1
+
+    def release(self, exclusive: bool) -> None:
+        self._held.depth -= 1
+        if not self._held.depth and getattr(self._held, 'fd', None) is not None:
+            # Closing the descriptor releases the fcntl lock
+            os.close(self._held.fd)
+            self._held.fd = None
+        (self.rw.release_write if exclusive else self.rw.release_read)()
+
+_file_locks: Dict[str, _FileLock] = {}
+_file_locks_guard = threading.Lock()
+
+def _file_lock(filepath: str) -> _FileLock:
+    path = os.path.abspath(filepath)
+    with _file_locks_guard:
+        if path not in _file_locks:
+            _file_locks[path] = _FileLock(path)
+        return _file_locks[path]
+
+def _lock_rank(filepath: str) -> tuple:
+    # Locks are always taken in this order (derived files last), which rules out deadlocks
+    order = [USER_FILE, TRAVELLER_FILE, TRIP_FILE, INVOICE_FILE, ROLLUP_FILE, START_INDEX_FILE]
+    return (order.index(filepath) if filepath in order else len(order), filepath)
+
+@contextmanager
+def locked(writes: Sequence[str] = (), reads: Sequence[str] = ()):
+    """Hold exclusive locks on the `writes` files and shared locks on the `reads` files.
+
+    Wrap a whole read-modify-write in this so concurrent writers cannot lose
+    each other's updates. Readers of a file proceed together; writers of
+    a file go one at a time; writers of different files do not wait for
+    each other. Nested use by the same thread is allowed.
+    """
+    modes = {filepath: False for filepath in reads}
+    modes.update({filepath: True for filepath in writes})
+    acquired = []
+    try:
+        for filepath in sorted(modes, key=_lock_rank):
+            lock = _file_lock(filepath)
+            lock.acquire(modes[filepath])
+            acquired.append((lock, modes[filepath]))
+        yield
+    finally:
+        for lock, exclusive in reversed(acquired):
+            lock.release(exclusive)
+
+# Functions called as listener(old_record, new_record) after a trip record is
+# written: old_record is None for a new trip, new_record is None for a deleted one.
+_trip_listeners: List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+
+def add_trip_listener(listener: Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]) -> None:
+    """Register a function to keep derived data (indexes, caches) in step with trip changes."""
+    if listener not in _trip_listeners:
+        _trip_listeners.append(listener)
+
+def remove_trip_listener(listener: Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]) -> None:
+    if listener in _trip_listeners:
+        _trip_listeners.remove(listener)
+
+def _notify_trip_listeners(changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """Pass (old, new) trip records to every listener; a failing listener does not undo the save."""
+    for listener in list(_trip_listeners):
+        for old_record, new_record in changes:
+            try:
+                listener(old_record, new_record)
+            except Exception as e:
+                print(f"Warning: trip listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+# filepath -> (signature before, signature after) of this process's latest save of the file
+_last_saves: Dict[str, Tuple[tuple, tuple]] = {}
+
+class TripFileView:
+    """A structure built from the trip records and kept current by a trip listener.
+
+    Listeners only see this process's saves, so get() also compares the trips
+    file's signature with the one the structure was last brought up to date
+    with, and rebuilds it when another process (the console, the API server,
+    a CLI run) has written the file since.
+
+    The listener changes the structure in place during a save, so code that
+    may run alongside saves in other threads queries it inside reading().
+    """
+
+    def __init__(self, build: Callable[[Iterator[Dict[str, Any]]], Any]):
+        self._build = build
+        self._lock = threading.Lock()
+        self._value = None
+        self._signature: Optional[tuple] = None
+
+    def get(self) -> Any:
+        with locked(reads=(TRIP_FILE,)):
+            signature = _file_signature(TRIP_FILE)
+            with self._lock:
+                if self._value is None or self._signature != signature:
+                    self._value = self._build(iter_json_records(TRIP_FILE))
+                    self._signature = signature
+                    add_trip_listener(self._on_trip_change)
+                return self._value
+
+    @contextmanager
+    def reading(self):
+        """get() for a block of queries; saves of the trips file wait until the block ends."""
+        with locked(reads=(TRIP_FILE,)):
+            yield self.get()
+
+    def reset(self) -> None:
+        """Drop the structure; the next get() rebuilds it from the trips file."""
+        with self._lock:
+            remove_trip_listener(self._on_trip_change)
+            self._value = self._signature = None
+
+    def _on_trip_change(self, old_record: Optional[Dict[str, Any]], new_record: Optional[Dict[str, Any]]) -> None:
+        # Runs inside the save, under the trips file's write lock
+        with self._lock:
+            if self._value is None:
+                return
+            before, after = _last_saves.get(TRIP_FILE, (None, None))
+            if self._signature not in (before, after):
+                # Another process wrote the file before this save: the delta alone would leave it stale
+                self._value = None
+                return
+            self._value.on_trip_change(old_record, new_record)
+            self._signature = after
+
+class DataFileError(ValueError):
+    """A data file exists but is not valid JSON.
+
+    Loading it as empty instead would let the next save replace it with
+    only the new record, losing everything that was in it.
+    """
+
 def _load_json(filepath: str) -> List[Dict[str, Any]]:
-    """Helper function to load data from a JSON file."""
+    """Helper function to load data from a JSON file (a missing file is empty)."""
+    try:
+        with locked(reads=(filepath,)):
+            return _parse_json_file(filepath)
+    except FileNotFoundError:
+        return []
+
+def _parse_json_file(filepath: str) -> List[Dict[str, Any]]:
+    # No locking here: the caller holds the read lock (load_all runs this in worker threads or processes)
     try:
         with open(filepath, 'r') as f:
             return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    except FileNotFoundError:
         return []
+    except json.JSONDecodeError as e:
+        raise DataFileError(f"{filepath} is not valid JSON ({e}); fix or restore it before continuing.") from e
+
+# fsync each saved file (and its directory) so a write survives a power cut, not just an app crash
+FSYNC_WRITES = True
+
+# Per thread: the set of files saved inside batched_writes() whose fsync is still owed
+_write_batch = threading.local()
+
+def _fsync_path(path: str) -> None:
+    """fsync a file, or a directory (so a rename in it is durable). Directories are skipped where unsupported."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        if os.path.isdir(path):
+            return
+        raise
+    try:
+        os.fsync(fd)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    finally:
+        os.close(fd)
+
+@contextmanager
+def batched_writes():
+    """Group-commit the saves made in this block by the current thread.
+
+    Each save is still written to a temporary file and renamed into place
+    straight away, so later reads see it, but the fsyncs are put off to the
+    end of the block. Then each file written is synced once, however many
+    times it was saved, and each directory once. A bulk operation then pays
+    a few fsyncs instead of a few per record. The trade-off: a power cut
+    (not an app crash) before the block ends can lose the block's writes,
+    and on some filesystems leave those files empty. Blocks nest; the
+    outermost one commits.
+    """
+    if getattr(_write_batch, 'paths', None) is not None:
+        yield
+        return
+    _write_batch.paths = set()
+    try:
+        yield
+    finally:
+        paths, _write_batch.paths = _write_batch.paths, None
+        if FSYNC_WRITES:
+            for path in sorted(paths):
+                if os.path.exists(path):
+                    _fsync_path(path)
+            for directory in sorted({os.path.dirname(os.path.abspath(path)) for path in paths}):
+                _fsync_path(directory)
 
 def _save_json(filepath: str, data: List[Dict[str, Any]]) -> None:
-    """Helper function to save data to a JSON file."""
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
+    """Helper function to save data to a JSON file.
+
+    The data is written to <file>.tmp and renamed over the file, so a crash
+    mid-write leaves the previous version in place instead of a truncated
+    file that would load as empty.
+    """
+    temp_path = filepath + '.tmp'
+    pending = getattr(_write_batch, 'paths', None)
+    with locked(writes=(filepath,)):
+        before = _file_signature(filepath)
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+                if FSYNC_WRITES and pending is None:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, filepath)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        _last_saves[filepath] = (before, _file_signature(filepath))
+        if pending is not None:
+            pending.add(filepath)
+        elif FSYNC_WRITES:
+            _fsync_path(os.path.dirname(os.path.abspath(filepath)))
+
+def iter_json_records(filepath: str, buffer_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a JSON array file one at a time.
+
+    Only a small read buffer and the current record are held in memory, so
+    files larger than RAM can be processed. The file is read-locked until
+    the iteration finishes or the generator is closed.
+    """
+    decoder = json.JSONDecoder()
+    with locked(reads=(filepath,)):
+        try:
+            f = open(filepath, 'r')
+        except FileNotFoundError:
+            return
+        yield from _iter_records(f, filepath, decoder, buffer_size)
+
+def _iter_records(f, filepath: str, decoder: json.JSONDecoder, buffer_size: int) -> Iterator[Dict[str, Any]]:
+    with f:
+        buffer = ''
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace and separators between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{filepath} does not contain a JSON array.")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == ']':
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    # A record ending exactly at the buffer edge may be cut short
+                    if end < len(buffer) or eof:
+                        yield record
+                        pos = end
+                        continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+
+            if eof:
+                return
+            chunk = f.read(buffer_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+def iter_record_chunks(filepath: str, chunk_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the records of a JSON array file in lists of at most chunk_size."""
+    chunk = []
+    for record in iter_json_records(filepath):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _month_of(date_value: str) -> str:
+    """Return the 'YYYY-MM' month of a stored ISO date string."""
+    return datetime.fromisoformat(date_value).strftime('%Y-%m')
+
+def _invoice_rollup(invoice_data: Dict[str, Any]):
+    """The (month, totals) an invoice record contributes to the monthly rollups."""
+    paid = sum(p['amount'] for p in invoice_data.get('payments', []))
+    return _month_of(invoice_data['issue_date']), {
+        'revenue': invoice_data['total_amount'],
+        'paid': paid,
+        'invoice_count': 1
+    }
+
+def _trip_rollup(trip_data: Dict[str, Any]):
+    """The (month, totals) a trip record contributes to the monthly rollups."""
+    return _month_of(trip_data['start_date']), {
+        'trip_count': 1,
+        'traveller_count': len(trip_data.get('traveller_ids', []))
+    }
+
+def _empty_rollup(month: str) -> Dict[str, Any]:
+    """A rollup row with all totals at zero."""
+    row = {'month': month}
+    row.update({field: 0 for field in ROLLUP_FIELDS})
+    return row
+
+def _save_rollups(rows: Dict[str, Dict[str, Any]]) -> None:
+    """Tidy and save rollup rows, dropping months with nothing left in them."""
+    output = []
+    for month in sorted(rows):
+        row = rows[month]
+        if row['invoice_count'] <= 0 and row['trip_count'] <= 0:
+            continue
+        # Round money to pence so repeated add/subtract does not drift
+        row['revenue'] = round(row['revenue'], 2)
+        row['paid'] = round(row['paid'], 2)
+        row['outstanding'] = round(row['revenue'] - row['paid'], 2)
+        output.append(row)
+    _save_json(ROLLUP_FILE, output)
+
+def rebuild_monthly_rollups() -> List[Dict[str, Any]]:
+    """Recompute the monthly rollups from the full trip and invoice history."""
+    with locked(writes=(ROLLUP_FILE,), reads=(TRIP_FILE, INVOICE_FILE)):
+        rows: Dict[str, Dict[str, Any]] = {}
+        contributions = [_invoice_rollup(inv) for inv in _load_json(INVOICE_FILE)]
+        contributions += [_trip_rollup(trip) for trip in _load_json(TRIP_FILE)]
+        for month, values in contributions:
+            row = rows.setdefault(month, _empty_rollup(month))
+            for field, value in values.items():
+                row[field] += value
+        _save_rollups(rows)
+        return _load_json(ROLLUP_FILE)
+
+def _update_rollups(removed: List, added: List) -> None:
+    """Apply a write to the rollups: subtract old record totals, add new ones.
+
+    Called after the data file has been saved. If no rollups exist yet
+    there is nothing to update: load_monthly_rollups() rebuilds them from
+    the saved data, which already includes this write. (Rebuilding here
+    would read the other data file while this one is write-locked.)
+    """
+    with locked(writes=(ROLLUP_FILE,)):
+        if not os.path.exists(ROLLUP_FILE):
+            return
+
+        try:
+            rows = {row['month']: row for row in _load_json(ROLLUP_FILE)}
+        except DataFileError as e:
+            # Derived data: drop it so load_monthly_rollups() rebuilds it from the saved files
+            print(f"Warning: {e} Discarding it; it will be rebuilt.")
+            os.remove(ROLLUP_FILE)
+            return
+        for sign, contributions in ((-1, removed), (1, added)):
+            for month, values in contributions:
+                row = rows.setdefault(month, _empty_rollup(month))
+                for field, value in values.items():
+                    row[field] += sign * value
+        _save_rollups(rows)
+
+def load_monthly_rollups() -> List[Dict[str, Any]]:
+    """Load per-month revenue/trip rollups, sorted by month."""
+    if not os.path.exists(ROLLUP_FILE):
+        with locked(writes=(ROLLUP_FILE,), reads=(TRIP_FILE, INVOICE_FILE)):
+            if not os.path.exists(ROLLUP_FILE):
+                return rebuild_monthly_rollups()
+    try:
+        return _load_json(ROLLUP_FILE)
+    except DataFileError as e:
+        print(f"Warning: {e} Rebuilding it.")
+        return rebuild_monthly_rollups()
+
+def _start_index_entry(trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The summary of a trip record kept in START_INDEX_FILE."""
+    return {
+        'start_date': trip_data['start_date'],
+        'trip_id': trip_data['trip_id'],
+        'name': trip_data['name'],
+        'duration_days': trip_data['duration_days'],
+        'coordinator_id': trip_data.get('coordinator_id'),
+        'traveller_count': len(trip_data.get('traveller_ids', [])),
+        'is_active': trip_data.get('is_active', True)
+    }
+
+# In-memory copy of START_INDEX_FILE: (file signature, entries, (start_date, trip_id) keys)
+_start_index_cache: Optional[Tuple[tuple, List[Dict[str, Any]], List[Tuple[str, str]]]] = None
+
+def _file_signature(filepath: str) -> tuple:
+    """(path, inode, mtime, size) of a file, or (path, None, None, None) if it is missing.
+
+    Every save renames a new file into place, so the inode changes even when
+    a save lands in the same mtime tick with the same size.
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return filepath, None, None, None
+    return filepath, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def _save_start_index(entries: List[Dict[str, Any]]) -> None:
+    global _start_index_cache
+    _save_json(START_INDEX_FILE, entries)
+    keys = [(entry['start_date'], entry['trip_id']) for entry in entries]
+    _start_index_cache = (_file_signature(START_INDEX_FILE), entries, keys)
+
+def rebuild_start_index() -> List[Dict[str, Any]]:
+    """Recompute the start-date index from the trips file."""
+    with locked(writes=(START_INDEX_FILE,), reads=(TRIP_FILE,)):
+        entries = sorted((_start_index_entry(trip) for trip in iter_json_records(TRIP_FILE)),
+                         key=lambda entry: (entry['start_date'], entry['trip_id']))
+        _save_start_index(entries)
+        return entries
+
+def _load_start_index() -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """The index entries and their sort keys, re-read only when the file has changed."""
+    global _start_index_cache
+    if not os.path.exists(START_INDEX_FILE):
+        with locked(writes=(START_INDEX_FILE,), reads=(TRIP_FILE,)):
+            if not os.path.exists(START_INDEX_FILE):
+                rebuild_start_index()
+    with locked(reads=(START_INDEX_FILE,)):
+        signature = _file_signature(START_INDEX_FILE)
+        if _start_index_cache is None or _start_index_cache[0] != signature:
+            entries = _load_json(START_INDEX_FILE)
+            _start_index_cache = (signature, entries, [(entry['start_date'], entry['trip_id']) for entry in entries])
+        return _start_index_cache[1], _start_index_cache[2]
+
+def _update_start_index(changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """Apply trip writes to the start-date index: drop each old entry, insert each new one in order.
+
+    Like the rollups, a missing index is rebuilt from the saved trips file,
+    which already includes these writes.
+    """
+    if not changes:
+        return
+    with locked(writes=(START_INDEX_FILE,)):
+        if not os.path.exists(START_INDEX_FILE):
+            rebuild_start_index()
+            return
+
+        try:
+            # Edit copies: other threads may be reading the cached lists
+            entries, keys = (list(cached) for cached in _load_start_index())
+        except DataFileError as e:
+            # Derived data: the rebuild reads the saved trips file, which already includes these writes
+            print(f"Warning: {e} Rebuilding it.")
+            rebuild_start_index()
+            return
+        for old_record, new_record in changes:
+            if old_record:
+                key = (old_record['start_date'], old_record['trip_id'])
+                position = bisect.bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    del keys[position]
+                    del entries[position]
+            if new_record:
+                key = (new_record['start_date'], new_record['trip_id'])
+                position = bisect.bisect_left(keys, key)
+                keys.insert(position, key)
+                entries.insert(position, _start_index_entry(new_record))
+        _save_start_index(entries)
+
+def trips_starting_between(start: datetime, end: datetime, coordinator_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Index entries of trips with start <= start_date < end, in start-date order.
+
+    Two binary searches over the cached index find the range, so a query
+    costs O(log n + result size) rather than a scan of every trip.
+    """
+    try:
+        entries, keys = _load_start_index()
+    except DataFileError as e:
+        print(f"Warning: {e} Rebuilding it.")
+        rebuild_start_index()
+        entries, keys = _load_start_index()
+    low = bisect.bisect_left(keys, (start.isoformat(),))
+    high = bisect.bisect_left(keys, (end.isoformat(),))
+    found = entries[low:high]
+    if coordinator_id is not None:
+        found = [entry for entry in found if entry['coordinator_id'] == coordinator_id]
+    return found
 
 def save_user(user) -> None:
     """Saves a single user to the JSON file."""
-    users = _load_json(USER_FILE)
-    
-    # Convert user object to dictionary
-    user_dict = {
-        'user_id': user.user_id,
-        'username': user.username,
-        'password': user.password,
-        'name': user.name,
-        'role': user.role.value,
-        '_type': type(user).__name__
-    }
-    
-    # Check if user exists, if so, update. Else, append.
-    user_found = False
-    for i, u in enumerate(users):
-        if u['user_id'] == user.user_id:
-            users[i] = user_dict
-            user_found = True
-            break
-    
-    if not user_found:
-        users.append(user_dict)
-    
-    _save_json(USER_FILE, users)
+    with locked(writes=(USER_FILE,)):
+        users = _load_json(USER_FILE)
+        
+        # Convert user object to dictionary
+        user_dict = {
+            'user_id': user.user_id,
+            'username': user.username,
+            'password': user.password,
+            'name': user.name,
+            'role': user.role.value,
+            '_type': type(user).__name__
+        }
+        
+        # Check if user exists, if so, update. Else, append.
+        user_found = False
+        for i, u in enumerate(users):
+            if u['user_id'] == user.user_id:
+                users[i] = user_dict
+                user_found = True
+                break
+        
+        if not user_found:
+            users.append(user_dict)
+        
+        _save_json(USER_FILE, users)
 
 def load_users() -> List:
     """Loads all users from the JSON file and returns them as User objects."""
-    users_data = _load_json(USER_FILE)
+    return users_from_records(_load_json(USER_FILE))
+
+def users_from_records(users_data: List[Dict[str, Any]]) -> List:
+    """User objects for stored user records; records that fail to load are reported and skipped."""
     users = []
     
     for user_data in users_data:
@@ -105,59 +686,59 @@ def load_users() -> List:
 
 def create_trip_manager(user_id: str, username: str, password: str, name: str) -> TripManager:
     """Create a new Trip Manager user."""
-    import hashlib
-    
-    # Check if username already exists
-    existing_users = load_users()
-    if any(user.username == username for user in existing_users):
-        raise ValueError(f"Username '{username}' already exists.")
-    
-    # Hash the password
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
-    
-    new_manager = TripManager(
-        user_id=user_id,
-        username=username,
-        password=hashed_password,
-        name=name
-    )
-    
-    save_user(new_manager)
-    return new_manager
+    with locked(writes=(USER_FILE,)):
+        import hashlib
+        
+        # Check if username already exists
+        existing_users = load_users()
+        if any(user.username == username for user in existing_users):
+            raise ValueError(f"Username '{username}' already exists.")
+        
+        # Hash the password
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        
+        new_manager = TripManager(
+            user_id=user_id,
+            username=username,
+            password=hashed_password,
+            name=name
+        )
+        
+        save_user(new_manager)
+        return new_manager
 
 def create_trip_coordinator(user_id: str, username: str, password: str, name: str) -> TripCoordinator:
     """Create a new Trip Coordinator user."""
-    import hashlib
-    
-    # Check if username already exists
-    existing_users = load_users()
-    if any(user.username == username for user in existing_users):
-        raise ValueError(f"Username '{username}' already exists.")
-    
-    # Hash the password
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
-    
-    new_coordinator = TripCoordinator(
-        user_id=user_id,
-        username=username,
-        password=hashed_password,
-        name=name
-    )
-    
-    save_user(new_coordinator)
-    return new_coordinator
+    with locked(writes=(USER_FILE,)):
+        import hashlib
+        
+        # Check if username already exists
+        existing_users = load_users()
+        if any(user.username == username for user in existing_users):
+            raise ValueError(f"Username '{username}' already exists.")
+        
+        # Hash the password
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        
+        new_coordinator = TripCoordinator(
+            user_id=user_id,
+            username=username,
+            password=hashed_password,
+            name=name
+        )
+        
+        save_user(new_coordinator)
+        return new_coordinator
 
 def delete_user(user_id: str) -> None:
     """Permanently delete a user from the system."""
-    users = _load_json(USER_FILE)
-    updated_users = [u for u in users if u['user_id'] != user_id]
-    _save_json(USER_FILE, updated_users)
+    with locked(writes=(USER_FILE,)):
+        users = _load_json(USER_FILE)
+        updated_users = [u for u in users if u['user_id'] != user_id]
+        _save_json(USER_FILE, updated_users)
 
-def save_traveller(traveller) -> None:
-    """Saves a single traveller to the JSON file."""
-    travellers = _load_json(TRAVELLER_FILE)
-    
-    traveller_dict = {
+def _traveller_dict(traveller) -> Dict[str, Any]:
+    return {
         'traveller_id': traveller.traveller_id,
         'name': traveller.name,
         'address': traveller.address,
@@ -165,29 +746,57 @@ def save_traveller(traveller) -> None:
         'emergency_contact': traveller.emergency_contact,
         'government_id': traveller.government_id
     }
-    
-    traveller_found = False
-    for i, t in enumerate(travellers):
-        if t['traveller_id'] == traveller.traveller_id:
-            travellers[i] = traveller_dict
-            traveller_found = True
-            break
-    
-    if not traveller_found:
-        travellers.append(traveller_dict)
-    
-    _save_json(TRAVELLER_FILE, travellers)
+
+def save_traveller(traveller) -> None:
+    """Saves a single traveller to the JSON file."""
+    with locked(writes=(TRAVELLER_FILE,)):
+        travellers = _load_json(TRAVELLER_FILE)
+        
+        traveller_dict = _traveller_dict(traveller)
+        
+        traveller_found = False
+        for i, t in enumerate(travellers):
+            if t['traveller_id'] == traveller.traveller_id:
+                travellers[i] = traveller_dict
+                traveller_found = True
+                break
+        
+        if not traveller_found:
+            travellers.append(traveller_dict)
+        
+        _save_json(TRAVELLER_FILE, travellers)
+
+def save_travellers(travellers: List) -> Tuple[int, int]:
+    """Save many travellers with one read and one write of the file. Returns (added, updated)."""
+    with locked(writes=(TRAVELLER_FILE,)):
+        records = _load_json(TRAVELLER_FILE)
+        positions = {record['traveller_id']: i for i, record in enumerate(records)}
+        added = updated = 0
+        for traveller in travellers:
+            traveller_dict = _traveller_dict(traveller)
+            if traveller.traveller_id in positions:
+                records[positions[traveller.traveller_id]] = traveller_dict
+                updated += 1
+            else:
+                positions[traveller.traveller_id] = len(records)
+                records.append(traveller_dict)
+                added += 1
+        _save_json(TRAVELLER_FILE, records)
+        return added, updated
 
 def load_travellers() -> List:
     """Loads all travellers from the JSON file."""
-    travellers_data = _load_json(TRAVELLER_FILE)
+    return travellers_from_records(_load_json(TRAVELLER_FILE))
+
+def travellers_from_records(travellers_data: List[Dict[str, Any]]) -> List:
+    """Traveller objects for stored traveller records (the records are not modified)."""
     travellers = []
     
     for data in travellers_data:
         try:
             # Convert string date back to datetime object
             if 'date_of_birth' in data:
-                data['date_of_birth'] = datetime.fromisoformat(data['date_of_birth'])
+                data = dict(data, date_of_birth=datetime.fromisoformat(data['date_of_birth']))
             
             traveller = Traveller(**data)
             travellers.append(traveller)
@@ -199,108 +808,148 @@ def load_travellers() -> List:
 
 def delete_traveller(traveller_id: str) -> None:
     """Permanently delete a traveller from the JSON file."""
-    travellers = _load_json(TRAVELLER_FILE)
-    updated_travellers = [t for t in travellers if t['traveller_id'] != traveller_id]
-    _save_json(TRAVELLER_FILE, updated_travellers)
-    
-    # Also remove the traveller from any trips they were assigned to
-    trips = _load_json(TRIP_FILE)
-    for trip in trips:
-        if 'traveller_ids' in trip and traveller_id in trip['traveller_ids']:
-            trip['traveller_ids'].remove(traveller_id)
-    _save_json(TRIP_FILE, trips)
-
-def assign_traveller_to_trip(trip_id: str, traveller_id: str) -> bool:
-    """Assign a traveller to a trip."""
-    trips = _load_json(TRIP_FILE)
-    travellers = load_travellers()
-    
-    # Find the traveller
-    traveller = next((t for t in travellers if t.traveller_id == traveller_id), None)
-    if not traveller:
-        print(f"Traveller {traveller_id} not found.")
-        return False
-    
-    # Find the trip and assign traveller
-    trip_updated = False
-    for trip_data in trips:
-        if trip_data['trip_id'] == trip_id:
-            if 'traveller_ids' not in trip_data:
-                trip_data['traveller_ids'] = []
-            
-            # Check if traveller already assigned
-            if traveller_id not in trip_data['traveller_ids']:
-                trip_data['traveller_ids'].append(traveller_id)
-                trip_updated = True
-            break
-    
-    if trip_updated:
+    with locked(writes=(TRAVELLER_FILE, TRIP_FILE)):
+        travellers = _load_json(TRAVELLER_FILE)
+        updated_travellers = [t for t in travellers if t['traveller_id'] != traveller_id]
+        _save_json(TRAVELLER_FILE, updated_travellers)
+        
+        # Also remove the traveller from any trips they were assigned to
+        trips = _load_json(TRIP_FILE)
+        removed, added, changes = [], [], []
+        for trip in trips:
+            if 'traveller_ids' in trip and traveller_id in trip['traveller_ids']:
+                removed.append(_trip_rollup(trip))
+                old_record = copy.deepcopy(trip)
+                trip['traveller_ids'].remove(traveller_id)
+                added.append(_trip_rollup(trip))
+                changes.append((old_record, trip))
         _save_json(TRIP_FILE, trips)
-        return True
-    else:
-        print(f"Trip {trip_id} not found or traveller already assigned.")
-        return False
+        _update_rollups(removed, added)
+        _update_start_index(changes)
+        _notify_trip_listeners(changes)
+
+def assign_traveller_to_trip(trip_id: str, traveller_id: str, allow_overlap: bool = True) -> bool:
+    """Assign a traveller to a trip.
+
+    With allow_overlap=False the assignment is refused if the traveller is
+    already on a trip whose dates overlap this one.
+    """
+    with locked(writes=(TRIP_FILE,), reads=(TRAVELLER_FILE,)):
+        trips = _load_json(TRIP_FILE)
+        travellers = load_travellers()
+        
+        # Find the traveller
+        traveller = next((t for t in travellers if t.traveller_id == traveller_id), None)
+        if not traveller:
+            print(f"Traveller {traveller_id} not found.")
+            return False
+        
+        # Find the trip and assign traveller
+        trip_updated = False
+        for trip_data in trips:
+            if trip_data['trip_id'] == trip_id:
+                if 'traveller_ids' not in trip_data:
+                    trip_data['traveller_ids'] = []
+                
+                if not allow_overlap and traveller_id not in trip_data['traveller_ids']:
+                    from booking_index import get_booking_index, trip_interval
+                    overlapping = get_booking_index().conflicts(traveller_id, *trip_interval(trip_data), trip_id)
+                    if overlapping:
+                        print(f"Traveller {traveller_id} is already booked on overlapping trip(s): {', '.join(overlapping)}.")
+                        return False
+                
+                # Check if traveller already assigned
+                if traveller_id not in trip_data['traveller_ids']:
+                    old_rollup = _trip_rollup(trip_data)
+                    old_record = copy.deepcopy(trip_data)
+                    trip_data['traveller_ids'].append(traveller_id)
+                    trip_updated = True
+                break
+        
+        if trip_updated:
+            _save_json(TRIP_FILE, trips)
+            _update_rollups([old_rollup], [_trip_rollup(trip_data)])
+            _update_start_index([(old_record, trip_data)])
+            _notify_trip_listeners([(old_record, trip_data)])
+            return True
+        else:
+            print(f"Trip {trip_id} not found or traveller already assigned.")
+            return False
 
 def remove_traveller_from_trip(trip_id: str, traveller_id: str) -> bool:
     """Remove a traveller from a trip."""
-    trips = _load_json(TRIP_FILE)
-    
-    trip_updated = False
-    for trip_data in trips:
-        if trip_data['trip_id'] == trip_id:
-            if 'traveller_ids' in trip_data and traveller_id in trip_data['traveller_ids']:
-                trip_data['traveller_ids'].remove(traveller_id)
-                trip_updated = True
-            break
-    
-    if trip_updated:
-        _save_json(TRIP_FILE, trips)
-        return True
-    else:
-        print(f"Traveller {traveller_id} not found in trip {trip_id}.")
-        return False
+    with locked(writes=(TRIP_FILE,)):
+        trips = _load_json(TRIP_FILE)
+        
+        trip_updated = False
+        for trip_data in trips:
+            if trip_data['trip_id'] == trip_id:
+                if 'traveller_ids' in trip_data and traveller_id in trip_data['traveller_ids']:
+                    old_rollup = _trip_rollup(trip_data)
+                    old_record = copy.deepcopy(trip_data)
+                    trip_data['traveller_ids'].remove(traveller_id)
+                    trip_updated = True
+                break
+        
+        if trip_updated:
+            _save_json(TRIP_FILE, trips)
+            _update_rollups([old_rollup], [_trip_rollup(trip_data)])
+            _update_start_index([(old_record, trip_data)])
+            _notify_trip_listeners([(old_record, trip_data)])
+            return True
+        else:
+            print(f"Traveller {traveller_id} not found in trip {trip_id}.")
+            return False
 
 def save_trip(trip) -> None:
     """Saves a single trip to the JSON file."""
-    trips = _load_json(TRIP_FILE)
-    
-    trip_dict = {
-        'trip_id': trip.trip_id,
-        'name': trip.name,
-        'start_date': trip.start_date.isoformat() if hasattr(trip.start_date, 'isoformat') else str(trip.start_date),
-        'duration_days': trip.duration_days,
-        'coordinator_id': trip.coordinator.user_id if trip.coordinator else None,
-        'traveller_ids': [t.traveller_id for t in trip.travellers],
-        'is_active': trip.is_active,
-        'trip_legs': []
-    }
-    
-    # Save trip legs within the trip
-    for leg in trip.trip_legs:
-        leg_dict = {
-            'leg_id': leg.leg_id,
-            'sequence': leg.sequence,
-            'start_location': leg.start_location,
-            'destination': leg.destination,
-            'transport_provider': leg.transport_provider,
-            'transport_mode': leg.transport_mode.value,
-            'leg_type': leg.leg_type.value,
-            'cost': leg.cost,
-            'description': leg.description
+    with locked(writes=(TRIP_FILE,)):
+        trips = _load_json(TRIP_FILE)
+        
+        trip_dict = {
+            'trip_id': trip.trip_id,
+            'name': trip.name,
+            'start_date': trip.start_date.isoformat() if hasattr(trip.start_date, 'isoformat') else str(trip.start_date),
+            'duration_days': trip.duration_days,
+            'coordinator_id': trip.coordinator.user_id if trip.coordinator else None,
+            'traveller_ids': [t.traveller_id for t in trip.travellers],
+            'is_active': trip.is_active,
+            'trip_legs': []
         }
-        trip_dict['trip_legs'].append(leg_dict)
-    
-    trip_found = False
-    for i, t in enumerate(trips):
-        if t['trip_id'] == trip.trip_id:
-            trips[i] = trip_dict
-            trip_found = True
-            break
-    
-    if not trip_found:
-        trips.append(trip_dict)
-    
-    _save_json(TRIP_FILE, trips)
+        
+        # Save trip legs within the trip
+        for leg in trip.trip_legs:
+            leg_dict = {
+                'leg_id': leg.leg_id,
+                'sequence': leg.sequence,
+                'start_location': leg.start_location,
+                'destination': leg.destination,
+                'transport_provider': leg.transport_provider,
+                'transport_mode': leg.transport_mode.value,
+                'leg_type': leg.leg_type.value,
+                'cost': leg.cost,
+                'description': leg.description
+            }
+            trip_dict['trip_legs'].append(leg_dict)
+        
+        trip_found = False
+        removed = []
+        old_record = None
+        for i, t in enumerate(trips):
+            if t['trip_id'] == trip.trip_id:
+                removed.append(_trip_rollup(t))
+                old_record = t
+                trips[i] = trip_dict
+                trip_found = True
+                break
+        
+        if not trip_found:
+            trips.append(trip_dict)
+        
+        _save_json(TRIP_FILE, trips)
+        _update_rollups(removed, [_trip_rollup(trip_dict)])
+        _update_start_index([(old_record, trip_dict)])
+        _notify_trip_listeners([(old_record, trip_dict)])
 
 def save_trip_legs(trip) -> None:
     """Saves all trip legs for a trip (calls save_trip internally)."""
@@ -330,44 +979,38 @@ def load_trip_legs_for_trip(trip_data: dict) -> List:
     
     return trip_legs
 
+def trip_from_record(data: Dict[str, Any], users_by_id: Dict[str, Any], travellers_by_id: Dict[str, Any]) -> Trip:
+    """Build a Trip object from a stored trip record, resolving its coordinator and travellers by ID."""
+    start_date = data['start_date']
+    if isinstance(start_date, str):
+        start_date = datetime.fromisoformat(start_date)
+    
+    trip = Trip(
+        trip_id=data['trip_id'],
+        name=data['name'],
+        start_date=start_date,
+        duration_days=data['duration_days'],
+        coordinator=users_by_id.get(data['coordinator_id']) if data.get('coordinator_id') else None
+    )
+    trip.travellers = [travellers_by_id[traveller_id] for traveller_id in data.get('traveller_ids', [])
+                       if traveller_id in travellers_by_id]
+    trip.is_active = data.get('is_active', True)
+    trip.trip_legs = load_trip_legs_for_trip(data)
+    return trip
+
 def load_trips() -> List:
     """Loads all trips from the JSON file."""
-    trips_data = _load_json(TRIP_FILE)
-    all_users = load_users()
-    all_travellers = load_travellers()
+    return trips_from_records(_load_json(TRIP_FILE), load_users(), load_travellers())
+
+def trips_from_records(trips_data: List[Dict[str, Any]], users: List, travellers: List) -> List:
+    """Trip objects for stored trip records, linked to the given User and Traveller objects."""
+    users_by_id = {user.user_id: user for user in users}
+    travellers_by_id = {traveller.traveller_id: traveller for traveller in travellers}
     trips = []
     
     for data in trips_data:
         try:
-            # Convert string date back to datetime object
-            if 'start_date' in data:
-                data['start_date'] = datetime.fromisoformat(data['start_date'])
-            
-            # Find coordinator by user_id
-            coordinator = None
-            if data.get('coordinator_id'):
-                coordinator = next((u for u in all_users if u.user_id == data['coordinator_id']), None)
-            
-            # Find travellers by their IDs
-            travellers = []
-            for traveller_id in data.get('traveller_ids', []):
-                traveller = next((t for t in all_travellers if t.traveller_id == traveller_id), None)
-                if traveller:
-                    travellers.append(traveller)
-            
-            # Create trip object
-            trip = Trip(
-                trip_id=data['trip_id'],
-                name=data['name'],
-                start_date=data['start_date'],
-                duration_days=data['duration_days'],
-                coordinator=coordinator
-            )
-            trip.travellers = travellers
-            trip.is_active = data.get('is_active', True)
-            trip.trip_legs = load_trip_legs_for_trip(data)
-            
-            trips.append(trip)
+            trips.append(trip_from_record(data, users_by_id, travellers_by_id))
         except Exception as e:
             print(f"Error loading trip {data.get('trip_id', 'unknown')}: {e}")
             continue
@@ -376,94 +1019,174 @@ def load_trips() -> List:
 
 def delete_trip(trip_id: str) -> None:
     """Permanently delete a trip from the JSON file."""
-    trips = _load_json(TRIP_FILE)
-    updated_trips = [t for t in trips if t['trip_id'] != trip_id]
-    _save_json(TRIP_FILE, updated_trips)
+    with locked(writes=(TRIP_FILE,)):
+        trips = _load_json(TRIP_FILE)
+        updated_trips = [t for t in trips if t['trip_id'] != trip_id]
+        deleted = [t for t in trips if t['trip_id'] == trip_id]
+        _save_json(TRIP_FILE, updated_trips)
+        _update_rollups([_trip_rollup(t) for t in deleted], [])
+        _update_start_index([(t, None) for t in deleted])
+        _notify_trip_listeners([(t, None) for t in deleted])
 
 def save_invoice(invoice) -> None:
     """Saves an invoice to the JSON file."""
-    invoices = _load_json(INVOICE_FILE)
-    
-    invoice_dict = {
-        'invoice_id': invoice.invoice_id,
-        'trip_id': invoice.trip.trip_id,
-        'issue_date': invoice.issue_date.isoformat() if hasattr(invoice.issue_date, 'isoformat') else str(invoice.issue_date),
-        'total_amount': invoice.total_amount,
-        'status': invoice.status,
-        'payments': []
-    }
-    
-    # Convert payments to dictionaries
-    for payment in invoice.payments:
-        payment_dict = {
-            'payment_id': payment.payment_id,
-            'amount': payment.amount,
-            'date': payment.date.isoformat() if hasattr(payment.date, 'isoformat') else str(payment.date),
-            'method': payment.method
+    with locked(writes=(INVOICE_FILE,)):
+        invoices = _load_json(INVOICE_FILE)
+        
+        invoice_dict = {
+            'invoice_id': invoice.invoice_id,
+            'trip_id': invoice.trip.trip_id,
+            'issue_date': invoice.issue_date.isoformat() if hasattr(invoice.issue_date, 'isoformat') else str(invoice.issue_date),
+            'total_amount': invoice.total_amount,
+            'status': invoice.status,
+            'payments': []
         }
-        invoice_dict['payments'].append(payment_dict)
-    
-    # Check if invoice exists, if so, update. Else, append.
-    invoice_found = False
-    for i, inv in enumerate(invoices):
-        if inv['invoice_id'] == invoice.invoice_id:
-            invoices[i] = invoice_dict
-            invoice_found = True
-            break
-    
-    if not invoice_found:
-        invoices.append(invoice_dict)
+        
+        # Convert payments to dictionaries
+        for payment in invoice.payments:
+            payment_dict = {
+                'payment_id': payment.payment_id,
+                'amount': payment.amount,
+                'date': payment.date.isoformat() if hasattr(payment.date, 'isoformat') else str(payment.date),
+                'method': payment.method
+            }
+            invoice_dict['payments'].append(payment_dict)
+        
+        # Check if invoice exists, if so, update. Else, append.
+        invoice_found = False
+        removed = []
+        for i, inv in enumerate(invoices):
+            if inv['invoice_id'] == invoice.invoice_id:
+                removed.append(_invoice_rollup(inv))
+                invoices[i] = invoice_dict
+                invoice_found = True
+                break
+        
+        if not invoice_found:
+            invoices.append(invoice_dict)
+        
+        _save_json(INVOICE_FILE, invoices)
+        _update_rollups(removed, [_invoice_rollup(invoice_dict)])
+
+def invoice_from_record(data: Dict[str, Any], trip: Trip) -> Invoice:
+    """Build an Invoice object, with its payments, from a stored invoice record."""
+    invoice = Invoice(
+        invoice_id=data['invoice_id'],
+        trip=trip,
+        issue_date=datetime.fromisoformat(data['issue_date']),
+        total_amount=data['total_amount'],
+        status=data.get('status', 'Pending')
+    )
     
-    _save_json(INVOICE_FILE, invoices)
+    for payment_data in data.get('payments', []):
+        payment = Payment(
+            payment_id=payment_data['payment_id'],
+            invoice=invoice,
+            amount=payment_data['amount'],
+            date=datetime.fromisoformat(payment_data['date']),
+            method=payment_data['method']
+        )
+        invoice.payments.append(payment)
+    return invoice
 
 def load_invoices() -> List:
     """Loads all invoices from the JSON file."""
-    invoices_data = _load_json(INVOICE_FILE)
-    trips = load_trips()
+    return invoices_from_records(_load_json(INVOICE_FILE), load_trips())
+
+def invoices_from_records(invoices_data: List[Dict[str, Any]], trips: List) -> List:
+    """Invoice objects for stored invoice records; invoices whose trip is not in `trips` are skipped."""
+    trips_by_id = {trip.trip_id: trip for trip in trips}
     invoices = []
     
     for data in invoices_data:
         try:
             # Find the trip for this invoice
-            trip = next((t for t in trips if t.trip_id == data['trip_id']), None)
+            trip = trips_by_id.get(data['trip_id'])
             if not trip:
                 continue
-                
-            # Convert string dates back to datetime objects
-            issue_date = datetime.fromisoformat(data['issue_date'])
-            
-            # Create invoice object
-            invoice = Invoice(
-                invoice_id=data['invoice_id'],
-                trip=trip,
-                issue_date=issue_date,
-                total_amount=data['total_amount'],
-                status=data.get('status', 'Pending')
-            )
-            
-            # Load payments
-            for payment_data in data.get('payments', []):
-                payment_date = datetime.fromisoformat(payment_data['date'])
-                payment = Payment(
-                    payment_id=payment_data['payment_id'],
-                    invoice=invoice,
-                    amount=payment_data['amount'],
-                    date=payment_date,
-                    method=payment_data['method']
-                )
-                invoice.payments.append(payment)
-            
-            invoices.append(invoice)
+            invoices.append(invoice_from_record(data, trip))
         except Exception as e:
             print(f"Error loading invoice {data.get('invoice_id', 'unknown')}: {e}")
             continue
     
     return invoices
 
+# Above this many bytes across the four files, and with a CPU per file, load_all
+# parses in worker processes. Below it, process start-up and unpickling the
+# records in this process (about two thirds of the cost of parsing them) cost more
+# than they save, and the files are parsed in threads instead.
+PARALLEL_LOAD_PROCESS_BYTES = 64 * 1024 * 1024
+
+def load_all(use_processes: Optional[bool] = None) -> Tuple[List, List, List, List]:
+    """Users, travellers, trips and invoices, parsing the four files concurrently.
+
+    The files are read under one set of read locks, so the result is a
+    consistent snapshot, and every invoice refers to a trip in the returned
+    trips list. use_processes=None picks processes or threads by total file size.
+    """
+    files = [USER_FILE, TRAVELLER_FILE, TRIP_FILE, INVOICE_FILE]
+    if use_processes is None:
+        size = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+        use_processes = size >= PARALLEL_LOAD_PROCESS_BYTES and (os.cpu_count() or 1) >= len(files)
+    
+    with locked(reads=files):
+        if use_processes:
+            # Not fork: load_all also runs on the prefetch and server threads, and a forked
+            # child would inherit any lock another thread held at that moment, never to be released
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(len(files), mp_context=context) as pool:
+                users_data, travellers_data, trips_data, invoices_data = pool.map(_parse_json_file, files)
+        else:
+            with ThreadPoolExecutor(len(files)) as pool:
+                users_data, travellers_data, trips_data, invoices_data = pool.map(_parse_json_file, files)
+    
+    users = users_from_records(users_data)
+    travellers = travellers_from_records(travellers_data)
+    trips = trips_from_records(trips_data, users, travellers)
+    return users, travellers, trips, invoices_from_records(invoices_data, trips)
+
+class Prefetch:
+    """load_all() running on a background thread from the moment this is created.
+
+    result() waits for it and returns (users, travellers, trips, invoices),
+    or None if the load failed or any of the four files has changed since it
+    started; the caller then loads the data itself.
+    """
+
+    def __init__(self):
+        self._signatures = self._current_signatures()
+        self._result: Optional[Tuple[List, List, List, List]] = None
+        self.error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="data-prefetch", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _current_signatures() -> List[tuple]:
+        return [_file_signature(filepath) for filepath in (USER_FILE, TRAVELLER_FILE, TRIP_FILE, INVOICE_FILE)]
+
+    def _run(self) -> None:
+        try:
+            self._result = load_all()
+        except Exception as e:
+            self.error = e
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[Tuple[List, List, List, List]]:
+        self._thread.join(timeout)
+        if not self.done() or self._result is None:
+            return None
+        if self._current_signatures() != self._signatures:
+            return None
+        return self._result
+
 def delete_invoice(invoice_id: str) -> None:
     """Permanently delete an invoice from the JSON file."""
-    invoices = _load_json(INVOICE_FILE)
-    updated_invoices = [inv for inv in invoices if inv['invoice_id'] != invoice_id]
-    _save_json(INVOICE_FILE, updated_invoices)
+    with locked(writes=(INVOICE_FILE,)):
+        invoices = _load_json(INVOICE_FILE)
+        updated_invoices = [inv for inv in invoices if inv['invoice_id'] != invoice_id]
+        _save_json(INVOICE_FILE, updated_invoices)
+        _update_rollups([_invoice_rollup(inv) for inv in invoices if inv['invoice_id'] == invoice_id], [])
 
 print("Data Manager module loaded successfully.")
\ No newline at end of file
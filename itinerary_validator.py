@@ -0,0 +1,141 @@
+# FILE: itinerary_validator.py
+# Itinerary continuity checks for every trip:
+#     python itinerary_validator.py [--trip-id ID ...]
+# A trip must have at least one leg, its leg sequence numbers must be unique,
+# and each leg must start where the previous one (by sequence) ended.
+# validate_records() checks all trips in one pass over columnar leg arrays;
+# the shared audit from get_itinerary_audit() is kept up to date on every
+# trip save through a data_manager trip listener, and rebuilt when another
+# process has changed the trips file. Code that may run alongside saves in
+# other threads reads it inside shared_itinerary_audit().
+
+import argparse
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from route_graph import normalise_location
+
+def _record_of(trip) -> Dict[str, Any]:
+    """The fields of a Trip object the validator needs, in stored-record form."""
+    return {'trip_id': trip.trip_id,
+            'trip_legs': [{'sequence': leg.sequence, 'start_location': leg.start_location,
+                           'destination': leg.destination} for leg in trip.trip_legs]}
+
+def validate_records(records: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Issues per trip for raw trip records; trips without issues are left out."""
+    trip_ids: List[str] = []
+    legs: List[Dict[str, Any]] = []
+    trip_index: List[int] = []
+    for i, record in enumerate(records):
+        trip_ids.append(record['trip_id'])
+        for leg in record.get('trip_legs', []):
+            legs.append(leg)
+            trip_index.append(i)
+
+    issues: Dict[str, List[str]] = {}
+    for i in np.flatnonzero(np.bincount(np.array(trip_index, dtype=np.int64), minlength=len(trip_ids)) == 0):
+        issues.setdefault(trip_ids[i], []).append("Trip has no legs")
+    if not legs:
+        return issues
+
+    # One row per leg; locations become integer codes so they compare as arrays
+    codes: Dict[str, int] = {}
+    trip = np.array(trip_index, dtype=np.int64)
+    sequence = np.array([leg['sequence'] for leg in legs], dtype=np.int64)
+    start = np.array([codes.setdefault(normalise_location(leg['start_location']), len(codes)) for leg in legs])
+    destination = np.array([codes.setdefault(normalise_location(leg['destination']), len(codes)) for leg in legs])
+
+    order = np.lexsort((sequence, trip))
+    same_trip = trip[order][1:] == trip[order][:-1]
+    duplicate = same_trip & (sequence[order][1:] == sequence[order][:-1])
+    broken = same_trip & ~duplicate & (destination[order][:-1] != start[order][1:])
+
+    for pair in np.flatnonzero(duplicate | broken):
+        previous, current = legs[order[pair]], legs[order[pair + 1]]
+        trip_id = trip_ids[trip[order[pair]]]
+        if duplicate[pair]:
+            message = f"Sequence {current['sequence']} is used by more than one leg"
+        else:
+            message = (f"Leg {current['sequence']} starts at {current['start_location']} but leg "
+                       f"{previous['sequence']} ends at {previous['destination']}")
+        trip_issues = issues.setdefault(trip_id, [])
+        if message not in trip_issues:
+            trip_issues.append(message)
+    return issues
+
+def validate_trips(trips: Iterable) -> Dict[str, List[str]]:
+    """validate_records() for Trip objects."""
+    return validate_records(_record_of(trip) for trip in trips)
+
+def validate_trip(trip) -> List[str]:
+    """Issues for a single Trip object (empty if its itinerary is consistent)."""
+    return validate_trips([trip]).get(trip.trip_id, [])
+
+class ItineraryAudit:
+    """Issues for every stored trip, revalidating only the trips that change."""
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self.issues: Dict[str, List[str]] = validate_records(records)
+
+    def on_trip_change(self, old_record: Optional[Dict[str, Any]], new_record: Optional[Dict[str, Any]]) -> None:
+        """data_manager trip listener: revalidate the saved trip, forget a deleted one."""
+        if old_record:
+            self.issues.pop(old_record['trip_id'], None)
+        if new_record:
+            self.issues.update(validate_records([new_record]))
+
+    def issues_for(self, trip_id: str) -> List[str]:
+        return self.issues.get(trip_id, [])
+
+_audit = None
+
+def _view():
+    global _audit
+    if _audit is None:
+        import data_manager
+        _audit = data_manager.TripFileView(ItineraryAudit)
+    return _audit
+
+def get_itinerary_audit() -> ItineraryAudit:
+    """The shared audit over the trips file, built on first use, updated on every trip save,
+    and rebuilt when another process has changed the file.
+
+    Saves change the audit in place; read it inside shared_itinerary_audit()
+    when other threads may save trips.
+    """
+    return _view().get()
+
+def shared_itinerary_audit():
+    """Context manager giving the shared audit, with trip saves held off until the block ends."""
+    return _view().reading()
+
+def reset_itinerary_audit() -> None:
+    """Drop the shared audit; the next call rebuilds it from the trips file."""
+    if _audit is not None:
+        _audit.reset()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the itinerary of every stored trip.")
+    parser.add_argument('--trip-id', action='append', help="only report these trips (repeatable)")
+    args = parser.parse_args(argv)
+
+    import data_manager
+    names = {}
+    records = []
+    for record in data_manager.iter_json_records(data_manager.TRIP_FILE):
+        if not args.trip_id or record['trip_id'] in args.trip_id:
+            names[record['trip_id']] = record.get('name', '')
+            records.append({'trip_id': record['trip_id'], 'trip_legs': record.get('trip_legs', [])})
+    issues = validate_records(records)
+
+    for trip_id, trip_issues in issues.items():
+        print(f"{trip_id} ({names[trip_id]}):")
+        for issue in trip_issues:
+            print(f"  - {issue}")
+    print(f"{len(records)} trip(s) checked, {len(issues)} with issues.")
+    return 1 if issues else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
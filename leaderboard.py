@@ -0,0 +1,171 @@
+# FILE: leaderboard.py
+# Top-k rankings for the reports: coordinators by revenue, destinations by
+# leg count, transport providers by spend and trips by outstanding balance.
+# Totals are summed per key in one pass, then the k best are picked with a
+# bounded heap instead of sorting every key.
+
+import heapq
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+DEFAULT_K = 10
+
+# Leaderboard name -> (chart title, value label)
+BOARDS = {
+    'coordinators_by_revenue': ('Top Coordinators by Revenue', 'Revenue (£)'),
+    'destinations_by_legs': ('Top Destinations by Trip Legs', 'Number of Legs'),
+    'providers_by_spend': ('Top Transport Providers by Spend', 'Spend (£)'),
+    'trips_by_outstanding': ('Trips with the Largest Outstanding Balance', 'Outstanding (£)')
+}
+
+class TopK:
+    """The k highest-scoring keys seen so far, using a size-k min-heap.
+
+    Ties keep the key that was pushed first, so result() matches
+    sorted(..., reverse=True)[:k]. Two TopK objects built over consecutive
+    parts of the input (chunks or parallel partitions) can be merged.
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.count = 0
+        # Min-heap of (score, -arrival index, key)
+        self.heap: List[Tuple[float, int, Hashable]] = []
+
+    def push(self, key: Hashable, score: float) -> None:
+        self._push((score, -self.count, key))
+        self.count += 1
+
+    def update(self, pairs: Iterable[Tuple[Hashable, float]]) -> None:
+        for key, score in pairs:
+            self.push(key, score)
+
+    def _push(self, entry) -> None:
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other: 'TopK') -> None:
+        """Combine with a TopK over the items that follow this one's."""
+        for score, neg_index, key in other.heap:
+            self._push((score, neg_index - self.count, key))
+        self.count += other.count
+
+    def result(self) -> List[Tuple[Hashable, float]]:
+        """(key, score) pairs, highest score first."""
+        return [(key, score) for score, _, key in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+def top_k(totals: Dict[Hashable, float], k: int = DEFAULT_K) -> List[Tuple[Hashable, float]]:
+    """The k largest entries of a totals dict, in insertion order for ties."""
+    ranking = TopK(k)
+    ranking.update(totals.items())
+    return ranking.result()
+
+def _add(totals: Dict[Hashable, float], key: Hashable, amount: float) -> None:
+    totals[key] = totals.get(key, 0) + amount
+
+def _named(ranking: List[Tuple[Hashable, float]], names: Dict[Hashable, str]) -> List[Tuple[str, float]]:
+    """Swap ranked ids for their display names; trips that share a name stay separate entries."""
+    return [(names.get(key, key), score) for key, score in ranking]
+
+def leaderboards(trips: List, invoices: List, k: int = DEFAULT_K) -> Dict[str, List[Tuple[str, float]]]:
+    """All four leaderboards from model objects."""
+    revenue: Dict[str, float] = {}
+    outstanding: Dict[str, float] = {}
+    trip_names: Dict[str, str] = {}
+    for invoice in invoices:
+        trip = invoice.trip
+        if trip.coordinator:
+            _add(revenue, trip.coordinator.name, invoice.total_amount)
+        _add(outstanding, trip.trip_id, invoice.calculate_balance())
+        trip_names[trip.trip_id] = trip.name
+
+    legs: Dict[str, int] = {}
+    spend: Dict[str, float] = {}
+    for trip in trips:
+        for leg in trip.trip_legs:
+            _add(legs, leg.destination, 1)
+            _add(spend, leg.transport_provider, leg.cost)
+
+    return {
+        'coordinators_by_revenue': top_k(revenue, k),
+        'destinations_by_legs': top_k(legs, k),
+        'providers_by_spend': top_k(spend, k),
+        'trips_by_outstanding': _named(top_k({trip_id: amount for trip_id, amount in outstanding.items()
+                                              if amount > 0}, k), trip_names)
+    }
+
+class LeaderboardAccumulator:
+    """Partial leaderboard totals over raw trip and invoice records.
+
+    Keeps one running total per destination, provider and invoiced trip, so
+    memory grows with the number of trips (trips are ranked on their own
+    totals), not with the number of invoices or legs; accumulators over
+    different chunks can be merged before result() picks the top k.
+    """
+
+    def __init__(self):
+        self.revenue: Dict[str, float] = {}
+        self.outstanding: Dict[str, float] = {}
+        self.legs: Dict[str, int] = {}
+        self.spend: Dict[str, float] = {}
+
+    def update_invoices(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            paid = sum(payment['amount'] for payment in record.get('payments', []))
+            _add(self.revenue, record['trip_id'], record['total_amount'])
+            _add(self.outstanding, record['trip_id'], record['total_amount'] - paid)
+
+    def update_trips(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            for leg in record.get('trip_legs', []):
+                _add(self.legs, leg['destination'], 1)
+                _add(self.spend, leg['transport_provider'], leg.get('cost', 0.0))
+
+    def merge(self, other: 'LeaderboardAccumulator') -> None:
+        for mine, theirs in ((self.revenue, other.revenue), (self.outstanding, other.outstanding),
+                             (self.legs, other.legs), (self.spend, other.spend)):
+            for key, amount in theirs.items():
+                _add(mine, key, amount)
+
+    def result(self, trips: Dict[str, Tuple[str, Optional[str]]], user_names: Dict[str, str],
+               k: int = DEFAULT_K) -> Dict[str, List[Tuple[str, float]]]:
+        """Final leaderboards; trips maps trip_id to (name, coordinator_id)."""
+        revenue: Dict[str, float] = {}
+        outstanding: Dict[str, float] = {}
+        trip_names: Dict[str, str] = {}
+        for trip_id, amount in self.revenue.items():
+            name, coordinator_id = trips.get(trip_id, (trip_id, None))
+            trip_names[trip_id] = name
+            if coordinator_id in user_names:
+                _add(revenue, user_names[coordinator_id], amount)
+            if self.outstanding[trip_id] > 0:
+                outstanding[trip_id] = self.outstanding[trip_id]
+        return {
+            'coordinators_by_revenue': top_k(revenue, k),
+            'destinations_by_legs': top_k(self.legs, k),
+            'providers_by_spend': top_k(self.spend, k),
+            'trips_by_outstanding': _named(top_k(outstanding, k), trip_names)
+        }
+
+def stream_leaderboards(chunk_size: int = 10000, k: int = DEFAULT_K) -> Dict[str, List[Tuple[str, float]]]:
+    """leaderboards() computed by streaming the invoice and trip files in chunks.
+
+    Not bounded like the other streams: the per-trip totals, and the name and
+    coordinator of each invoiced trip, are held in memory, O(trips).
+    """
+    import data_manager
+    accumulator = LeaderboardAccumulator()
+    for chunk in data_manager.iter_record_chunks(data_manager.INVOICE_FILE, chunk_size):
+        accumulator.update_invoices(chunk)
+    # Only invoiced trips are looked up
+    trips: Dict[str, Tuple[str, Optional[str]]] = {}
+    for chunk in data_manager.iter_record_chunks(data_manager.TRIP_FILE, chunk_size):
+        accumulator.update_trips(chunk)
+        for record in chunk:
+            if record['trip_id'] in accumulator.revenue:
+                trips[record['trip_id']] = (record['name'], record.get('coordinator_id'))
+    user_names = {user['user_id']: user['name'] for user in data_manager.iter_json_records(data_manager.USER_FILE)}
+    return accumulator.result(trips, user_names, k)
+
+print("Leaderboard module loaded successfully.")
@@ -0,0 +1,162 @@
+# FILE: load_test.py
+# Requests per second against the JSON API server (server.py):
+#     python load_test.py [--url http://127.0.0.1:8080] [--username admin] [--password admin123]
+#                         [--clients 8] [--requests 2000] [--idle 0] [--paths /trips /invoices ...]
+# Each client thread logs in once and sends its share of the requests over a
+# keep-alive connection, cycling through the paths. --idle N also holds N
+# keep-alive connections open without using them for the whole run, as
+# browsers left open on a page do; they must not slow the other clients. Without --url a server is
+# started in this process on a free port, over the current data files; the
+# clients then share the interpreter with it, so a separate server process
+# gives higher (and more realistic) numbers.
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+DEFAULT_PATHS = ['/trips', '/travellers', '/invoices', '/reports/trip_stats']
+
+def _login(host: str, port: int, username: str, password: str) -> str:
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        connection.request('POST', '/login', json.dumps({'username': username, 'password': password}),
+                           {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        body = json.loads(response.read() or b'{}')
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"Login failed: {body.get('error', response.status)}")
+    return body['token']
+
+def _client(host: str, port: int, token: str, paths: List[str], count: int, offset: int,
+            latencies: List[float], statuses: Dict[int, int], lock: threading.Lock) -> None:
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Authorization': f'Bearer {token}'}
+    own_latencies = []
+    own_statuses: Dict[int, int] = {}
+    try:
+        for i in range(count):
+            started = time.perf_counter()
+            try:
+                connection.request('GET', paths[(offset + i) % len(paths)], headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 0
+            own_latencies.append(time.perf_counter() - started)
+            own_statuses[status] = own_statuses.get(status, 0) + 1
+    finally:
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            for status, n in own_statuses.items():
+                statuses[status] = statuses.get(status, 0) + n
+
+def hold_idle_connections(host: str, port: int, token: str, path: str, count: int) -> List[http.client.HTTPConnection]:
+    """Open `count` keep-alive connections, send one request on each and leave them idle."""
+    connections = []
+    for _ in range(count):
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        connections.append(connection)
+        connection.request('GET', path, headers={'Authorization': f'Bearer {token}'})
+        connection.getresponse().read()
+    return connections
+
+def run_load_test(host: str, port: int, token: str, paths: List[str], clients: int,
+                  total_requests: int, idle: int = 0) -> Dict[str, float]:
+    """Send total_requests GETs from `clients` threads while `idle` other
+    connections sit open; returns throughput and latency figures."""
+    idle_connections = hold_idle_connections(host, port, token, paths[0], idle)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    per_client = [total_requests // clients + (1 if i < total_requests % clients else 0) for i in range(clients)]
+    threads = [threading.Thread(target=_client, args=(host, port, token, paths, count, i, latencies, statuses, lock))
+               for i, count in enumerate(per_client)]
+
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for connection in idle_connections:
+            connection.close()
+    elapsed = time.perf_counter() - started
+
+    latency_ms = np.array(latencies) * 1000
+    errors = sum(n for status, n in statuses.items() if not 200 <= status < 300)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(latency_ms, 50)) if len(latency_ms) else 0.0,
+        'p95_ms': float(np.percentile(latency_ms, 95)) if len(latency_ms) else 0.0,
+        'p99_ms': float(np.percentile(latency_ms, 99)) if len(latency_ms) else 0.0
+    }
+
+def _local_server(workers: int) -> Tuple[object, threading.Thread]:
+    from server import APIServer
+    server = APIServer(('127.0.0.1', 0), workers=workers, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure requests/second against the JSON API server.")
+    parser.add_argument('--url', default=None, help="server to test (default: start one in this process)")
+    parser.add_argument('--username', default='admin', help="account to log in with (default: admin)")
+    parser.add_argument('--password', default='admin123', help="password for --username")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent client connections (default: 8)")
+    parser.add_argument('--requests', type=int, default=2000, help="total requests to send (default: 2000)")
+    parser.add_argument('--idle', type=int, default=0,
+                        help="keep-alive connections held open but unused during the run (default: 0)")
+    parser.add_argument('--workers', type=int, default=8, help="worker threads for the local server (default: 8)")
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS,
+                        help=f"GET paths to cycle through (default: {' '.join(DEFAULT_PATHS)})")
+    args = parser.parse_args(argv)
+    if args.clients < 1 or args.requests < 1:
+        parser.error("--clients and --requests must be at least 1")
+    if args.idle < 0:
+        parser.error("--idle must not be negative")
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname or '127.0.0.1', url.port or 80
+    else:
+        server, _ = _local_server(args.workers)
+        host, port = server.server_address[:2]
+    try:
+        token = _login(host, port, args.username, args.password)
+        # One untimed pass so the server's cache is warm, as it is in steady use
+        run_load_test(host, port, token, args.paths, 1, len(args.paths))
+        result = run_load_test(host, port, token, args.paths, args.clients, args.requests, args.idle)
+    except (OSError, RuntimeError) as e:
+        print(f"Load test failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    idle_note = f" ({args.idle} idle connections open)" if args.idle else ""
+    print(f"{result['requests']} requests from {args.clients} clients{idle_note} in {result['seconds']:.2f}s: "
+          f"{result['requests_per_second']:.0f} requests/s, {result['errors']} errors")
+    print(f"latency p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    return 1 if result['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,7 @@
 # Main entry point for the Travel Management System console application.
 
 from auth import AuthenticationService
-from data_manager import load_users, load_travellers, save_traveller, load_trips, save_trip
+from data_manager import load_users, load_travellers, save_traveller, load_trips, save_trip, Prefetch
 from models import Traveller, TripCoordinator, TripManager, Administrator, Trip
 from datetime import datetime
 import os
@@ -11,6 +11,8 @@ class TravelManagementSystem:
     def __init__(self):
         self.auth_service = AuthenticationService()
         self.is_running = True
+        # Data loaded in the background after login, for the first screen that needs it
+        self.prefetch = None
 
     def clear_screen(self):
         """Clear the console screen for better readability."""
@@ -38,10 +40,25 @@ class TravelManagementSystem:
         print(f"\n{message}")
         
         if success:
+            self.prefetch = Prefetch()
             input("\nPress Enter to continue to main menu...")
         else:
             input("\nPress Enter to try again...")
 
+    def take_prefetched(self):
+        """(users, travellers, trips, invoices) from the login prefetch, or None.
+
+        Only the first caller gets it; it waits if the load is still running,
+        and returns None if the data has changed on disk since.
+        """
+        prefetch, self.prefetch = self.prefetch, None
+        return prefetch.result() if prefetch else None
+
+    def logout(self):
+        """Log out and drop any prefetched data."""
+        self.auth_service.logout()
+        self.prefetch = None
+
     def admin_menu(self):
         """Menu for Administrator users."""
         while True:
@@ -54,8 +71,9 @@ class TravelManagementSystem:
             print("4. Coordinator Functions")
             print("5. Logout")
             print("6. Exit System")
+            print("7. Receivables Aging")
             
-            choice = input("\nEnter your choice (1-6): ")
+            choice = input("\nEnter your choice (1-7): ")
             
             if choice == "1":
                 self.manage_trip_managers()
@@ -66,13 +84,15 @@ class TravelManagementSystem:
             elif choice == "4":
                 self.trip_coordinator_menu()
             elif choice == "5":
-                self.auth_service.logout()
+                self.logout()
                 print("Logged out successfully.")
                 input("Press Enter to continue...")
                 break
             elif choice == "6":
                 self.is_running = False
                 break
+            elif choice == "7":
+                self.view_receivables_aging()
             else:
                 print("Invalid choice. Please try again.")
                 input("Press Enter to continue...")
@@ -88,8 +108,9 @@ class TravelManagementSystem:
             print("3. Coordinator Functions")
             print("4. Logout")
             print("5. Exit System")
+            print("6. Daily Occupancy")
             
-            choice = input("\nEnter your choice (1-5): ")
+            choice = input("\nEnter your choice (1-6): ")
             
             if choice == "1":
                 self.manage_trip_coordinators()
@@ -98,13 +119,15 @@ class TravelManagementSystem:
             elif choice == "3":
                 self.trip_coordinator_menu()
             elif choice == "4":
-                self.auth_service.logout()
+                self.logout()
                 print("Logged out successfully.")
                 input("Press Enter to continue...")
                 break
             elif choice == "5":
                 self.is_running = False
                 break
+            elif choice == "6":
+                self.view_daily_occupancy()
             else:
                 print("Invalid choice. Please try again.")
                 input("Press Enter to continue...")
@@ -124,8 +147,9 @@ class TravelManagementSystem:
             print("7. Back to Previous Menu")
             print("8. Logout")
             print("9. Exit System")
+            print("10. Upcoming Departures")
             
-            choice = input("\nEnter your choice (1-9): ")
+            choice = input("\nEnter your choice (1-10): ")
             
             if choice == "1":
                 self.manage_trips()
@@ -142,13 +166,15 @@ class TravelManagementSystem:
             elif choice == "7":
                 break
             elif choice == "8":
-                self.auth_service.logout()
+                self.logout()
                 print("Logged out successfully.")
                 input("Press Enter to continue...")
                 break
             elif choice == "9":
                 self.is_running = False
                 break
+            elif choice == "10":
+                self.view_upcoming_departures()
             else:
                 print("Invalid choice. Please try again.")
                 input("Press Enter to continue...")
@@ -168,7 +194,7 @@ class TravelManagementSystem:
                     self.trip_coordinator_menu()
                 else:
                     print("Unknown user role. Logging out...")
-                    self.auth_service.logout()
+                    self.logout()
                     input("Press Enter to continue...")
 
     def manage_trips(self):
@@ -182,7 +208,8 @@ class TravelManagementSystem:
             self.display_header()
             print("=== MANAGE TRIPS ===")
             
-            trips = load_trips()
+            prefetched = self.take_prefetched()
+            trips = prefetched[2] if prefetched else load_trips()
             current_user = self.auth_service.current_user
             
             # Filter trips based on user role
@@ -339,7 +366,8 @@ class TravelManagementSystem:
             self.display_header()
             print("=== MANAGE TRIP LEGS ===")
             
-            trips = load_trips()
+            prefetched = self.take_prefetched()
+            trips = prefetched[2] if prefetched else load_trips()
             current_user = self.auth_service.current_user
             
             # Filter trips based on user role
@@ -394,13 +422,22 @@ class TravelManagementSystem:
             else:
                 print("\nNo legs added yet.")
             
+            from itinerary_validator import shared_itinerary_audit
+            with shared_itinerary_audit() as audit:
+                issues = audit.issues_for(trip.trip_id)
+            if issues and trip.trip_legs:
+                print("\nItinerary issues:")
+                for issue in issues:
+                    print(f"  ! {issue}")
+            
             print("\n1. Add New Leg")
             print("2. Update Leg")
             print("3. Delete Leg")
             print("4. Generate Itinerary Preview")
             print("5. Back to Trip Selection")
+            print("6. Find Cheapest Known Route")
             
-            choice = input("\nEnter your choice (1-5): ")
+            choice = input("\nEnter your choice (1-6): ")
             
             if choice == "1":
                 self.clear_screen()
@@ -502,10 +539,51 @@ class TravelManagementSystem:
                 
             elif choice == "5":
                 break
+            elif choice == "6":
+                self.find_cheapest_route()
             else:
                 print("Invalid choice. Please try again.")
                 input("Press Enter to continue...")
 
+    def find_cheapest_route(self):
+        """Cheapest known route between two locations, priced from the legs of every trip."""
+        from route_graph import shared_route_graph
+        from models import TransportMode
+        
+        self.clear_screen()
+        self.display_header()
+        print("=== CHEAPEST KNOWN ROUTE ===")
+        origin = input("From: ")
+        destination = input("To: ")
+        
+        print("\nTransport Modes:")
+        for i, mode in enumerate(TransportMode, 1):
+            print(f"{i}. {mode.value}")
+        mode_choice = input("Allowed modes (numbers separated by commas, blank for any): ").strip()
+        weight = input("Price legs by (min/median) [min]: ").strip().lower() or "min"
+        
+        try:
+            modes = None
+            if mode_choice:
+                modes = [list(TransportMode)[int(part) - 1] for part in mode_choice.split(',')]
+            with shared_route_graph() as graph:
+                route = graph.cheapest_route(origin, destination, modes=modes, weight=weight)
+        except (ValueError, IndexError) as e:
+            print(f"Invalid input: {e}")
+            input("Press Enter to continue...")
+            return
+        
+        if route is None:
+            print(f"\nNo known route from {origin} to {destination}.")
+        else:
+            print(f"\nRoute from {route['origin']} to {route['destination']} "
+                  f"({route['weight']} observed prices):")
+            for i, hop in enumerate(route['hops'], 1):
+                providers = ', '.join(hop['providers'])
+                print(f"{i}. {hop['from']} -> {hop['to']} by {hop['mode']}: £{hop['cost']:.2f} ({providers})")
+            print(f"Total: £{route['total_cost']:.2f}")
+        input("\nPress Enter to continue...")
+
     def manage_trip_assignments(self):
         """Manage traveller assignments to trips."""
         from data_manager import load_trips, load_travellers, assign_traveller_to_trip, remove_traveller_from_trip
@@ -598,6 +676,16 @@ class TravelManagementSystem:
                     traveller_choice = int(input("\nEnter traveller number: ")) - 1
                     if 0 <= traveller_choice < len(available_travellers):
                         traveller_to_assign = available_travellers[traveller_choice]
+                        from booking_index import shared_booking_index
+                        with shared_booking_index() as index:
+                            overlapping = index.assignment_conflicts(traveller_to_assign.traveller_id, trip)
+                        if overlapping:
+                            print(f"\nWarning: {traveller_to_assign.name} is already booked on overlapping "
+                                  f"trip(s): {', '.join(overlapping)}")
+                            if input("Assign anyway? (y/n): ").lower() != 'y':
+                                print("Assignment cancelled.")
+                                input("Press Enter to continue...")
+                                continue
                         if assign_traveller_to_trip(trip.trip_id, traveller_to_assign.traveller_id):
                             print(f"Traveller '{traveller_to_assign.name}' assigned successfully!")
                             # Refresh the trip data
@@ -648,9 +736,39 @@ class TravelManagementSystem:
                 print("Invalid choice. Please try again.")
                 input("Press Enter to continue...")
 
+    def view_upcoming_departures(self):
+        """List the trips departing in the next few days, from the start-date index."""
+        from agenda import DEFAULT_DAYS, upcoming_departures
+        
+        self.clear_screen()
+        self.display_header()
+        print("=== UPCOMING DEPARTURES ===")
+        days = input(f"Show departures in the next how many days? [{DEFAULT_DAYS}]: ").strip() or str(DEFAULT_DAYS)
+        if not days.isdigit() or int(days) < 1:
+            print("Please enter a whole number of days.")
+            input("\nPress Enter to continue...")
+            return
+        
+        current_user = self.auth_service.current_user
+        coordinator_id = current_user.user_id if isinstance(current_user, TripCoordinator) else None
+        departures = upcoming_departures(int(days), coordinator_id=coordinator_id)
+        today = datetime.now().date()
+        
+        if not departures:
+            print(f"\nNo trips depart in the next {days} days.")
+        else:
+            print(f"\n{'Date':<12}{'In':>6}  {'Trip':<30}{'Days':>6}{'Travellers':>12}")
+            print("-" * 66)
+            for entry in departures:
+                start = datetime.fromisoformat(entry['start_date']).date()
+                print(f"{start.isoformat():<12}{(start - today).days:>5}d  {entry['name'][:29]:<30}"
+                      f"{entry['duration_days']:>6}{entry['traveller_count']:>12}")
+            print(f"\n{len(departures)} departure(s) in the next {days} days.")
+        input("\nPress Enter to continue...")
+
     def handle_payments(self):
         """Handle invoices and payments for trips."""
-        from data_manager import load_trips, load_invoices, save_invoice, delete_invoice
+        from data_manager import load_all, save_invoice, delete_invoice
         from models import Invoice, Payment
         from datetime import datetime
         
@@ -659,8 +777,7 @@ class TravelManagementSystem:
             self.display_header()
             print("=== MANAGE INVOICES & PAYMENTS ===")
             
-            trips = load_trips()
-            invoices = load_invoices()
+            _, _, trips, invoices = self.take_prefetched() or load_all()
             current_user = self.auth_service.current_user
             
             # Filter trips based on user role
@@ -723,6 +840,20 @@ class TravelManagementSystem:
                     if 0 <= trip_choice < len(user_trips):
                         selected_trip = user_trips[trip_choice]
                         
+                        if not selected_trip.trip_legs:
+                            print("This trip has no legs. Please add trip legs before invoicing.")
+                            input("Press Enter to continue...")
+                            continue
+                        
+                        from itinerary_validator import validate_trip
+                        issues = validate_trip(selected_trip)
+                        if issues:
+                            print(f"\nThe itinerary for {selected_trip.name} has issues:")
+                            for issue in issues:
+                                print(f"  ! {issue}")
+                            if input("Invoice this trip anyway? (y/n): ").lower() != 'y':
+                                continue
+                        
                         # Calculate total cost from trip legs
                         total_cost = sum(leg.cost for leg in selected_trip.trip_legs)
                         if total_cost == 0:
@@ -858,7 +989,8 @@ class TravelManagementSystem:
             self.display_header()
             print("=== MANAGE TRAVELLERS ===")
             
-            travellers = load_travellers()
+            prefetched = self.take_prefetched()
+            travellers = prefetched[1] if prefetched else load_travellers()
             print(f"\nCurrent travellers in system: {len(travellers)}")
             
             print("\n1. View All Travellers")
@@ -1176,6 +1308,89 @@ class TravelManagementSystem:
         
         input("\nPress Enter to continue...")
 
+    def view_receivables_aging(self):
+        """Show outstanding balances by days since issue, per coordinator."""
+        from data_manager import load_invoices
+        from report_data import receivables_aging
+        
+        self.clear_screen()
+        self.display_header()
+        print("=== RECEIVABLES AGING ===")
+        
+        invoices = load_invoices()
+        if not invoices:
+            print("No invoices found in the system.")
+            input("\nPress Enter to continue...")
+            return
+        
+        aging = receivables_aging(invoices)
+        labels = [label for label, _ in aging['buckets']]
+        print(f"As of {aging['as_of']}, total outstanding: £{aging['total_outstanding']:.2f}")
+        print("-" * 80)
+        print(f"{'Coordinator':<24}" + "".join(f"{label + ' days':>14}" for label in labels))
+        for name, row in aging['by_coordinator']:
+            print(f"{name[:23]:<24}" + "".join(f"£{amount:>13.2f}" for amount in row))
+        print("-" * 80)
+        print(f"{'Total':<24}" + "".join(f"£{amount:>13.2f}" for _, amount in aging['buckets']))
+        print(f"{'Invoices':<24}" + "".join(f"{count:>14}" for _, count in aging['invoice_counts']))
+        
+        if input("\nSave chart and CSV? (y/n): ").strip().lower() == "y":
+            from report_generator import ReportGenerator
+            success, result = ReportGenerator.generate_receivables_aging(invoices, data_formats=('csv',))
+            if success:
+                print(f"\n✓ Report generated successfully!")
+                print(f"Saved to: {result}")
+            else:
+                print(f"\n✗ Report generation failed: {result}")
+        
+        input("\nPress Enter to continue...")
+
+    def view_daily_occupancy(self):
+        """Show how many travellers and active trips are on the road each day."""
+        from data_manager import load_trips
+        from report_data import daily_occupancy
+        
+        self.clear_screen()
+        self.display_header()
+        print("=== DAILY OCCUPANCY ===")
+        start = input("From (YYYY-MM-DD, blank for first trip): ").strip()
+        end = input("To (YYYY-MM-DD, blank for last trip): ").strip()
+        try:
+            start = datetime.strptime(start, '%Y-%m-%d') if start else None
+            end = datetime.strptime(end, '%Y-%m-%d') if end else None
+        except ValueError:
+            print("Invalid date format. Use YYYY-MM-DD.")
+            input("\nPress Enter to continue...")
+            return
+        
+        trips = load_trips()
+        occupancy = daily_occupancy(trips, start, end)
+        if not occupancy['days']:
+            print("No active trips in that period.")
+            input("\nPress Enter to continue...")
+            return
+        
+        print(f"\n{'Day':<12}{'Trips':>8}{'Travellers':>12}")
+        print("-" * 32)
+        for day, trip_count, travellers in zip(occupancy['days'], occupancy['trips'], occupancy['travellers']):
+            if trip_count or travellers:
+                print(f"{day:<12}{trip_count:>8}{travellers:>12}")
+        print("-" * 32)
+        print(f"Peak: {occupancy['peak_travellers']} travellers on {occupancy['peak_day']} "
+              f"(most trips in progress: {occupancy['peak_trips']})")
+        
+        if input("\nSave chart and CSV? (y/n): ").strip().lower() == "y":
+            from report_generator import ReportGenerator
+            success, result = ReportGenerator.generate_daily_occupancy(trips, data_formats=('csv',),
+                                                                       start=start, end=end)
+            if success:
+                print(f"\n✓ Report generated successfully!")
+                print(f"Saved to: {result}")
+            else:
+                print(f"\n✗ Report generation failed: {result}")
+        
+        input("\nPress Enter to continue...")
+
     def generate_total_invoice(self):
         """Generate total invoice (placeholder)."""
         print("\n--- Generate Total Invoice ---")
@@ -1184,48 +1399,61 @@ class TravelManagementSystem:
 
     def generate_reports(self):
         """Generate various reports using matplotlib."""
-        from data_manager import load_trips, load_travellers, load_invoices
+        from data_manager import load_all, load_trips, load_travellers, load_invoices, load_monthly_rollups
         from report_generator import ReportGenerator
         
         self.clear_screen()
         self.display_header()
         print("=== GENERATE REPORTS ===")
         
-        trips = load_trips()
-        travellers = load_travellers()
-        invoices = load_invoices()
-        
         print("1. Trip Statistics Report")
         print("2. Financial Summary Report")
         print("3. Traveller Statistics Report")
         print("4. Revenue Trends Report")
         print("5. Back")
+        print("6. Leaderboards Report")
+        print("7. Coordinator Report Packs")
+        print("8. HTML Dashboard (all reports in one file)")
         
-        choice = input("\nSelect report type (1-5): ")
+        choice = input("\nSelect report type (1-8): ")
         
         if choice == "1":
-            success, result = ReportGenerator.generate_trip_statistics(trips)
+            success, result = ReportGenerator.generate_trip_statistics(load_trips())
             if success:
                 print(f"\n✓ Report generated successfully!")
                 print(f"Saved to: {result}")
             else:
                 print(f"\n✗ Report generation failed: {result}")
         elif choice == "2":
-            success, result = ReportGenerator.generate_financial_summary(invoices)
+            success, result = ReportGenerator.generate_financial_summary(load_invoices())
             if success:
                 print(f"\n✓ Report generated successfully!")
                 print(f"Saved to: {result}")
             else:
                 print(f"\n✗ Report generation failed: {result}")
         elif choice == "3":
-            success, result = ReportGenerator.generate_traveller_statistics(travellers)
+            success, result = ReportGenerator.generate_traveller_statistics(load_travellers(), trips=load_trips())
             if success:
                 print(f"\n✓ Report generated successfully!")
                 print(f"Saved to: {result}")
             else:
                 print(f"\n✗ Report generation failed: {result}")
         elif choice == "4":
-            success, result = ReportGenerator.generate_revenue_trends(invoices, trips)
+            granularity = input("Granularity (day/week/month/quarter) [month]: ").strip().lower() or "month"
+            window = input("Rolling window in periods (blank for none): ").strip()
+            year_over_year = input("Compare with previous year? (y/n) [n]: ").strip().lower() == "y"
+            if not window.isdigit() and window:
+                print("Rolling window must be a whole number.")
+                input("\nPress Enter to continue...")
+                return
+            
+            if granularity == "month" and not window and not year_over_year:
+                # Monthly rollups are maintained on write, so no need to load the full history
+                success, result = ReportGenerator.generate_revenue_trends_from_rollups(load_monthly_rollups())
+            else:
+                success, result = ReportGenerator.generate_revenue_trends(
+                    load_invoices(), load_trips(), granularity=granularity,
+                    window=int(window) if window else None, year_over_year=year_over_year)
             if success:
                 print(f"\n✓ Report generated successfully!")
                 print(f"Saved to: {result}")
@@ -1233,6 +1461,32 @@ class TravelManagementSystem:
                 print(f"\n✗ Report generation failed: {result}")
         elif choice == "5":
             return
+        elif choice == "6":
+            success, result = ReportGenerator.generate_leaderboards(load_trips(), load_invoices())
+            if success:
+                print(f"\n✓ Report generated successfully!")
+                print(f"Saved to: {result}")
+            else:
+                print(f"\n✗ Report generation failed: {result}")
+        elif choice == "7":
+            from report_batch import build_report_packs
+            print("\nRendering report packs for coordinators whose data changed...")
+            status = build_report_packs(load_trips(), load_invoices())
+            if not status:
+                print("No coordinator has any trips yet.")
+            for coordinator_id, result in sorted(status.items()):
+                print(f"  {coordinator_id}: {result}")
+            if status:
+                print(f"Packs are in: {ReportGenerator.REPORTS_DIR}/<coordinator ID>/")
+        elif choice == "8":
+            from dashboard import generate_dashboard
+            try:
+                _, travellers, trips, invoices = load_all()
+                result = generate_dashboard(trips, invoices, travellers)
+                print(f"\n✓ Dashboard generated successfully!")
+                print(f"Saved to: {result}")
+            except OSError as e:
+                print(f"\n✗ Dashboard generation failed: {e}")
         else:
             print("Invalid choice.")
         
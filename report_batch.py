@@ -0,0 +1,202 @@
+# FILE: report_batch.py
+# Per-coordinator report packs, rendered as a batch job:
+#     python report_batch.py [--workers N] [--force]
+# Data is split by coordinator in one pass, each pack's input records are
+# fingerprinted, and only packs whose inputs changed since the previous
+# run are re-rendered, in parallel worker processes. Each pack is written to
+# reports/<coordinator_id>/ with a pack.json manifest listing its files.
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import report_data
+
+PACK_MANIFEST = "pack.json"
+
+# Reports included in every pack, in the order they are rendered
+PACK_REPORTS = ('trip_stats', 'financial_summary', 'traveller_stats', 'revenue_trends', 'receivables_aging')
+
+def partition_by_coordinator(trips: List, invoices: List) -> Dict[str, Dict[str, Any]]:
+    """Split trips, invoices and travellers by the trip's coordinator in one pass over each list.
+
+    Unassigned trips (and their invoices) are not part of any pack.
+    """
+    partitions: Dict[str, Dict[str, Any]] = {}
+
+    def partition_for(trip) -> Optional[Dict[str, Any]]:
+        if not trip.coordinator:
+            return None
+        coordinator_id = trip.coordinator.user_id
+        if coordinator_id not in partitions:
+            partitions[coordinator_id] = {'name': trip.coordinator.name, 'trips': [],
+                                          'invoices': [], 'travellers': {}}
+        return partitions[coordinator_id]
+
+    for trip in trips:
+        partition = partition_for(trip)
+        if partition is not None:
+            partition['trips'].append(trip)
+            for traveller in trip.travellers:
+                partition['travellers'][traveller.traveller_id] = traveller
+    for invoice in invoices:
+        partition = partition_for(invoice.trip)
+        if partition is not None:
+            partition['invoices'].append(invoice)
+
+    for partition in partitions.values():
+        partition['travellers'] = list(partition['travellers'].values())
+    return partitions
+
+def pack_reports(partition: Dict[str, Any], as_of: Optional[datetime] = None) -> Dict[str, dict]:
+    """Aggregates for each report in a pack; reports without data are left out."""
+    trips, invoices, travellers = partition['trips'], partition['invoices'], partition['travellers']
+    reports = {}
+    if trips:
+        reports['trip_stats'] = report_data.trip_statistics(trips)
+    if invoices:
+        reports['financial_summary'] = report_data.financial_summary(invoices)
+        reports['revenue_trends'] = report_data.revenue_series(invoices, trips)
+        reports['receivables_aging'] = report_data.receivables_aging(invoices, as_of)
+    if travellers:
+        reports['traveller_stats'] = report_data.traveller_statistics(travellers, as_of)
+    return {kind: reports[kind] for kind in PACK_REPORTS if kind in reports}
+
+def pack_inputs(partition: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a pack's trips, invoices and travellers that its reports read."""
+    return {
+        'name': partition['name'],
+        'trips': [(trip.trip_id, trip.name, trip.start_date, trip.duration_days, trip.is_active,
+                   [traveller.traveller_id for traveller in trip.travellers],
+                   [(leg.sequence, leg.start_location, leg.destination, leg.transport_provider,
+                     leg.transport_mode.value, leg.leg_type.value, leg.cost) for leg in trip.trip_legs])
+                  for trip in partition['trips']],
+        'invoices': [(invoice.invoice_id, invoice.trip.trip_id, invoice.issue_date, invoice.total_amount,
+                      invoice.status, [(payment.amount, payment.date, payment.method) for payment in invoice.payments])
+                     for invoice in partition['invoices']],
+        'travellers': [(traveller.traveller_id, traveller.date_of_birth) for traveller in partition['travellers']]
+    }
+
+def pack_fingerprint(partition: Dict[str, Any], options_key: dict) -> str:
+    """Content hash of a pack's input data and rendering options.
+
+    The aggregates are not hashed: aging and ages depend on the run date,
+    which would make every pack look changed each day.
+    """
+    payload = json.dumps({'inputs': pack_inputs(partition), 'options': options_key}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _read_manifest(pack_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(pack_dir, PACK_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _pack_is_current(pack_dir: str, fingerprint: str) -> bool:
+    """True when the previous run rendered this fingerprint and its files are still there."""
+    manifest = _read_manifest(pack_dir)
+    if not manifest or manifest.get('fingerprint') != fingerprint:
+        return False
+    return all(os.path.exists(os.path.join(pack_dir, name)) for name in manifest.get('files', {}).values())
+
+def _render_pack(job: Tuple[str, str, str, str, Dict[str, dict], Any]) -> Tuple[str, List[str]]:
+    """Worker: render one pack into its directory and write its manifest. Returns (coordinator_id, errors)."""
+    from report_generator import ReportGenerator
+
+    coordinator_id, name, pack_dir, fingerprint, reports, options = job
+    previous = _read_manifest(pack_dir) or {}
+    files, errors = {}, []
+    for kind, data in reports.items():
+        success, result = ReportGenerator.render_report(kind, data, options, output_dir=pack_dir)
+        if success:
+            files[kind] = os.path.basename(result)
+        else:
+            errors.append(f"{kind}: {result}")
+
+    # Drop charts from the previous version of the pack
+    for old_name in set(previous.get('files', {}).values()) - set(files.values()):
+        try:
+            os.remove(os.path.join(pack_dir, old_name))
+        except FileNotFoundError:
+            pass
+
+    manifest = {
+        'coordinator_id': coordinator_id,
+        'coordinator': name,
+        'fingerprint': fingerprint,
+        'generated_at': datetime.now().isoformat(),
+        'files': files
+    }
+    temp_path = os.path.join(pack_dir, PACK_MANIFEST + ".tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, os.path.join(pack_dir, PACK_MANIFEST))
+    return coordinator_id, errors
+
+def build_report_packs(trips: Optional[List] = None, invoices: Optional[List] = None,
+                       output_dir: Optional[str] = None, workers: Optional[int] = None,
+                       options=None, force: bool = False, as_of: Optional[datetime] = None) -> Dict[str, str]:
+    """Render every coordinator's report pack whose data changed since the last run.
+
+    Returns {coordinator_id: 'rendered' | 'unchanged' | 'failed: ...'}.
+    workers=1 renders in this process; otherwise a process pool is used.
+    """
+    from report_generator import ReportGenerator, RenderOptions
+
+    if trips is None or invoices is None:
+        import data_manager
+        trips = data_manager.load_trips() if trips is None else trips
+        invoices = data_manager.load_invoices() if invoices is None else invoices
+    output_dir = output_dir or ReportGenerator.REPORTS_DIR
+    options = options or RenderOptions()
+
+    status, jobs = {}, []
+    for coordinator_id, partition in partition_by_coordinator(trips, invoices).items():
+        pack_dir = os.path.join(output_dir, coordinator_id)
+        fingerprint = pack_fingerprint(partition, options.cache_key())
+        if not force and _pack_is_current(pack_dir, fingerprint):
+            status[coordinator_id] = 'unchanged'
+            continue
+        os.makedirs(pack_dir, exist_ok=True)
+        jobs.append((coordinator_id, partition['name'], pack_dir, fingerprint,
+                     pack_reports(partition, as_of), options))
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        results = [_render_pack(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render_pack, jobs))
+
+    for coordinator_id, errors in results:
+        status[coordinator_id] = f"failed: {'; '.join(errors)}" if errors else 'rendered'
+    return status
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render per-coordinator report packs.")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="re-render packs even if their data is unchanged")
+    parser.add_argument('--dpi', type=int, default=150, help="chart resolution (default: 150)")
+    parser.add_argument('--output-dir', default=None, help="directory for the packs (default: reports)")
+    args = parser.parse_args(argv)
+
+    from report_generator import RenderOptions
+    try:
+        status = build_report_packs(output_dir=args.output_dir, workers=args.workers,
+                                    options=RenderOptions(dpi=args.dpi), force=args.force)
+    except (OSError, ValueError) as e:
+        print(f"Report packs failed: {e}", file=sys.stderr)
+        return 1
+
+    for coordinator_id, result in sorted(status.items()):
+        print(f"{coordinator_id}: {result}")
+    return 0 if not any(result.startswith('failed') for result in status.values()) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
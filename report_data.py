@@ -0,0 +1,729 @@
+# FILE: report_data.py
+# Aggregations behind the reports. Each function makes a single pass over the
+# model objects to fill NumPy arrays, then groups and sums them with vectorised
+# operations. No plotting happens here, so these can be used without matplotlib.
+
+import heapq
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+
+# Default age group boundaries: a traveller falls in group i when EDGES[i-1] <= age < EDGES[i]
+AGE_EDGES = [19, 31, 51, 71]
+
+def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, largest first, ties broken by original order.
+
+    Matches sorted(..., reverse=True)[:k] but selects with np.argpartition in
+    O(n) instead of sorting everything.
+    """
+    n = len(values)
+    k = min(k, n)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        candidates = np.argpartition(-values, k - 1)[:k]
+        threshold = values[candidates].min()
+        # argpartition picks arbitrarily among equal values at the cut-off,
+        # so take the earliest ones to keep the ordering of a stable sort.
+        above = np.flatnonzero(values > threshold)
+        tied = np.flatnonzero(values == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order]
+
+def trip_statistics(trips: List) -> Dict[str, Any]:
+    """Trips per coordinator (in order of first appearance) and active/inactive counts."""
+    coordinator_codes: Dict[str, int] = {}
+    coord_index = np.full(len(trips), -1, dtype=np.intp)
+    active = np.zeros(len(trips), dtype=bool)
+
+    for i, trip in enumerate(trips):
+        if trip.coordinator:
+            coord_index[i] = coordinator_codes.setdefault(trip.coordinator.name, len(coordinator_codes))
+        active[i] = trip.is_active
+
+    counts = np.bincount(coord_index[coord_index >= 0], minlength=len(coordinator_codes))
+    active_trips = int(np.count_nonzero(active))
+
+    return {
+        'coordinators': list(zip(coordinator_codes, counts.tolist())),
+        'active': active_trips,
+        'inactive': len(trips) - active_trips
+    }
+
+def financial_summary(invoices: List, top_n: int = 5) -> Dict[str, Any]:
+    """Revenue, payments, invoice status, payment methods and top invoices."""
+    n = len(invoices)
+    totals = np.empty(n, dtype=float)
+    payment_invoice = []
+    payment_amount = []
+    payment_method = []
+    method_codes: Dict[str, int] = {}
+
+    for i, invoice in enumerate(invoices):
+        totals[i] = invoice.total_amount
+        for payment in invoice.payments:
+            payment_invoice.append(i)
+            payment_amount.append(payment.amount)
+            payment_method.append(method_codes.setdefault(payment.method, len(method_codes)))
+
+    amounts = np.asarray(payment_amount, dtype=float)
+    paid_per_invoice = np.bincount(np.asarray(payment_invoice, dtype=np.intp),
+                                   weights=amounts, minlength=n)
+    method_totals = np.bincount(np.asarray(payment_method, dtype=np.intp),
+                                weights=amounts, minlength=len(method_codes))
+
+    total_revenue = float(totals.sum())
+    total_paid = float(paid_per_invoice.sum())
+    paid_count = int(np.count_nonzero(totals - paid_per_invoice <= 0))
+    top = _top_k_indices(totals, top_n)
+
+    return {
+        'total_revenue': total_revenue,
+        'total_paid': total_paid,
+        'total_outstanding': total_revenue - total_paid,
+        'paid_count': paid_count,
+        'pending_count': n - paid_count,
+        'payment_methods': list(zip(method_codes, method_totals.tolist())),
+        'top_invoices': [(invoices[i].trip.name, invoices[i].total_amount) for i in top.tolist()]
+    }
+
+# Receivables aging: an outstanding balance falls in bucket i when EDGES[i-1] <= days since issue < EDGES[i]
+AGING_EDGES = [31, 61, 91]
+AGING_LABELS = ['0-30', '31-60', '61-90', '90+']
+
+def receivables_aging(invoices: List, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """Outstanding balances bucketed by days since issue, in total and per coordinator.
+
+    One pass over the invoices and their payments fills the arrays; the
+    buckets are then summed with np.bincount. Balances come from the
+    payments, not Invoice.status. Invoices dated after as_of count as 0 days.
+    """
+    as_of = as_of or datetime.now()
+    balances = np.empty(len(invoices), dtype=float)
+    days = np.empty(len(invoices), dtype=np.int64)
+    coordinator_index = np.zeros(len(invoices), dtype=np.intp)
+    coordinator_codes: Dict[str, int] = {}
+
+    for i, invoice in enumerate(invoices):
+        balances[i] = invoice.total_amount - sum(payment.amount for payment in invoice.payments)
+        days[i] = (as_of - invoice.issue_date).days
+        if balances[i] > 0:
+            coordinator = invoice.trip.coordinator.name if invoice.trip.coordinator else 'Unassigned'
+            coordinator_index[i] = coordinator_codes.setdefault(coordinator, len(coordinator_codes))
+
+    outstanding = balances > 0
+    buckets = np.digitize(np.maximum(days[outstanding], 0), AGING_EDGES)
+    nbuckets = len(AGING_LABELS)
+    amounts = balances[outstanding]
+    totals = np.bincount(buckets, weights=amounts, minlength=nbuckets)
+    counts = np.bincount(buckets, minlength=nbuckets)
+    cells = coordinator_index[outstanding] * nbuckets + buckets
+    per_coordinator = np.bincount(cells, weights=amounts, minlength=len(coordinator_codes) * nbuckets)
+    per_coordinator = per_coordinator.reshape(len(coordinator_codes), nbuckets)
+
+    return {
+        'as_of': as_of.strftime('%Y-%m-%d'),
+        'total_outstanding': float(amounts.sum()),
+        'buckets': list(zip(AGING_LABELS, totals.tolist())),
+        'invoice_counts': list(zip(AGING_LABELS, counts.tolist())),
+        'by_coordinator': list(zip(coordinator_codes, per_coordinator.tolist()))
+    }
+
+def age_labels(edges: Sequence[int]) -> List[str]:
+    """Labels for the age groups defined by edges, e.g. [19, 31] -> ['0-18', '19-30', '31+']."""
+    labels = []
+    lower = 0
+    for edge in edges:
+        labels.append(f"{lower}-{edge - 1}")
+        lower = edge
+    labels.append(f"{edges[-1]}+")
+    return labels
+
+# date.toordinal() of 1970-01-01, the datetime64 epoch
+_EPOCH_ORDINAL = 719163
+
+def _to_days(dates) -> np.ndarray:
+    """Convert an iterable of dates/datetimes to a datetime64[D] array.
+
+    Goes through date.toordinal(), which is much faster than letting NumPy
+    convert datetime objects one by one.
+    """
+    ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+    return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+def _civil_from_days(days: np.ndarray):
+    """Split datetime64[D] values into (year, month, day) integer arrays.
+
+    Integer-only calendar arithmetic (H. Hinnant's civil_from_days); much
+    faster than astype('datetime64[Y]') / astype('datetime64[M]').
+    """
+    z = days.astype(np.int64) + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+def exact_ages(birth_dates: np.ndarray, reference_dates) -> np.ndarray:
+    """Completed years of age at each reference date, for datetime64[D] arrays.
+
+    Someone born on 29 February becomes a year older on 1 March in non-leap years.
+    """
+    reference_dates = np.asarray(reference_dates, dtype='datetime64[D]')
+    birth_year, birth_month, birth_day = _civil_from_days(birth_dates)
+    ref_year, ref_month, ref_day = _civil_from_days(reference_dates)
+
+    # Subtract a year when the birthday has not yet come round in the reference year
+    before_birthday = ref_month * 32 + ref_day < birth_month * 32 + birth_day
+    return ref_year - birth_year - before_birthday
+
+def traveller_statistics(travellers: List, reference_date: Optional[datetime] = None,
+                         age_edges: Optional[Sequence[int]] = None, trips: Optional[List] = None) -> Dict[str, Any]:
+    """Traveller counts per age group.
+
+    Ages are exact as of reference_date (default: today). age_edges sets the
+    group boundaries (default AGE_EDGES). When trips are given, a per-trip
+    breakdown is added using each trip's start date as the reference.
+    """
+    edges = list(age_edges) if age_edges else AGE_EDGES
+    labels = age_labels(edges)
+    reference = np.datetime64((reference_date or datetime.now()).date(), 'D')
+
+    ages = exact_ages(_to_days(t.date_of_birth for t in travellers), reference)
+    counts = np.bincount(np.digitize(ages, edges), minlength=len(labels))
+
+    data = {
+        'age_groups': list(zip(labels, counts.tolist())),
+        'total_travellers': len(travellers)
+    }
+
+    if trips is not None:
+        # One row per (trip, traveller) assignment, aged at the trip's start date
+        trip_index, birth_dates, start_dates = [], [], []
+        for i, trip in enumerate(trips):
+            for traveller in trip.travellers:
+                trip_index.append(i)
+                birth_dates.append(traveller.date_of_birth)
+                start_dates.append(trip.start_date)
+        trip_ages = exact_ages(_to_days(birth_dates), _to_days(start_dates))
+        cells = np.asarray(trip_index, dtype=np.intp) * len(labels) + np.digitize(trip_ages, edges)
+        per_trip = np.bincount(cells, minlength=len(trips) * len(labels)).reshape(len(trips), len(labels))
+        data['per_trip'] = [(trip.name, row) for trip, row in zip(trips, per_trip.tolist())]
+
+    return data
+
+def revenue_trends(invoices: List, trips: List) -> Dict[str, Any]:
+    """Revenue and trip counts per calendar month that has invoices."""
+    invoice_months = np.fromiter((inv.issue_date.year * 12 + inv.issue_date.month - 1 for inv in invoices),
+                                 dtype=np.int64, count=len(invoices))
+    totals = np.fromiter((inv.total_amount for inv in invoices), dtype=float, count=len(invoices))
+    trip_months = np.fromiter((t.start_date.year * 12 + t.start_date.month - 1 for t in trips),
+                              dtype=np.int64, count=len(trips))
+
+    months, inverse = np.unique(invoice_months, return_inverse=True)
+    revenues = np.bincount(inverse, weights=totals, minlength=len(months))
+
+    # Count trips only for months that have revenue
+    position = np.searchsorted(months, trip_months)
+    position = np.minimum(position, max(len(months) - 1, 0))
+    matched = months[position] == trip_months if len(months) else np.zeros(len(trips), dtype=bool)
+    trip_counts = np.bincount(position[matched], minlength=len(months))
+
+    return {
+        'months': [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in months.tolist()],
+        'revenues': revenues.tolist(),
+        'trip_counts': trip_counts.tolist()
+    }
+
+def revenue_trends_from_rollups(rollups: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same result as revenue_trends(), read from the monthly rollup rows instead of the history."""
+    rows = sorted((row for row in rollups if row['invoice_count'] > 0), key=lambda row: row['month'])
+    return {
+        'months': [row['month'] for row in rows],
+        'revenues': [row['revenue'] for row in rows],
+        'trip_counts': [row['trip_count'] for row in rows]
+    }
+
+
+# Time buckets for revenue_series(); the lag is how many buckets back the same
+# period of the previous year is (days and weeks compare the same weekday 52 weeks earlier)
+GRANULARITIES = ('day', 'week', 'month', 'quarter')
+PERIODS_PER_YEAR = {'day': 364, 'week': 52, 'month': 12, 'quarter': 4}
+
+def _bucket_keys(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Consecutive integer bucket numbers for datetime64[D] values."""
+    day_numbers = days.astype(np.int64)
+    if granularity == 'day':
+        return day_numbers
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (day_numbers + 3) // 7
+    year, month, _ = _civil_from_days(days)
+    if granularity == 'month':
+        return year * 12 + month - 1
+    return year * 4 + (month - 1) // 3
+
+def _bucket_label(key: int, granularity: str) -> str:
+    if granularity == 'day':
+        return str(np.datetime64(key, 'D'))
+    if granularity == 'week':
+        iso_year, iso_week, _ = datetime.fromordinal(key * 7 - 3 + _EPOCH_ORDINAL).isocalendar()
+        return f"{iso_year:04d}-W{iso_week:02d}"
+    if granularity == 'month':
+        return f"{key // 12:04d}-{key % 12 + 1:02d}"
+    return f"{key // 4:04d}-Q{key % 4 + 1}"
+
+def revenue_series(invoices: List, trips: List, granularity: str = 'month', window: Optional[int] = None,
+                   year_over_year: bool = False) -> Dict[str, Any]:
+    """Revenue and trip counts for every bucket from the first invoice to the last.
+
+    Unlike revenue_trends(), empty buckets are kept so the series is evenly
+    spaced. Buckets are summed with one np.bincount pass over the invoice
+    dates; window adds a rolling sum of that many buckets and year_over_year
+    adds the revenue of the same bucket a year earlier, both read off a
+    cumulative-sum / shifted copy of the bucket totals.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity '{granularity}'. Choose from: {', '.join(GRANULARITIES)}.")
+    if window is not None and window < 1:
+        raise ValueError("Rolling window must be at least 1 bucket.")
+
+    invoice_keys = _bucket_keys(_to_days(inv.issue_date for inv in invoices), granularity)
+    totals = np.fromiter((inv.total_amount for inv in invoices), dtype=float, count=len(invoices))
+    data = {'granularity': granularity, 'periods': [], 'revenues': [], 'trip_counts': []}
+    if not len(invoice_keys):
+        return data
+
+    first = int(invoice_keys.min())
+    size = int(invoice_keys.max()) - first + 1
+    revenues = np.bincount(invoice_keys - first, weights=totals, minlength=size)
+
+    trip_offsets = _bucket_keys(_to_days(t.start_date for t in trips), granularity) - first
+    in_range = (trip_offsets >= 0) & (trip_offsets < size)
+    trip_counts = np.bincount(trip_offsets[in_range], minlength=size)
+
+    data['periods'] = [_bucket_label(key, granularity) for key in range(first, first + size)]
+    data['revenues'] = revenues.tolist()
+    data['trip_counts'] = trip_counts.tolist()
+
+    if window:
+        # Sum of the last `window` buckets (fewer at the start of the series)
+        cumulative = np.concatenate(([0.0], np.cumsum(revenues)))
+        ends = np.arange(1, size + 1)
+        data['window'] = window
+        data['rolling'] = (cumulative[ends] - cumulative[np.maximum(ends - window, 0)]).tolist()
+
+    if year_over_year:
+        lag = PERIODS_PER_YEAR[granularity]
+        data['previous_year'] = [None] * min(lag, size) + revenues[:max(size - lag, 0)].tolist()
+
+    return data
+
+def _day_number(value) -> int:
+    """Days since 1970-01-01 of a date/datetime."""
+    return value.toordinal() - _EPOCH_ORDINAL
+
+def _occupancy(days: np.ndarray, trip_deltas: np.ndarray, traveller_deltas: np.ndarray,
+               start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    """Per-day trip and traveller counts from difference-array entries.
+
+    Every trip contributes +1 (and +travellers) on its first day and -1 on
+    the day after its last; days holds those day numbers. One bincount per
+    series builds the difference array and a cumulative sum turns it into the
+    number on the road each day, O(trips + days). Without start/end the
+    calendar spans the entries.
+    """
+    data = {'days': [], 'trips': [], 'travellers': [], 'peak_day': None, 'peak_travellers': 0, 'peak_trips': 0}
+    if not len(days) and (start is None or end is None):
+        return data
+    first = _day_number(start) if start is not None else int(days.min())
+    last = _day_number(end) if end is not None else int(days.max()) - 1
+    size = last - first + 1
+    if size < 1:
+        return data
+
+    # Entries before the calendar become its opening counts; those after it fall off the end
+    offsets = np.clip(days - first, 0, size)
+    trips_on_road = np.rint(np.cumsum(np.bincount(offsets, weights=trip_deltas, minlength=size + 1))[:size])
+    travellers_on_road = np.rint(np.cumsum(np.bincount(offsets, weights=traveller_deltas, minlength=size + 1))[:size])
+    trips_on_road = trips_on_road.astype(np.int64)
+    travellers_on_road = travellers_on_road.astype(np.int64)
+
+    peak = int(travellers_on_road.argmax())
+    labels = np.arange(first, first + size).astype('datetime64[D]').astype(str)
+    data.update({
+        'days': labels.tolist(),
+        'trips': trips_on_road.tolist(),
+        'travellers': travellers_on_road.tolist(),
+        'peak_day': str(labels[peak]),
+        'peak_travellers': int(travellers_on_road[peak]),
+        'peak_trips': int(trips_on_road.max())
+    })
+    return data
+
+def daily_occupancy(trips: List, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    active_only: bool = True) -> Dict[str, Any]:
+    """Trips and travellers on the road on each day from start to end (inclusive).
+
+    A trip is on the road from start_date for duration_days days. Without
+    start/end the calendar runs from the first trip's start to the last
+    trip's end. active_only leaves out inactive trips.
+    """
+    if active_only:
+        trips = [trip for trip in trips if trip.is_active]
+    first_days = _to_days(trip.start_date for trip in trips).astype(np.int64)
+    durations = np.fromiter((max(trip.duration_days, 1) for trip in trips), dtype=np.int64, count=len(trips))
+    traveller_counts = np.fromiter((len(trip.travellers) for trip in trips), dtype=float, count=len(trips))
+    ones = np.ones(len(trips))
+    return _occupancy(np.concatenate((first_days, first_days + durations)), np.concatenate((ones, -ones)),
+                      np.concatenate((traveller_counts, -traveller_counts)), start, end)
+
+# ---------------------------------------------------------------------------
+# Streaming aggregation
+#
+# The accumulators below consume raw JSON records (as stored by data_manager)
+# in fixed-size chunks and keep only bounded partial aggregates: counts, sums,
+# per-category histograms and a size-k heap. Two accumulators can be merged,
+# so chunks may also be processed separately and combined. Memory use depends
+# on the chunk size and number of categories, not on the number of records.
+# The exception is stream_receivables_aging(), which joins invoices to their
+# trips' coordinators through a map with one entry per trip.
+# ---------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 10000
+
+class TripStatisticsAccumulator:
+    """Partial trip statistics over trip records."""
+
+    def __init__(self):
+        self.coordinator_counts: Dict[str, int] = {}
+        self.active = 0
+        self.inactive = 0
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            coordinator_id = record.get('coordinator_id')
+            if coordinator_id:
+                self.coordinator_counts[coordinator_id] = self.coordinator_counts.get(coordinator_id, 0) + 1
+            if record.get('is_active', True):
+                self.active += 1
+            else:
+                self.inactive += 1
+
+    def merge(self, other: 'TripStatisticsAccumulator') -> None:
+        for coordinator_id, count in other.coordinator_counts.items():
+            self.coordinator_counts[coordinator_id] = self.coordinator_counts.get(coordinator_id, 0) + count
+        self.active += other.active
+        self.inactive += other.inactive
+
+    def result(self, user_names: Dict[str, str]) -> Dict[str, Any]:
+        """Final statistics, with coordinator IDs resolved to names like trip_statistics()."""
+        by_name: Dict[str, int] = {}
+        for coordinator_id, count in self.coordinator_counts.items():
+            name = user_names.get(coordinator_id)
+            if name is not None:
+                by_name[name] = by_name.get(name, 0) + count
+        return {
+            'coordinators': list(by_name.items()),
+            'active': self.active,
+            'inactive': self.inactive
+        }
+
+class FinancialAccumulator:
+    """Partial financial summary over invoice records."""
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self.count = 0
+        self.total_revenue = 0.0
+        self.total_paid = 0.0
+        self.paid_count = 0
+        self.payment_methods: Dict[str, float] = {}
+        # Min-heap of (amount, -record index, trip_id) holding the top_n invoices
+        self.top: List = []
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        totals = np.fromiter((r['total_amount'] for r in records), dtype=float, count=len(records))
+        paid = np.zeros(len(records))
+        for i, record in enumerate(records):
+            for payment in record.get('payments', []):
+                paid[i] += payment['amount']
+                self.payment_methods[payment['method']] = \
+                    self.payment_methods.get(payment['method'], 0.0) + payment['amount']
+
+        self.total_revenue += float(totals.sum())
+        self.total_paid += float(paid.sum())
+        self.paid_count += int(np.count_nonzero(totals - paid <= 0))
+
+        for i in _top_k_indices(totals, self.top_n).tolist():
+            self._push((records[i]['total_amount'], -(self.count + i), records[i]['trip_id']))
+        self.count += len(records)
+
+    def _push(self, entry) -> None:
+        if len(self.top) < self.top_n:
+            heapq.heappush(self.top, entry)
+        elif entry > self.top[0]:
+            heapq.heapreplace(self.top, entry)
+
+    def merge(self, other: 'FinancialAccumulator') -> None:
+        """Combine with the aggregate of the records that follow this one's."""
+        self.total_revenue += other.total_revenue
+        self.total_paid += other.total_paid
+        self.paid_count += other.paid_count
+        for method, amount in other.payment_methods.items():
+            self.payment_methods[method] = self.payment_methods.get(method, 0.0) + amount
+        for amount, neg_index, trip_id in other.top:
+            self._push((amount, neg_index - self.count, trip_id))
+        self.count += other.count
+
+    def top_trip_ids(self) -> List[str]:
+        return [trip_id for _, _, trip_id in sorted(self.top, reverse=True)]
+
+    def result(self, trip_names: Dict[str, str]) -> Dict[str, Any]:
+        """Final summary, in the same shape as financial_summary()."""
+        return {
+            'total_revenue': self.total_revenue,
+            'total_paid': self.total_paid,
+            'total_outstanding': self.total_revenue - self.total_paid,
+            'paid_count': self.paid_count,
+            'pending_count': self.count - self.paid_count,
+            'payment_methods': list(self.payment_methods.items()),
+            'top_invoices': [(trip_names.get(trip_id, trip_id), amount)
+                             for amount, _, trip_id in sorted(self.top, reverse=True)]
+        }
+
+class TravellerStatisticsAccumulator:
+    """Partial age histogram over traveller records."""
+
+    def __init__(self, reference_date: Optional[datetime] = None, age_edges: Optional[Sequence[int]] = None):
+        self.edges = list(age_edges) if age_edges else AGE_EDGES
+        self.labels = age_labels(self.edges)
+        self.reference = np.datetime64((reference_date or datetime.now()).date(), 'D')
+        self.counts = np.zeros(len(self.labels), dtype=np.int64)
+        self.total = 0
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        birth_dates = np.array([r['date_of_birth'][:10] for r in records], dtype='datetime64[D]')
+        groups = np.digitize(exact_ages(birth_dates, self.reference), self.edges)
+        self.counts += np.bincount(groups, minlength=len(self.labels))
+        self.total += len(records)
+
+    def merge(self, other: 'TravellerStatisticsAccumulator') -> None:
+        self.counts += other.counts
+        self.total += other.total
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'age_groups': list(zip(self.labels, self.counts.tolist())),
+            'total_travellers': self.total
+        }
+
+class AgingAccumulator:
+    """Partial receivables aging over invoice records.
+
+    trip_coordinators maps trip_id to coordinator name, so balances are
+    summed per coordinator as they are read; one row per trip is only kept
+    when per_trip is set.
+    """
+
+    def __init__(self, as_of: Optional[datetime] = None, trip_coordinators: Optional[Dict[str, str]] = None,
+                 per_trip: bool = False):
+        self.as_of = as_of or datetime.now()
+        self.trip_coordinators = trip_coordinators or {}
+        self.totals = np.zeros(len(AGING_LABELS))
+        self.counts = np.zeros(len(AGING_LABELS), dtype=np.int64)
+        self.by_coordinator: Dict[str, np.ndarray] = {}
+        self.by_trip: Optional[Dict[str, np.ndarray]] = {} if per_trip else None
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            balance = record['total_amount'] - sum(p['amount'] for p in record.get('payments', []))
+            if balance <= 0:
+                continue
+            days = max((self.as_of - datetime.fromisoformat(record['issue_date'])).days, 0)
+            bucket = int(np.digitize(days, AGING_EDGES))
+            self.totals[bucket] += balance
+            self.counts[bucket] += 1
+            name = self.trip_coordinators.get(record['trip_id'], 'Unassigned')
+            self.by_coordinator.setdefault(name, np.zeros(len(AGING_LABELS)))[bucket] += balance
+            if self.by_trip is not None:
+                self.by_trip.setdefault(record['trip_id'], np.zeros(len(AGING_LABELS)))[bucket] += balance
+
+    @staticmethod
+    def _merge_rows(mine: Dict[str, np.ndarray], theirs: Dict[str, np.ndarray]) -> None:
+        for key, row in theirs.items():
+            if key in mine:
+                mine[key] += row
+            else:
+                mine[key] = row.copy()
+
+    def merge(self, other: 'AgingAccumulator') -> None:
+        self.totals += other.totals
+        self.counts += other.counts
+        self._merge_rows(self.by_coordinator, other.by_coordinator)
+        if self.by_trip is not None and other.by_trip is not None:
+            self._merge_rows(self.by_trip, other.by_trip)
+
+    def result(self) -> Dict[str, Any]:
+        """Same result as receivables_aging()."""
+        return {
+            'as_of': self.as_of.strftime('%Y-%m-%d'),
+            'total_outstanding': float(self.totals.sum()),
+            'buckets': list(zip(AGING_LABELS, self.totals.tolist())),
+            'invoice_counts': list(zip(AGING_LABELS, self.counts.tolist())),
+            'by_coordinator': [(name, row.tolist()) for name, row in self.by_coordinator.items()]
+        }
+
+class RevenueTrendsAccumulator:
+    """Partial monthly revenue and trip counts over invoice and trip records."""
+
+    def __init__(self):
+        self.monthly_revenue: Dict[str, float] = {}
+        self.monthly_trips: Dict[str, int] = {}
+
+    def update_invoices(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            month = record['issue_date'][:7]
+            self.monthly_revenue[month] = self.monthly_revenue.get(month, 0.0) + record['total_amount']
+
+    def update_trips(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            month = record['start_date'][:7]
+            self.monthly_trips[month] = self.monthly_trips.get(month, 0) + 1
+
+    def merge(self, other: 'RevenueTrendsAccumulator') -> None:
+        for month, revenue in other.monthly_revenue.items():
+            self.monthly_revenue[month] = self.monthly_revenue.get(month, 0.0) + revenue
+        for month, count in other.monthly_trips.items():
+            self.monthly_trips[month] = self.monthly_trips.get(month, 0) + count
+
+    def result(self) -> Dict[str, Any]:
+        months = sorted(self.monthly_revenue)
+        return {
+            'months': months,
+            'revenues': [self.monthly_revenue[month] for month in months],
+            'trip_counts': [self.monthly_trips.get(month, 0) for month in months]
+        }
+
+class OccupancyAccumulator:
+    """Partial daily occupancy over trip records.
+
+    Keeps the difference-array entries as {day: delta}, so memory depends on
+    the number of distinct start/end days, not on the number of trips.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, end: Optional[datetime] = None, active_only: bool = True):
+        self.start = start
+        self.end = end
+        self.active_only = active_only
+        self.trip_deltas: Dict[int, int] = {}
+        self.traveller_deltas: Dict[int, int] = {}
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            if self.active_only and not record.get('is_active', True):
+                continue
+            first = _day_number(datetime.fromisoformat(record['start_date']))
+            end = first + max(record.get('duration_days', 1), 1)
+            travellers = len(record.get('traveller_ids', []))
+            for day, sign in ((first, 1), (end, -1)):
+                self.trip_deltas[day] = self.trip_deltas.get(day, 0) + sign
+                self.traveller_deltas[day] = self.traveller_deltas.get(day, 0) + sign * travellers
+
+    def merge(self, other: 'OccupancyAccumulator') -> None:
+        for mine, theirs in ((self.trip_deltas, other.trip_deltas), (self.traveller_deltas, other.traveller_deltas)):
+            for day, delta in theirs.items():
+                mine[day] = mine.get(day, 0) + delta
+
+    def result(self) -> Dict[str, Any]:
+        """Same result as daily_occupancy()."""
+        days = list(self.trip_deltas)
+        return _occupancy(np.array(days, dtype=np.int64),
+                          np.array([self.trip_deltas[day] for day in days], dtype=float),
+                          np.array([self.traveller_deltas[day] for day in days], dtype=float),
+                          self.start, self.end)
+
+def _user_names() -> Dict[str, str]:
+    import data_manager
+    return {user['user_id']: user['name'] for user in data_manager.iter_json_records(data_manager.USER_FILE)}
+
+def stream_trip_statistics(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """trip_statistics() computed by streaming the trips file in chunks."""
+    import data_manager
+    accumulator = TripStatisticsAccumulator()
+    for chunk in data_manager.iter_record_chunks(data_manager.TRIP_FILE, chunk_size):
+        accumulator.update(chunk)
+    return accumulator.result(_user_names())
+
+def stream_financial_summary(chunk_size: int = DEFAULT_CHUNK_SIZE, top_n: int = 5) -> Dict[str, Any]:
+    """financial_summary() computed by streaming the invoices file in chunks."""
+    import data_manager
+    accumulator = FinancialAccumulator(top_n)
+    for chunk in data_manager.iter_record_chunks(data_manager.INVOICE_FILE, chunk_size):
+        accumulator.update(chunk)
+
+    # Only the names of the top invoices' trips are needed
+    wanted = set(accumulator.top_trip_ids())
+    trip_names = {trip['trip_id']: trip['name']
+                  for trip in data_manager.iter_json_records(data_manager.TRIP_FILE)
+                  if trip['trip_id'] in wanted}
+    return accumulator.result(trip_names)
+
+def stream_traveller_statistics(chunk_size: int = DEFAULT_CHUNK_SIZE, reference_date: Optional[datetime] = None,
+                                age_edges: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """traveller_statistics() computed by streaming the travellers file in chunks."""
+    import data_manager
+    accumulator = TravellerStatisticsAccumulator(reference_date, age_edges)
+    for chunk in data_manager.iter_record_chunks(data_manager.TRAVELLER_FILE, chunk_size):
+        accumulator.update(chunk)
+    return accumulator.result()
+
+def stream_revenue_trends(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """revenue_trends() computed by streaming the invoice and trip files in chunks."""
+    import data_manager
+    accumulator = RevenueTrendsAccumulator()
+    for chunk in data_manager.iter_record_chunks(data_manager.INVOICE_FILE, chunk_size):
+        accumulator.update_invoices(chunk)
+    for chunk in data_manager.iter_record_chunks(data_manager.TRIP_FILE, chunk_size):
+        accumulator.update_trips(chunk)
+    return accumulator.result()
+
+def stream_receivables_aging(chunk_size: int = DEFAULT_CHUNK_SIZE, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """receivables_aging() computed by streaming the invoice and trip files in chunks.
+
+    Memory is O(trips), not bounded: each invoice's balance is added to its
+    coordinator's row through a trip_id -> coordinator map built first. The
+    map's values are the shared name strings from user_names.
+    """
+    import data_manager
+    user_names = _user_names()
+    trip_coordinators = {}
+    for chunk in data_manager.iter_record_chunks(data_manager.TRIP_FILE, chunk_size):
+        for record in chunk:
+            trip_coordinators[record['trip_id']] = user_names.get(record.get('coordinator_id'), 'Unassigned')
+
+    accumulator = AgingAccumulator(as_of, trip_coordinators)
+    for chunk in data_manager.iter_record_chunks(data_manager.INVOICE_FILE, chunk_size):
+        accumulator.update(chunk)
+    return accumulator.result()
+
+def stream_daily_occupancy(chunk_size: int = DEFAULT_CHUNK_SIZE, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None, active_only: bool = True) -> Dict[str, Any]:
+    """daily_occupancy() computed by streaming the trips file in chunks."""
+    import data_manager
+    accumulator = OccupancyAccumulator(start, end, active_only)
+    for chunk in data_manager.iter_record_chunks(data_manager.TRIP_FILE, chunk_size):
+        accumulator.update(chunk)
+    return accumulator.result()
+
+print("Report Data module loaded successfully.")
@@ -0,0 +1,157 @@
+# FILE: report_export.py
+# Machine-readable (CSV / JSON) outputs of the report aggregates.
+# This module never imports matplotlib, so it is cheap to run from cron:
+#     python report_export.py --reports all --formats csv json
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import leaderboard
+import report_data
+
+EXPORT_DIR = os.path.join("reports", "data")
+EXPORT_FORMATS = ('csv', 'json')
+CSV_HEADER = ['section', 'label', 'value']
+
+def _pair_rows(data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """Flatten scalars, dicts and [label, value] lists into (section, label, value) rows."""
+    for section, value in data.items():
+        if isinstance(value, dict):
+            for label, item in value.items():
+                yield section, label, item
+        elif isinstance(value, (list, tuple)):
+            for label, item in value:
+                yield section, label, item
+        else:
+            yield section, '', value
+
+def _revenue_trend_rows(data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """One row per period and series (blank where a series has no value)."""
+    periods = data.get('periods', data.get('months'))
+    for section, key in (('revenue', 'revenues'), ('trip_count', 'trip_counts'),
+                         ('rolling', 'rolling'), ('previous_year', 'previous_year')):
+        for period, value in zip(periods, data.get(key, [])):
+            yield section, period, '' if value is None else value
+
+def _traveller_rows(data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """Age groups, total, then one row per trip and age group."""
+    for label, count in data['age_groups']:
+        yield 'age_groups', label, count
+    yield 'total_travellers', '', data['total_travellers']
+    labels = [label for label, _ in data['age_groups']]
+    for trip_name, counts in data.get('per_trip', []):
+        for label, count in zip(labels, counts):
+            yield f"per_trip:{trip_name}", label, count
+
+def _aging_rows(data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """Bucket totals and counts, then one row per coordinator and bucket."""
+    yield 'as_of', '', data['as_of']
+    yield 'total_outstanding', '', data['total_outstanding']
+    for label, amount in data['buckets']:
+        yield 'outstanding', label, amount
+    for label, count in data['invoice_counts']:
+        yield 'invoice_count', label, count
+    labels = [label for label, _ in data['buckets']]
+    for name, row in data['by_coordinator']:
+        for label, amount in zip(labels, row):
+            yield f"coordinator:{name}", label, amount
+
+def _occupancy_rows(data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """Peak figures, then one row per day and series."""
+    for key in ('peak_day', 'peak_travellers', 'peak_trips'):
+        yield key, '', '' if data[key] is None else data[key]
+    for day, travellers, trips in zip(data['days'], data['travellers'], data['trips']):
+        yield 'travellers', day, travellers
+        yield 'trips', day, trips
+
+# How each report kind is flattened into CSV rows
+ROW_BUILDERS = {
+    'trip_stats': _pair_rows,
+    'financial_summary': _pair_rows,
+    'traveller_stats': _traveller_rows,
+    'revenue_trends': _revenue_trend_rows,
+    'receivables_aging': _aging_rows,
+    'daily_occupancy': _occupancy_rows
+}
+
+# Aggregates computed by streaming the data files, without model objects. Memory
+# does not grow with the number of records, except for receivables_aging and
+# leaderboards, which hold a small entry per trip (see their stream functions).
+STREAMED_REPORTS = {
+    'trip_stats': report_data.stream_trip_statistics,
+    'financial_summary': report_data.stream_financial_summary,
+    'traveller_stats': report_data.stream_traveller_statistics,
+    'revenue_trends': report_data.stream_revenue_trends,
+    'leaderboards': leaderboard.stream_leaderboards,
+    'receivables_aging': report_data.stream_receivables_aging,
+    'daily_occupancy': report_data.stream_daily_occupancy
+}
+
+def report_rows(kind: str, data: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """The (section, label, value) rows of a report's aggregates."""
+    return ROW_BUILDERS.get(kind, _pair_rows)(data)
+
+def export_report(kind: str, data: Dict[str, Any], fmt: str, output_dir: Optional[str] = None) -> str:
+    """Write a report's aggregates as CSV or JSON and return the file path.
+
+    Rows are written as they are produced and the file is renamed into place
+    when complete, so readers never see a partial export.
+    """
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}.")
+
+    output_dir = output_dir or EXPORT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f"{kind}.{fmt}")
+    temp_path = filepath + ".tmp"
+
+    with open(temp_path, 'w', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for row in report_rows(kind, data):
+                writer.writerow(row)
+        else:
+            document = {'report': kind, 'generated_at': datetime.now().isoformat(), 'data': data}
+            json.dump(document, f, indent=2)
+    os.replace(temp_path, filepath)
+    return filepath
+
+def export_reports(kinds: List[str], formats: List[str], output_dir: Optional[str] = None,
+                   chunk_size: int = report_data.DEFAULT_CHUNK_SIZE) -> List[str]:
+    """Compute the given reports by streaming the data files and export each in every format."""
+    written = []
+    for kind in kinds:
+        data = STREAMED_REPORTS[kind](chunk_size=chunk_size)
+        for fmt in formats:
+            written.append(export_report(kind, data, fmt, output_dir))
+    return written
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export report aggregates as CSV/JSON without rendering charts.")
+    parser.add_argument('--reports', nargs='+', default=['all'],
+                        choices=['all'] + list(STREAMED_REPORTS), help="reports to export (default: all)")
+    parser.add_argument('--formats', nargs='+', default=list(EXPORT_FORMATS),
+                        choices=EXPORT_FORMATS, help="output formats (default: csv json)")
+    parser.add_argument('--output-dir', default=EXPORT_DIR, help=f"directory for the files (default: {EXPORT_DIR})")
+    parser.add_argument('--chunk-size', type=int, default=report_data.DEFAULT_CHUNK_SIZE,
+                        help="records processed per chunk")
+    args = parser.parse_args(argv)
+
+    kinds = list(STREAMED_REPORTS) if 'all' in args.reports else args.reports
+    try:
+        for path in export_reports(kinds, args.formats, args.output_dir, args.chunk_size):
+            print(path)
+    except (OSError, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
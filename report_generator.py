@@ -1,294 +1,964 @@
 # FILE: report_generator.py
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import math
 import os
+import re
+import json
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Tuple
-from collections import defaultdict
-import numpy as np
+from typing import Dict, List, Tuple, Callable, Optional, Sequence
+import leaderboard
+import report_data
+import report_export
+
+class RenderOptions:
+    """Output settings accepted by every ReportGenerator method."""
+    FORMATS = ('png', 'svg', 'pdf')
+    RASTER_FORMATS = ('png',)
+    THUMBNAIL_DPI = 40
+    MIN_DPI = 50
+
+    def __init__(self, fmt: str = 'png', dpi: int = 300, figsize: Optional[Tuple[float, float]] = None,
+                 thumbnail: bool = False, max_bytes: Optional[int] = None):
+        fmt = fmt.lower()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported report format '{fmt}'. Choose from: {', '.join(self.FORMATS)}.")
+        if dpi <= 0:
+            raise ValueError("DPI must be a positive number.")
+
+        # Thumbnails are always small rasters, whatever format was requested
+        if thumbnail:
+            fmt = 'png'
+            dpi = self.THUMBNAIL_DPI
+
+        self.fmt = fmt
+        self.dpi = dpi
+        self.figsize = tuple(figsize) if figsize else None
+        self.thumbnail = thumbnail
+        self.max_bytes = max_bytes
+
+    def resolve_figsize(self, default: Tuple[float, float]) -> Tuple[float, float]:
+        """Return the requested figure size, or the report's own default."""
+        return self.figsize or default
+
+    def cache_key(self) -> dict:
+        """Settings that change the output file (part of the report fingerprint)."""
+        return {'format': self.fmt, 'dpi': self.dpi, 'figsize': self.figsize,
+                'thumbnail': self.thumbnail, 'max_bytes': self.max_bytes}
+
+    def __repr__(self):
+        return (f"RenderOptions(fmt={self.fmt!r}, dpi={self.dpi}, figsize={self.figsize}, "
+                f"thumbnail={self.thumbnail}, max_bytes={self.max_bytes})")
+
+def _update_pie(wedges, texts, autotexts, values: Sequence[float], labels: Sequence[str],
+                startangle: float = 90, labeldistance: float = 1.1, pctdistance: float = 0.6) -> None:
+    """Move existing pie wedges and labels to new values, the way Axes.pie() lays them out."""
+    total = float(sum(values))
+    theta1 = startangle
+    for wedge, text, autotext, value, label in zip(wedges, texts, autotexts, values, labels):
+        fraction = value / total if total else 0.0
+        theta2 = theta1 + 360 * fraction
+        wedge.set_theta1(theta1)
+        wedge.set_theta2(theta2)
+        middle = math.radians((theta1 + theta2) / 2)
+        x, y = math.cos(middle), math.sin(middle)
+        text.set_position((labeldistance * x, labeldistance * y))
+        text.set_horizontalalignment('left' if x > 0 else 'right')
+        text.set_text(label)
+        autotext.set_position((pctdistance * x, pctdistance * y))
+        autotext.set_text(f'{100 * fraction:.1f}%')
+        theta1 = theta2
+
+def _rescale(ax) -> None:
+    """Refit an axes' data limits after its artists changed."""
+    ax.relim()
+    ax.autoscale_view()
+
+class FigureTemplate(ABC):
+    """A report figure whose layout is built once and refilled for each dataset.
+
+    build() creates the axes, titles, fonts and placeholder artists for one
+    data shape (e.g. the number of bars); fill() only changes artist data
+    such as bar heights, wedge angles, line data and label text. Templates
+    draw on their own Figure rather than pyplot's global state, so they are
+    kept open and reused without taking ReportGenerator's pyplot lock. A
+    template is not thread-safe by itself: ReportGenerator keeps a separate
+    set of templates for each thread.
+    """
+
+    def __init__(self, figsize: Tuple[float, float], data: dict):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.build(data)
+
+    @staticmethod
+    def shape(data: dict) -> Optional[tuple]:
+        """Layout-determining properties of the data; None when the data needs a one-off figure."""
+        return ()
+
+    @abstractmethod
+    def build(self, data: dict) -> None:
+        """Create the figure's axes and placeholder artists for data's shape."""
+
+    @abstractmethod
+    def fill(self, data: dict) -> None:
+        """Set the artists' data and labels from data."""
+
+    def update(self, data: dict) -> None:
+        """Show a new dataset of the same shape."""
+        self.fill(data)
+        # Tick labels change with the data, so the spacing is refitted. Start
+        # from the default positions so the result does not depend on the
+        # previous dataset.
+        self.figure.subplotpars.reset()
+        self.figure.subplots_adjust()
+        self.figure.tight_layout()
+
+    def savefig(self, path: str, fmt: str, dpi: int) -> None:
+        # Same arguments as the fresh-figure path: both write to the same cache file name
+        self.figure.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+
+class TripStatisticsTemplate(FigureTemplate):
+    """Template for ReportGenerator._draw_trip_statistics."""
+
+    @staticmethod
+    def shape(data: dict) -> Optional[tuple]:
+        return (len(data['coordinators']),)
+
+    def build(self, data: dict) -> None:
+        self.ax1, self.ax2 = self.figure.subplots(1, 2)
+        n = len(data['coordinators'])
+
+        self.bars = self.ax1.bar(range(n), [0] * n, color='steelblue')
+        self.bar_labels = [self.ax1.text(i, 0, '', ha='center', va='bottom') for i in range(n)]
+        self.ax1.set_title('Trips per Coordinator', fontsize=14, fontweight='bold')
+        self.ax1.set_xlabel('Coordinator', fontsize=12)
+        self.ax1.set_ylabel('Number of Trips', fontsize=12)
+        self.ax1.set_xticks(range(n))
+
+        self.wedges, self.pie_labels, self.pie_pcts = self.ax2.pie(
+            [1, 1], labels=['', ''], autopct='%1.1f%%', colors=['#66c2a5', '#fc8d62'], startangle=90)
+        self.ax2.set_title('Trip Status Distribution', fontsize=14, fontweight='bold')
+
+    def fill(self, data: dict) -> None:
+        names = [name for name, _ in data['coordinators']]
+        for bar, label, (_, count) in zip(self.bars, self.bar_labels, data['coordinators']):
+            bar.set_height(count)
+            label.set_position((bar.get_x() + bar.get_width() / 2., count))
+            label.set_text(f'{int(count)}')
+        self.ax1.set_xticklabels(names, rotation=45)
+        _rescale(self.ax1)
+
+        active, inactive = data['active'], data['inactive']
+        _update_pie(self.wedges, self.pie_labels, self.pie_pcts, [active, inactive],
+                    [f'Active ({active})', f'Inactive ({inactive})'])
+
+class FinancialSummaryTemplate(FigureTemplate):
+    """Template for ReportGenerator._draw_financial_summary."""
+
+    @staticmethod
+    def shape(data: dict) -> Optional[tuple]:
+        return (len(data['payment_methods']), len(data['top_invoices']))
+
+    def _build_barh(self, ax, n: int, color: str, title: str, empty_text: str):
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        if not n:
+            ax.text(0.5, 0.5, empty_text, ha='center', va='center', transform=ax.transAxes)
+            return [], []
+        bars = ax.barh(range(n), [0] * n, color=color)
+        labels = [ax.text(0, i, '', va='center') for i in range(n)]
+        ax.set_xlabel('Amount (£)', fontsize=12)
+        ax.set_yticks(range(n))
+        return bars, labels
+
+    def _update_barh(self, ax, bars, labels, names: Sequence[str], values: Sequence[float]) -> None:
+        for i, (bar, label, value) in enumerate(zip(bars, labels, values)):
+            bar.set_width(value)
+            label.set_position((value, i))
+            label.set_text(f' £{value:.2f}')
+        if bars:
+            ax.set_yticklabels(names)
+            _rescale(ax)
+
+    def build(self, data: dict) -> None:
+        (self.ax1, self.ax2), (self.ax3, self.ax4) = self.figure.subplots(2, 2)
+
+        categories = ['Total Revenue', 'Total Paid', 'Outstanding']
+        self.overview = self.ax1.bar(categories, [0, 0, 0], color=['#8dd3c7', '#80b1d3', '#fb8072'])
+        self.overview_labels = [self.ax1.text(bar.get_x() + bar.get_width() / 2., 0, '', ha='center', va='bottom')
+                                for bar in self.overview]
+        self.ax1.set_title('Financial Overview', fontsize=14, fontweight='bold')
+        self.ax1.set_ylabel('Amount (£)', fontsize=12)
+
+        self.wedges, self.pie_labels, self.pie_pcts = self.ax2.pie(
+            [1, 1], labels=['', ''], autopct='%1.1f%%', colors=['#66c2a5', '#fc8d62'], startangle=90)
+        self.ax2.set_title('Invoice Status', fontsize=14, fontweight='bold')
+
+        self.methods, self.method_labels = self._build_barh(
+            self.ax3, len(data['payment_methods']), 'lightcoral', 'Payment Methods', 'No payment data')
+        self.top, self.top_labels = self._build_barh(
+            self.ax4, len(data['top_invoices']), 'skyblue', 'Top 5 Invoices by Value', 'No invoice data')
+
+    def fill(self, data: dict) -> None:
+        values = [data['total_revenue'], data['total_paid'], data['total_outstanding']]
+        for bar, label, value in zip(self.overview, self.overview_labels, values):
+            bar.set_height(value)
+            label.set_position((bar.get_x() + bar.get_width() / 2., value))
+            label.set_text(f'£{value:.2f}')
+        _rescale(self.ax1)
+
+        paid, pending = data['paid_count'], data['pending_count']
+        _update_pie(self.wedges, self.pie_labels, self.pie_pcts, [paid, pending],
+                    [f'Paid ({paid})', f'Pending ({pending})'])
+
+        self._update_barh(self.ax3, self.methods, self.method_labels,
+                          [method for method, _ in data['payment_methods']],
+                          [amount for _, amount in data['payment_methods']])
+        self._update_barh(self.ax4, self.top, self.top_labels,
+                          [f"{name[:20]}..." if len(name) > 20 else name for name, _ in data['top_invoices']],
+                          [amount for _, amount in data['top_invoices']])
+
+class TravellerStatisticsTemplate(FigureTemplate):
+    """Template for ReportGenerator._draw_traveller_statistics (without the per-trip panel)."""
+
+    @staticmethod
+    def shape(data: dict) -> Optional[tuple]:
+        if data.get('per_trip'):
+            return None
+        return tuple(group for group, _ in data['age_groups'])
+
+    def build(self, data: dict) -> None:
+        self.ax1, self.ax2 = self.figure.subplots(1, 2)
+        groups = [group for group, _ in data['age_groups']]
+        palette = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3']
+
+        self.bars = self.ax1.bar(groups, [0] * len(groups), color=[palette[i % len(palette)] for i in range(len(groups))])
+        self.bar_labels = [self.ax1.text(bar.get_x() + bar.get_width() / 2., 0, '', ha='center', va='bottom')
+                           for bar in self.bars]
+        self.ax1.set_title('Traveller Age Distribution', fontsize=14, fontweight='bold')
+        self.ax1.set_xlabel('Age Group', fontsize=12)
+        self.ax1.set_ylabel('Number of Travellers', fontsize=12)
+
+        self.ax2.text(0.5, 0.6, 'Total Travellers', ha='center', va='center',
+                      fontsize=16, fontweight='bold', transform=self.ax2.transAxes)
+        self.total = self.ax2.text(0.5, 0.4, '', ha='center', va='center', fontsize=48,
+                                   fontweight='bold', color='steelblue', transform=self.ax2.transAxes)
+        self.ax2.axis('off')
+
+    def fill(self, data: dict) -> None:
+        for bar, label, (_, count) in zip(self.bars, self.bar_labels, data['age_groups']):
+            bar.set_height(count)
+            label.set_position((bar.get_x() + bar.get_width() / 2., count))
+            label.set_text(f'{int(count)}')
+        _rescale(self.ax1)
+        self.total.set_text(f"{data['total_travellers']}")
+
+class RevenueTrendsTemplate(FigureTemplate):
+    """Template for ReportGenerator._draw_revenue_trends."""
+
+    ADJECTIVES = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly', 'quarter': 'Quarterly'}
+
+    @staticmethod
+    def shape(data: dict) -> Optional[tuple]:
+        periods = data.get('periods', data.get('months'))
+        return (len(periods), data.get('granularity', 'month'), data.get('window'), 'previous_year' in data)
+
+    def build(self, data: dict) -> None:
+        self.ax1, self.ax2 = self.figure.subplots(2, 1)
+        n, granularity, window, previous_year = self.shape(data)
+        positions = range(n)
+        zeros = [0.0] * n
+        self.annotate = n <= 24
+        self.label_every = max(1, n // 24)
+
+        self.line, = self.ax1.plot(positions, zeros, marker='o' if self.annotate else None, linewidth=2,
+                                   color='steelblue', markersize=8, label='Revenue')
+        self.area = None
+        self.rolling = self.previous = None
+        if window:
+            self.rolling, = self.ax1.plot(positions, zeros, linewidth=2, color='darkorange',
+                                          label=f"Rolling {window}-{granularity} total")
+        if previous_year:
+            self.previous, = self.ax1.plot(positions, zeros, linewidth=1.5, linestyle='--',
+                                           color='grey', label='Previous year')
+        self.ax1.set_title(f'{self.ADJECTIVES[granularity]} Revenue Trend', fontsize=14, fontweight='bold')
+        self.ax1.set_xlabel(granularity.capitalize(), fontsize=12)
+        self.ax1.set_ylabel('Revenue (£)', fontsize=12)
+        self.ax1.grid(True, alpha=0.3)
+        if window or previous_year:
+            self.ax1.legend()
+
+        self.bars = self.ax2.bar(positions, zeros, color='lightcoral', alpha=0.7)
+        self.ax2.set_title(f'Trip Count per {granularity.capitalize()}', fontsize=14, fontweight='bold')
+        self.ax2.set_xlabel(granularity.capitalize(), fontsize=12)
+        self.ax2.set_ylabel('Number of Trips', fontsize=12)
+        self.ax2.grid(True, alpha=0.3, axis='y')
+
+        self.revenue_labels = [self.ax1.text(i, 0, '', ha='center', va='bottom') for i in positions] \
+            if self.annotate else []
+        self.trip_labels = [self.ax2.text(i, 0, '', ha='center', va='bottom') for i in positions] \
+            if self.annotate else []
+        for ax in (self.ax1, self.ax2):
+            ax.set_xticks(list(positions)[::self.label_every])
+
+    def fill(self, data: dict) -> None:
+        periods = data.get('periods', data.get('months'))
+        revenues = data['revenues']
+        positions = range(len(periods))
+
+        self.line.set_ydata(revenues)
+        if self.area is not None:
+            self.area.remove()
+        self.area = self.ax1.fill_between(positions, revenues, alpha=0.3, color='steelblue')
+        if self.rolling is not None:
+            self.rolling.set_ydata(data['rolling'])
+        if self.previous is not None:
+            self.previous.set_ydata([float('nan') if v is None else v for v in data['previous_year']])
+        for i, (label, v) in enumerate(zip(self.revenue_labels, revenues)):
+            label.set_position((i, v))
+            label.set_text(f'£{v:.0f}')
+
+        for i, (bar, label, v) in enumerate(zip(self.bars, self.trip_labels or [None] * len(self.bars),
+                                                data['trip_counts'])):
+            bar.set_height(v)
+            if label is not None:
+                label.set_position((i, v))
+                label.set_text(f'{int(v)}')
+
+        for ax in (self.ax1, self.ax2):
+            ax.set_xticklabels(periods[::self.label_every], rotation=45, ha='right')
+            _rescale(ax)
 
 class ReportGenerator:
     REPORTS_DIR = "reports"
-    
+
+    # Limits for the reports cache. Least recently used files are removed first.
+    CACHE_MAX_BYTES = 200 * 1024 * 1024
+    CACHE_MAX_AGE_DAYS = 30
+
+    # Per-trip breakdowns show at most this many trips
+    MAX_TRIPS_SHOWN = 10
+
+    # Default figure size per report kind (inches)
+    FIGSIZES = {
+        'trip_stats': (14, 6),
+        'financial_summary': (14, 10),
+        'traveller_stats': (14, 6),
+        'revenue_trends': (12, 10),
+        'leaderboards': (14, 10),
+        'receivables_aging': (14, 6),
+        'daily_occupancy': (14, 8)
+    }
+
+    # Reusable figure layouts per report kind (see FigureTemplate); other kinds draw a fresh figure
+    TEMPLATES = {
+        'trip_stats': TripStatisticsTemplate,
+        'financial_summary': FinancialSummaryTemplate,
+        'traveller_stats': TravellerStatisticsTemplate,
+        'revenue_trends': RevenueTrendsTemplate
+    }
+    USE_TEMPLATES = True
+    TEMPLATE_CACHE_SIZE = 16
+    # Templates are per thread (see _thread_templates), so concurrent renders never draw on the same Figure
+    _template_local = threading.local()
+    # pyplot has one current figure per process, so fresh figures are drawn one at a time
+    _pyplot_lock = threading.Lock()
+
+    @staticmethod
+    def _thread_templates() -> Dict[tuple, FigureTemplate]:
+        """This thread's template cache, least recently used first."""
+        local = ReportGenerator._template_local
+        if not hasattr(local, 'templates'):
+            local.templates = {}
+        return local.templates
+
+    @staticmethod
+    def _template_for(kind: str, data: dict, figsize: Tuple[float, float]) -> Optional[FigureTemplate]:
+        """This thread's cached template for this kind, size and data shape, built on first use."""
+        template_class = ReportGenerator.TEMPLATES.get(kind)
+        if not ReportGenerator.USE_TEMPLATES or template_class is None:
+            return None
+        shape = template_class.shape(data)
+        if shape is None:
+            return None
+
+        key = (kind, tuple(figsize), shape)
+        templates = ReportGenerator._thread_templates()
+        template = templates.pop(key, None)
+        if template is None:
+            template = template_class(figsize, data)
+            if len(templates) >= ReportGenerator.TEMPLATE_CACHE_SIZE:
+                # Evict the least recently used layout
+                templates.pop(next(iter(templates)))
+        templates[key] = template
+        return template
+
     @staticmethod
     def _ensure_reports_dir():
         """Ensure reports directory exists."""
         os.makedirs(ReportGenerator.REPORTS_DIR, exist_ok=True)
-    
+
+    @staticmethod
+    def _fingerprint(kind: str, data: dict, options: dict) -> str:
+        """Content hash of the values a report draws plus its rendering options."""
+        payload = json.dumps({'kind': kind, 'data': data, 'options': options},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _render(kind: str, data: dict, draw: Callable[[dict, Tuple[float, float]], None],
+                options: Optional[RenderOptions] = None, data_formats: Sequence[str] = (),
+                output_dir: Optional[str] = None) -> Tuple[bool, str]:
+        """Return the cached report for this data, rendering it only on a cache miss.
+
+        Any data_formats ('csv', 'json') are written to <dir>/data alongside the chart.
+        output_dir replaces REPORTS_DIR for this call only; files written there
+        are not pruned, their owner (e.g. a report pack) manages them.
+        """
+        reports_dir = output_dir or ReportGenerator.REPORTS_DIR
+        os.makedirs(reports_dir, exist_ok=True)
+        for fmt in data_formats:
+            report_export.export_report(kind, data, fmt, os.path.join(reports_dir, "data"))
+        options = options or RenderOptions()
+        figsize = options.resolve_figsize(ReportGenerator.FIGSIZES[kind])
+        key = dict(options.cache_key(), figsize=figsize)
+        fingerprint = ReportGenerator._fingerprint(kind, data, key)
+        suffix = "_thumb" if options.thumbnail else ""
+        filename = f"{kind}_{fingerprint[:16]}{suffix}.{options.fmt}"
+        filepath = os.path.join(reports_dir, filename)
+
+        if os.path.exists(filepath):
+            # Cache hit: mark as recently used so pruning keeps it
+            os.utime(filepath, None)
+            return True, filepath
+
+        template = ReportGenerator._template_for(kind, data, figsize)
+        with nullcontext() if template is not None else ReportGenerator._pyplot_lock:
+            if template is not None:
+                template.update(data)
+                savefig = template.savefig
+            else:
+                draw(data, figsize)
+                savefig = lambda path, fmt, dpi: plt.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+
+            # Write to a temporary name first so an interrupted render never
+            # leaves a truncated file that would later count as a cache hit.
+            # Each thread uses its own name, as two threads may render the same report.
+            temp_path = f"{filepath}.{threading.get_ident()}.tmp"
+            try:
+                dpi = options.dpi
+                while True:
+                    savefig(temp_path, options.fmt, dpi)
+                    # Step the resolution down until a raster output fits the size budget
+                    if (not options.max_bytes or options.fmt not in RenderOptions.RASTER_FORMATS
+                            or os.path.getsize(temp_path) <= options.max_bytes or dpi <= RenderOptions.MIN_DPI):
+                        break
+                    dpi = max(RenderOptions.MIN_DPI, int(dpi * 0.7))
+            finally:
+                if template is None:
+                    plt.close()
+        os.replace(temp_path, filepath)
+
+        if output_dir is None:
+            ReportGenerator.prune_reports_dir(keep=filepath)
+        return True, filepath
+
+    @staticmethod
+    def _is_cache_file(name: str) -> bool:
+        """True for chart names written by _render: <kind>_<fingerprint>[_thumb].<ext>."""
+        match = re.fullmatch(r'(\w+?)_[0-9a-f]{16}(?:_thumb)?\.(\w+)', name)
+        return bool(match) and match.group(1) in ReportGenerator.FIGSIZES \
+            and match.group(2) in RenderOptions.FORMATS
+
+    @staticmethod
+    def prune_reports_dir(max_bytes: Optional[int] = None, max_age_days: Optional[float] = None,
+                          keep: Optional[str] = None) -> int:
+        """Remove expired and least recently used reports. Returns number of files removed.
+
+        Only cached charts at the top of REPORTS_DIR count; exports in data/,
+        the dashboard and coordinator packs in subdirectories are left alone.
+        """
+        if max_bytes is None:
+            max_bytes = ReportGenerator.CACHE_MAX_BYTES
+        if max_age_days is None:
+            max_age_days = ReportGenerator.CACHE_MAX_AGE_DAYS
+
+        files = []
+        try:
+            entries = list(os.scandir(ReportGenerator.REPORTS_DIR))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not ReportGenerator._is_cache_file(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        removed = 0
+        cutoff = time.time() - max_age_days * 86400
+        files.sort()
+        total_size = sum(size for _, size, _ in files)
+
+        for mtime, size, path in files:
+            if mtime >= cutoff and total_size <= max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+        return removed
+
+    @staticmethod
+    def render_report(kind: str, data: dict, options: Optional[RenderOptions] = None,
+                      data_formats: Sequence[str] = (), output_dir: Optional[str] = None) -> Tuple[bool, str]:
+        """Render a report from precomputed aggregates, e.g. from report_data.stream_*()."""
+        drawers = {
+            'trip_stats': ReportGenerator._draw_trip_statistics,
+            'financial_summary': ReportGenerator._draw_financial_summary,
+            'traveller_stats': ReportGenerator._draw_traveller_statistics,
+            'revenue_trends': ReportGenerator._draw_revenue_trends,
+            'leaderboards': ReportGenerator._draw_leaderboards,
+            'receivables_aging': ReportGenerator._draw_receivables_aging,
+            'daily_occupancy': ReportGenerator._draw_daily_occupancy
+        }
+        if kind not in drawers:
+            return False, f"Unknown report type '{kind}'."
+        # Aggregates have no records to count, so each kind is checked on the values it draws
+        empty_checks = {
+            'trip_stats': (lambda d: not d['coordinators'], "No coordinator data available."),
+            'financial_summary': (lambda d: not d['paid_count'] + d['pending_count'], "No invoice data available."),
+            'traveller_stats': (lambda d: not d['total_travellers'], "No traveller data available."),
+            'revenue_trends': (lambda d: not d['revenues'], "No invoice data available for trends."),
+            'leaderboards': (lambda d: not any(d.values()), "No trip or invoice data available."),
+            'receivables_aging': (lambda d: not any(count for _, count in d['invoice_counts']),
+                                  "No outstanding invoices."),
+            'daily_occupancy': (lambda d: not d['days'], "No trip data available for occupancy.")
+        }
+        is_empty, message = empty_checks[kind]
+        if is_empty(data):
+            return False, message
+        return ReportGenerator._render(kind, data, drawers[kind], options, data_formats, output_dir)
+
     @staticmethod
-    def generate_trip_statistics(trips: List) -> Tuple[bool, str]:
+    def generate_trip_statistics(trips: List, options: Optional[RenderOptions] = None,
+                                 data_formats: Sequence[str] = ()) -> Tuple[bool, str]:
         """Generate trip statistics report with bar chart."""
-        ReportGenerator._ensure_reports_dir()
-        
         if not trips:
             return False, "No trip data available for statistics."
-        
-        # Group trips by coordinator
-        coordinators = {}
-        active_trips = 0
-        inactive_trips = 0
-        
-        for trip in trips:
-            if trip.coordinator:
-                coord_name = trip.coordinator.name
-                coordinators[coord_name] = coordinators.get(coord_name, 0) + 1
-            
-            if trip.is_active:
-                active_trips += 1
-            else:
-                inactive_trips += 1
-        
-        if not coordinators:
+
+        data = report_data.trip_statistics(trips)
+        if not data['coordinators']:
             return False, "No coordinator data available."
-        
+
+        return ReportGenerator._render('trip_stats', data, ReportGenerator._draw_trip_statistics, options, data_formats)
+
+    @staticmethod
+    def _draw_trip_statistics(data: dict, figsize: Tuple[float, float]) -> None:
+        coordinators = dict(data['coordinators'])
+        active_trips = data['active']
+        inactive_trips = data['inactive']
+
         # Create figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-        
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+
         # First subplot: Trips per Coordinator
         bars = ax1.bar(coordinators.keys(), coordinators.values(), color='steelblue')
         ax1.set_title('Trips per Coordinator', fontsize=14, fontweight='bold')
         ax1.set_xlabel('Coordinator', fontsize=12)
         ax1.set_ylabel('Number of Trips', fontsize=12)
         ax1.tick_params(axis='x', rotation=45)
-        
+
         # Add value labels on bars
         for bar in bars:
             height = bar.get_height()
             ax1.text(bar.get_x() + bar.get_width()/2., height,
                     f'{int(height)}', ha='center', va='bottom')
-        
+
         # Second subplot: Active vs Inactive Trips
         pie_data = [active_trips, inactive_trips]
         pie_labels = [f'Active ({active_trips})', f'Inactive ({inactive_trips})']
         colors = ['#66c2a5', '#fc8d62']
-        
+
         ax2.pie(pie_data, labels=pie_labels, autopct='%1.1f%%', colors=colors, startangle=90)
         ax2.set_title('Trip Status Distribution', fontsize=14, fontweight='bold')
-        
+
         plt.tight_layout()
-        
-        filename = f"trip_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(ReportGenerator.REPORTS_DIR, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return True, filepath
-    
+
     @staticmethod
-    def generate_financial_summary(invoices: List) -> Tuple[bool, str]:
+    def generate_financial_summary(invoices: List, options: Optional[RenderOptions] = None,
+                                   data_formats: Sequence[str] = ()) -> Tuple[bool, str]:
         """Generate financial summary report with visualizations."""
-        ReportGenerator._ensure_reports_dir()
-        
         if not invoices:
             return False, "No invoice data available."
-        
-        # Calculate financial metrics
-        total_revenue = sum(inv.total_amount for inv in invoices)
-        total_paid = sum(sum(p.amount for p in inv.payments) for inv in invoices)
-        total_outstanding = total_revenue - total_paid
-        
-        paid_count = sum(1 for inv in invoices if inv.is_fully_paid())
-        pending_count = len(invoices) - paid_count
-        
+
+        data = report_data.financial_summary(invoices)
+        return ReportGenerator._render('financial_summary', data, ReportGenerator._draw_financial_summary, options, data_formats)
+
+    @staticmethod
+    def _draw_financial_summary(data: dict, figsize: Tuple[float, float]) -> None:
+        total_revenue = data['total_revenue']
+        total_paid = data['total_paid']
+        total_outstanding = data['total_outstanding']
+        paid_count = data['paid_count']
+        pending_count = data['pending_count']
+
         # Create figure with subplots
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(14, 10))
-        
+        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=figsize)
+
         # Subplot 1: Revenue Overview (Bar Chart)
         categories = ['Total Revenue', 'Total Paid', 'Outstanding']
         values = [total_revenue, total_paid, total_outstanding]
         colors = ['#8dd3c7', '#80b1d3', '#fb8072']
-        
+
         bars = ax1.bar(categories, values, color=colors)
         ax1.set_title('Financial Overview', fontsize=14, fontweight='bold')
         ax1.set_ylabel('Amount (£)', fontsize=12)
-        
+
         for bar in bars:
             height = bar.get_height()
             ax1.text(bar.get_x() + bar.get_width()/2., height,
                     f'£{height:.2f}', ha='center', va='bottom')
-        
+
         # Subplot 2: Invoice Status (Pie Chart)
         status_data = [paid_count, pending_count]
         status_labels = [f'Paid ({paid_count})', f'Pending ({pending_count})']
         status_colors = ['#66c2a5', '#fc8d62']
-        
-        ax2.pie(status_data, labels=status_labels, autopct='%1.1f%%', 
+
+        ax2.pie(status_data, labels=status_labels, autopct='%1.1f%%',
                 colors=status_colors, startangle=90)
         ax2.set_title('Invoice Status', fontsize=14, fontweight='bold')
-        
+
         # Subplot 3: Payment Methods Distribution
-        payment_methods = defaultdict(float)
-        for invoice in invoices:
-            for payment in invoice.payments:
-                payment_methods[payment.method] += payment.amount
-        
+        payment_methods = data['payment_methods']
+
         if payment_methods:
-            methods = list(payment_methods.keys())
-            amounts = list(payment_methods.values())
+            methods = [method for method, _ in payment_methods]
+            amounts = [amount for _, amount in payment_methods]
             ax3.barh(methods, amounts, color='lightcoral')
             ax3.set_title('Payment Methods', fontsize=14, fontweight='bold')
             ax3.set_xlabel('Amount (£)', fontsize=12)
-            
+
             for i, v in enumerate(amounts):
                 ax3.text(v, i, f' £{v:.2f}', va='center')
         else:
-            ax3.text(0.5, 0.5, 'No payment data', ha='center', va='center', 
+            ax3.text(0.5, 0.5, 'No payment data', ha='center', va='center',
                     transform=ax3.transAxes)
             ax3.set_title('Payment Methods', fontsize=14, fontweight='bold')
-        
+
         # Subplot 4: Top Invoices by Value
-        sorted_invoices = sorted(invoices, key=lambda x: x.total_amount, reverse=True)[:5]
-        
-        if sorted_invoices:
-            invoice_labels = [f"{inv.trip.name[:20]}..." if len(inv.trip.name) > 20 
-                            else inv.trip.name for inv in sorted_invoices]
-            invoice_amounts = [inv.total_amount for inv in sorted_invoices]
-            
+        top_invoices = data['top_invoices']
+
+        if top_invoices:
+            invoice_labels = [f"{name[:20]}..." if len(name) > 20
+                            else name for name, _ in top_invoices]
+            invoice_amounts = [amount for _, amount in top_invoices]
+
             bars = ax4.barh(invoice_labels, invoice_amounts, color='skyblue')
             ax4.set_title('Top 5 Invoices by Value', fontsize=14, fontweight='bold')
             ax4.set_xlabel('Amount (£)', fontsize=12)
-            
+
             for i, v in enumerate(invoice_amounts):
                 ax4.text(v, i, f' £{v:.2f}', va='center')
         else:
             ax4.text(0.5, 0.5, 'No invoice data', ha='center', va='center',
                     transform=ax4.transAxes)
             ax4.set_title('Top 5 Invoices by Value', fontsize=14, fontweight='bold')
-        
+
         plt.tight_layout()
-        
-        filename = f"financial_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(ReportGenerator.REPORTS_DIR, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return True, filepath
-    
+
     @staticmethod
-    def generate_traveller_statistics(travellers: List) -> Tuple[bool, str]:
-        """Generate traveller statistics report."""
-        ReportGenerator._ensure_reports_dir()
-        
+    def generate_traveller_statistics(travellers: List, options: Optional[RenderOptions] = None,
+                                      data_formats: Sequence[str] = (), reference_date: Optional[datetime] = None,
+                                      age_edges: Optional[Sequence[int]] = None,
+                                      trips: Optional[List] = None) -> Tuple[bool, str]:
+        """Generate traveller statistics report.
+
+        Ages are exact as of reference_date (default: today) and grouped by
+        age_edges. Passing trips adds a per-trip age breakdown at each trip's start date.
+        """
         if not travellers:
             return False, "No traveller data available."
-        
-        # Calculate age distribution
-        current_year = datetime.now().year
-        age_groups = {'0-18': 0, '19-30': 0, '31-50': 0, '51-70': 0, '70+': 0}
-        
-        for traveller in travellers:
-            age = current_year - traveller.date_of_birth.year
-            if age <= 18:
-                age_groups['0-18'] += 1
-            elif age <= 30:
-                age_groups['19-30'] += 1
-            elif age <= 50:
-                age_groups['31-50'] += 1
-            elif age <= 70:
-                age_groups['51-70'] += 1
-            else:
-                age_groups['70+'] += 1
-        
+
+        data = report_data.traveller_statistics(travellers, reference_date, age_edges, trips)
+        return ReportGenerator._render('traveller_stats', data, ReportGenerator._draw_traveller_statistics, options, data_formats)
+
+    @staticmethod
+    def _draw_traveller_statistics(data: dict, figsize: Tuple[float, float]) -> None:
+        per_trip = data.get('per_trip')
+
         # Create figure
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-        
+        if per_trip:
+            fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=figsize,
+                                                gridspec_kw={'width_ratios': [2, 1, 2]})
+        else:
+            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+
         # Subplot 1: Age Distribution
-        groups = list(age_groups.keys())
-        counts = list(age_groups.values())
-        colors = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3']
-        
+        groups = [group for group, _ in data['age_groups']]
+        counts = [count for _, count in data['age_groups']]
+        palette = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3']
+        colors = [palette[i % len(palette)] for i in range(len(groups))]
+
         bars = ax1.bar(groups, counts, color=colors)
         ax1.set_title('Traveller Age Distribution', fontsize=14, fontweight='bold')
         ax1.set_xlabel('Age Group', fontsize=12)
         ax1.set_ylabel('Number of Travellers', fontsize=12)
-        
+
         for bar in bars:
             height = bar.get_height()
             ax1.text(bar.get_x() + bar.get_width()/2., height,
                     f'{int(height)}', ha='center', va='bottom')
-        
+
         # Subplot 2: Total Travellers Overview
-        total_travellers = len(travellers)
+        total_travellers = data['total_travellers']
         ax2.text(0.5, 0.6, f'Total Travellers', ha='center', va='center',
                 fontsize=16, fontweight='bold', transform=ax2.transAxes)
         ax2.text(0.5, 0.4, f'{total_travellers}', ha='center', va='center',
                 fontsize=48, fontweight='bold', color='steelblue',
                 transform=ax2.transAxes)
         ax2.axis('off')
-        
+
+        # Subplot 3: Age groups per trip (the busiest trips only, to stay legible)
+        if per_trip:
+            busiest = sorted(per_trip, key=lambda item: sum(item[1]), reverse=True)[:ReportGenerator.MAX_TRIPS_SHOWN]
+            names = [name[:20] for name, _ in busiest]
+            left = [0] * len(busiest)
+            for g, group in enumerate(groups):
+                widths = [row[g] for _, row in busiest]
+                ax3.barh(names, widths, left=left, color=colors[g], label=group)
+                left = [l + w for l, w in zip(left, widths)]
+            ax3.set_title('Age Groups per Trip', fontsize=14, fontweight='bold')
+            ax3.set_xlabel('Number of Travellers', fontsize=12)
+            ax3.invert_yaxis()
+            ax3.legend(fontsize=9)
+
         plt.tight_layout()
-        
-        filename = f"traveller_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(ReportGenerator.REPORTS_DIR, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return True, filepath
-    
+
     @staticmethod
-    def generate_revenue_trends(invoices: List, trips: List) -> Tuple[bool, str]:
-        """Generate revenue trends report."""
-        ReportGenerator._ensure_reports_dir()
-        
+    def generate_revenue_trends(invoices: List, trips: List, options: Optional[RenderOptions] = None,
+                                data_formats: Sequence[str] = (), granularity: str = 'month',
+                                window: Optional[int] = None, year_over_year: bool = False) -> Tuple[bool, str]:
+        """Generate revenue trends report.
+
+        granularity is one of report_data.GRANULARITIES; window adds a rolling
+        sum over that many buckets and year_over_year overlays the previous year.
+        """
         if not invoices:
             return False, "No invoice data available for trends."
-        
-        # Group invoices by month
-        monthly_revenue = defaultdict(float)
-        monthly_trips = defaultdict(int)
-        
-        for invoice in invoices:
-            month_key = invoice.issue_date.strftime('%Y-%m')
-            monthly_revenue[month_key] += invoice.total_amount
-        
-        for trip in trips:
-            month_key = trip.start_date.strftime('%Y-%m')
-            monthly_trips[month_key] += 1
-        
-        # Sort by date
-        sorted_months = sorted(monthly_revenue.keys())
-        
-        if len(sorted_months) < 2:
-            return False, "Insufficient data for trend analysis (need at least 2 months)."
-        
-        revenues = [monthly_revenue[month] for month in sorted_months]
-        trip_counts = [monthly_trips.get(month, 0) for month in sorted_months]
-        
+
+        try:
+            data = report_data.revenue_series(invoices, trips, granularity, window, year_over_year)
+        except ValueError as e:
+            return False, str(e)
+
+        return ReportGenerator._render('revenue_trends', data, ReportGenerator._draw_revenue_trends, options, data_formats)
+
+    @staticmethod
+    def generate_revenue_trends_from_rollups(rollups: List, options: Optional[RenderOptions] = None,
+                                             data_formats: Sequence[str] = ()) -> Tuple[bool, str]:
+        """Generate the revenue trends report from precomputed monthly rollups."""
+        data = report_data.revenue_trends_from_rollups(rollups)
+        if not data['months']:
+            return False, "No invoice data available for trends."
+
+        return ReportGenerator._render('revenue_trends', data, ReportGenerator._draw_revenue_trends, options, data_formats)
+
+    @staticmethod
+    def _draw_revenue_trends(data: dict, figsize: Tuple[float, float]) -> None:
+        # Series from revenue_series() carry their granularity; rollup/streamed ones are monthly
+        periods = data.get('periods', data.get('months'))
+        granularity = data.get('granularity', 'month')
+        revenues = data['revenues']
+        trip_counts = data['trip_counts']
+        positions = range(len(periods))
+        # Keep labels legible on long daily/weekly series
+        label_every = max(1, len(periods) // 24)
+        annotate = len(periods) <= 24
+
         # Create figure
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-        
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=figsize)
+
         # Subplot 1: Revenue Trend
-        ax1.plot(sorted_months, revenues, marker='o', linewidth=2, 
-                color='steelblue', markersize=8)
-        ax1.fill_between(range(len(sorted_months)), revenues, alpha=0.3, color='steelblue')
-        ax1.set_title('Monthly Revenue Trend', fontsize=14, fontweight='bold')
-        ax1.set_xlabel('Month', fontsize=12)
+        ax1.plot(positions, revenues, marker='o' if annotate else None, linewidth=2,
+                color='steelblue', markersize=8, label='Revenue')
+        ax1.fill_between(positions, revenues, alpha=0.3, color='steelblue')
+        if 'rolling' in data:
+            ax1.plot(positions, data['rolling'], linewidth=2, color='darkorange',
+                    label=f"Rolling {data['window']}-{granularity} total")
+        if 'previous_year' in data:
+            previous = [float('nan') if v is None else v for v in data['previous_year']]
+            ax1.plot(positions, previous, linewidth=1.5, linestyle='--', color='grey', label='Previous year')
+        adjective = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly', 'quarter': 'Quarterly'}[granularity]
+        ax1.set_title(f'{adjective} Revenue Trend', fontsize=14, fontweight='bold')
+        ax1.set_xlabel(granularity.capitalize(), fontsize=12)
         ax1.set_ylabel('Revenue (£)', fontsize=12)
-        ax1.tick_params(axis='x', rotation=45)
         ax1.grid(True, alpha=0.3)
-        
+        if 'rolling' in data or 'previous_year' in data:
+            ax1.legend()
+
         # Add value labels
-        for i, v in enumerate(revenues):
-            ax1.text(i, v, f'£{v:.0f}', ha='center', va='bottom')
-        
+        if annotate:
+            for i, v in enumerate(revenues):
+                ax1.text(i, v, f'£{v:.0f}', ha='center', va='bottom')
+
         # Subplot 2: Trips Trend
-        ax2.bar(sorted_months, trip_counts, color='lightcoral', alpha=0.7)
-        ax2.set_title('Monthly Trip Count', fontsize=14, fontweight='bold')
-        ax2.set_xlabel('Month', fontsize=12)
+        ax2.bar(positions, trip_counts, color='lightcoral', alpha=0.7)
+        ax2.set_title(f'Trip Count per {granularity.capitalize()}', fontsize=14, fontweight='bold')
+        ax2.set_xlabel(granularity.capitalize(), fontsize=12)
         ax2.set_ylabel('Number of Trips', fontsize=12)
-        ax2.tick_params(axis='x', rotation=45)
         ax2.grid(True, alpha=0.3, axis='y')
-        
+
         # Add value labels
-        for i, v in enumerate(trip_counts):
-            ax2.text(i, v, f'{int(v)}', ha='center', va='bottom')
-        
+        if annotate:
+            for i, v in enumerate(trip_counts):
+                ax2.text(i, v, f'{int(v)}', ha='center', va='bottom')
+
+        for ax in (ax1, ax2):
+            ax.set_xticks(list(positions)[::label_every])
+            ax.set_xticklabels(periods[::label_every], rotation=45, ha='right')
+
+        plt.tight_layout()
+
+    @staticmethod
+    def generate_leaderboards(trips: List, invoices: List, options: Optional[RenderOptions] = None,
+                              data_formats: Sequence[str] = (), k: int = leaderboard.DEFAULT_K) -> Tuple[bool, str]:
+        """Generate top-k leaderboards for coordinators, destinations, providers and trips."""
+        if not trips and not invoices:
+            return False, "No trip or invoice data available."
+
+        data = leaderboard.leaderboards(trips, invoices, k)
+        return ReportGenerator._render('leaderboards', data, ReportGenerator._draw_leaderboards, options, data_formats)
+
+    @staticmethod
+    def _draw_leaderboards(data: dict, figsize: Tuple[float, float]) -> None:
+        fig, axes = plt.subplots(2, 2, figsize=figsize)
+        colors = ['steelblue', 'mediumseagreen', 'darkorange', 'lightcoral']
+
+        for ax, color, (board, (title, value_label)) in zip(axes.flat, colors, leaderboard.BOARDS.items()):
+            entries = data.get(board, [])
+            ax.set_title(title, fontsize=14, fontweight='bold')
+
+            if not entries:
+                ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
+                continue
+
+            labels = [f"{name[:20]}..." if len(name) > 20 else name for name, _ in entries]
+            values = [value for _, value in entries]
+            ax.barh(labels, values, color=color)
+            ax.set_xlabel(value_label, fontsize=12)
+            ax.invert_yaxis()
+
+            money = '£' in value_label
+            for i, v in enumerate(values):
+                ax.text(v, i, f' £{v:.2f}' if money else f' {int(v)}', va='center')
+
+        plt.tight_layout()
+
+    @staticmethod
+    def generate_receivables_aging(invoices: List, options: Optional[RenderOptions] = None,
+                                   data_formats: Sequence[str] = (), as_of: Optional[datetime] = None) -> Tuple[bool, str]:
+        """Generate receivables aging report (outstanding balances by days since issue)."""
+        if not invoices:
+            return False, "No invoice data available."
+
+        data = report_data.receivables_aging(invoices, as_of)
+        return ReportGenerator._render('receivables_aging', data, ReportGenerator._draw_receivables_aging,
+                                       options, data_formats)
+
+    @staticmethod
+    def _draw_receivables_aging(data: dict, figsize: Tuple[float, float]) -> None:
+        labels = [label for label, _ in data['buckets']]
+        totals = [amount for _, amount in data['buckets']]
+        counts = [count for _, count in data['invoice_counts']]
+        colors = ['#66c2a5', '#ffd92f', '#fc8d62', '#e31a1c']
+
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+
+        # Subplot 1: Outstanding per aging bucket
+        ax1.bar(labels, totals, color=colors)
+        ax1.set_title(f"Outstanding by Age (as of {data['as_of']})", fontsize=14, fontweight='bold')
+        ax1.set_xlabel('Days Since Issue', fontsize=12)
+        ax1.set_ylabel('Outstanding (£)', fontsize=12)
+        for i, (v, n) in enumerate(zip(totals, counts)):
+            ax1.text(i, v, f'£{v:.2f}\n({n} invoices)', ha='center', va='bottom')
+        ax1.margins(y=0.15)
+
+        # Subplot 2: Per coordinator, stacked by bucket
+        by_coordinator = data['by_coordinator']
+        ax2.set_title('Outstanding by Coordinator', fontsize=14, fontweight='bold')
+        if by_coordinator:
+            names = [name for name, _ in by_coordinator]
+            left = [0.0] * len(names)
+            for b, label in enumerate(labels):
+                widths = [row[b] for _, row in by_coordinator]
+                ax2.barh(names, widths, left=left, color=colors[b], label=label)
+                left = [l + w for l, w in zip(left, widths)]
+            ax2.set_xlabel('Outstanding (£)', fontsize=12)
+            ax2.invert_yaxis()
+            ax2.legend(title='Days', fontsize=9)
+        else:
+            ax2.text(0.5, 0.5, 'Nothing outstanding', ha='center', va='center', transform=ax2.transAxes)
+
+        plt.tight_layout()
+
+    @staticmethod
+    def generate_daily_occupancy(trips: List, options: Optional[RenderOptions] = None,
+                                 data_formats: Sequence[str] = (), start: Optional[datetime] = None,
+                                 end: Optional[datetime] = None, active_only: bool = True) -> Tuple[bool, str]:
+        """Generate daily occupancy report (travellers and trips on the road per day)."""
+        data = report_data.daily_occupancy(trips, start, end, active_only)
+        if not data['days']:
+            return False, "No trip data available for occupancy."
+
+        return ReportGenerator._render('daily_occupancy', data, ReportGenerator._draw_daily_occupancy,
+                                       options, data_formats)
+
+    @staticmethod
+    def _draw_daily_occupancy(data: dict, figsize: Tuple[float, float]) -> None:
+        days = data['days']
+        positions = range(len(days))
+        label_every = max(1, len(days) // 24)
+
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=figsize, sharex=True)
+
+        # Subplot 1: Travellers on the road, with the peak marked
+        ax1.fill_between(positions, data['travellers'], step='mid', alpha=0.4, color='steelblue')
+        ax1.step(positions, data['travellers'], where='mid', color='steelblue', linewidth=1.5)
+        if data['peak_day'] is not None:
+            peak = days.index(data['peak_day'])
+            ax1.annotate(f"Peak: {data['peak_travellers']} on {data['peak_day']}",
+                         xy=(peak, data['peak_travellers']), xytext=(0, 8), textcoords='offset points',
+                         ha='center', fontsize=10)
+            ax1.margins(y=0.15)
+        ax1.set_title(f'Travellers on the Road ({days[0]} to {days[-1]})', fontsize=14, fontweight='bold')
+        ax1.set_ylabel('Travellers', fontsize=12)
+        ax1.grid(True, alpha=0.3)
+
+        # Subplot 2: Active trips in progress
+        ax2.step(positions, data['trips'], where='mid', color='darkorange', linewidth=1.5)
+        ax2.set_title('Trips in Progress', fontsize=14, fontweight='bold')
+        ax2.set_xlabel('Day', fontsize=12)
+        ax2.set_ylabel('Trips', fontsize=12)
+        ax2.grid(True, alpha=0.3)
+        ax2.set_xticks(list(positions)[::label_every])
+        ax2.set_xticklabels(days[::label_every], rotation=45, ha='right')
+
         plt.tight_layout()
-        
-        filename = f"revenue_trends_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(ReportGenerator.REPORTS_DIR, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return True, filepath
 
-print("Report Generator module loaded successfully.")
\ No newline at end of file
+print("Report Generator module loaded successfully.")
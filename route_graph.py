@@ -0,0 +1,267 @@
+# FILE: route_graph.py
+# Route graph built from the legs of every trip. Nodes are normalised
+# locations; each (origin, destination, transport mode) edge keeps the costs
+# of the legs observed for it, so queries can use the cheapest or the median
+# known price. cheapest_route() runs Dijkstra over the graph, optionally
+# restricted to some transport modes. The shared graph follows trip saves
+# and deletes through a data_manager trip listener instead of being rebuilt,
+# and is rebuilt only when another process has changed the trips file.
+# Queries that may run alongside saves (e.g. from server threads) go through
+# shared_route_graph(), which holds off saves while the block runs.
+
+import bisect
+import heapq
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROUTE_WEIGHTS = ('min', 'median')
+
+# Cached query results per graph; the cache is cleared whenever an edge changes
+ROUTE_CACHE_SIZE = 1024
+
+def normalise_location(name: str) -> str:
+    """Node key for a location: case-insensitive, with runs of whitespace collapsed."""
+    return ' '.join(str(name).split()).casefold()
+
+def _mode_value(mode) -> str:
+    return getattr(mode, 'value', mode)
+
+class EdgeStats:
+    """Observed legs for one (origin, destination, mode) edge."""
+
+    __slots__ = ('costs', 'providers')
+
+    def __init__(self):
+        self.costs: List[float] = []
+        self.providers: Dict[str, int] = {}
+
+    def add(self, cost: float, provider: str) -> None:
+        bisect.insort(self.costs, cost)
+        self.providers[provider] = self.providers.get(provider, 0) + 1
+
+    def remove(self, cost: float, provider: str) -> bool:
+        """Forget one observed leg; returns False if it was not recorded."""
+        index = bisect.bisect_left(self.costs, cost)
+        if index == len(self.costs) or self.costs[index] != cost:
+            return False
+        self.costs.pop(index)
+        if provider in self.providers:
+            self.providers[provider] -= 1
+            if not self.providers[provider]:
+                del self.providers[provider]
+        return True
+
+    @property
+    def min_cost(self) -> float:
+        return self.costs[0]
+
+    @property
+    def median_cost(self) -> float:
+        middle = len(self.costs) // 2
+        if len(self.costs) % 2:
+            return self.costs[middle]
+        return (self.costs[middle - 1] + self.costs[middle]) / 2
+
+class RouteGraph:
+    """Directed multigraph of observed trip legs, one edge per transport mode."""
+
+    def __init__(self):
+        # origin key -> destination key -> mode -> EdgeStats
+        self.edges: Dict[str, Dict[str, Dict[str, EdgeStats]]] = {}
+        # Location key -> display name (as first seen), for locations with at least one leg
+        self.names: Dict[str, str] = {}
+        # Location key -> number of leg ends at it, so names drops a location with its last leg
+        self._uses: Dict[str, int] = {}
+        self.leg_count = 0
+        self._cache: Dict[Tuple, Optional[Dict[str, Any]]] = {}
+        # Concurrent readers (see shared_route_graph) share the query cache
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'RouteGraph':
+        """Build from raw trip records (as stored in the trips file)."""
+        graph = cls()
+        for record in records:
+            graph.add_trip_record(record)
+        return graph
+
+    @classmethod
+    def from_trips(cls, trips: Iterable) -> 'RouteGraph':
+        """Build from Trip objects."""
+        graph = cls()
+        for trip in trips:
+            for leg in trip.trip_legs:
+                graph.add_leg(leg.start_location, leg.destination, leg.transport_mode,
+                              leg.cost, leg.transport_provider)
+        return graph
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(modes) for targets in self.edges.values() for modes in targets.values())
+
+    def _key(self, name: str) -> str:
+        key = normalise_location(name)
+        self.names.setdefault(key, ' '.join(str(name).split()))
+        self._uses[key] = self._uses.get(key, 0) + 1
+        return key
+
+    def _release(self, key: str) -> None:
+        self._uses[key] -= 1
+        if not self._uses[key]:
+            del self._uses[key]
+            del self.names[key]
+
+    def add_leg(self, origin: str, destination: str, mode, cost: float, provider: str = '') -> None:
+        modes = self.edges.setdefault(self._key(origin), {}).setdefault(self._key(destination), {})
+        mode = _mode_value(mode)
+        if mode not in modes:
+            modes[mode] = EdgeStats()
+        modes[mode].add(float(cost), provider)
+        self.leg_count += 1
+        with self._cache_lock:
+            self._cache.clear()
+
+    def remove_leg(self, origin: str, destination: str, mode, cost: float, provider: str = '') -> bool:
+        """Forget one observed leg; returns False if the graph never saw it."""
+        origin_key, destination_key = normalise_location(origin), normalise_location(destination)
+        modes = self.edges.get(origin_key, {}).get(destination_key, {})
+        mode = _mode_value(mode)
+        if mode not in modes or not modes[mode].remove(float(cost), provider):
+            return False
+        if not modes[mode].costs:
+            del modes[mode]
+            if not modes:
+                del self.edges[origin_key][destination_key]
+                if not self.edges[origin_key]:
+                    del self.edges[origin_key]
+        self._release(origin_key)
+        self._release(destination_key)
+        self.leg_count -= 1
+        with self._cache_lock:
+            self._cache.clear()
+        return True
+
+    def add_trip_record(self, record: Dict[str, Any]) -> None:
+        for leg in record.get('trip_legs', []):
+            self.add_leg(leg['start_location'], leg['destination'], leg['transport_mode'],
+                         leg.get('cost', 0.0), leg.get('transport_provider', ''))
+
+    def remove_trip_record(self, record: Dict[str, Any]) -> None:
+        for leg in record.get('trip_legs', []):
+            self.remove_leg(leg['start_location'], leg['destination'], leg['transport_mode'],
+                            leg.get('cost', 0.0), leg.get('transport_provider', ''))
+
+    def on_trip_change(self, old_record: Optional[Dict[str, Any]], new_record: Optional[Dict[str, Any]]) -> None:
+        """data_manager trip listener: swap the old record's legs for the new one's."""
+        old_legs = old_record.get('trip_legs', []) if old_record else []
+        new_legs = new_record.get('trip_legs', []) if new_record else []
+        if old_legs == new_legs:
+            return
+        if old_record:
+            self.remove_trip_record(old_record)
+        if new_record:
+            self.add_trip_record(new_record)
+
+    def edge_options(self, origin: str, destination: str) -> Dict[str, Dict[str, Any]]:
+        """Per-mode leg statistics between two locations."""
+        modes = self.edges.get(normalise_location(origin), {}).get(normalise_location(destination), {})
+        return {mode: {'legs': len(stats.costs), 'min_cost': stats.min_cost,
+                       'median_cost': stats.median_cost, 'providers': sorted(stats.providers)}
+                for mode, stats in modes.items()}
+
+    def cheapest_route(self, origin: str, destination: str, modes: Optional[Iterable] = None,
+                       weight: str = 'min') -> Optional[Dict[str, Any]]:
+        """Cheapest known route between two locations, or None if there is none.
+
+        modes restricts the transport modes used (TransportMode members or their
+        values); weight prices each edge at its 'min' or 'median' observed cost.
+        The result has the total cost and one hop per leg taken.
+        """
+        if weight not in ROUTE_WEIGHTS:
+            raise ValueError(f"Unknown route weight '{weight}'. Use one of: {', '.join(ROUTE_WEIGHTS)}")
+        allowed = frozenset(_mode_value(mode) for mode in modes) if modes is not None else None
+        cache_key = (normalise_location(origin), normalise_location(destination), allowed, weight)
+        with self._cache_lock:
+            if cache_key in self._cache:
+                return self._cache[cache_key]
+
+        route = self._dijkstra(cache_key[0], cache_key[1], allowed, weight)
+        with self._cache_lock:
+            if len(self._cache) >= ROUTE_CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            self._cache[cache_key] = route
+        return route
+
+    def _dijkstra(self, source: str, target: str, allowed: Optional[frozenset],
+                  weight: str) -> Optional[Dict[str, Any]]:
+        if source not in self.names or target not in self.names:
+            return None
+        distances = {source: 0.0}
+        # node -> (previous node, mode, edge cost)
+        previous: Dict[str, Tuple[str, str, float]] = {}
+        queue = [(0.0, source)]
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if node == target:
+                break
+            if distance > distances[node]:
+                continue
+            for neighbour, modes in self.edges.get(node, {}).items():
+                best = None
+                for mode, stats in modes.items():
+                    if allowed is None or mode in allowed:
+                        cost = stats.costs[0] if weight == 'min' else stats.median_cost
+                        if best is None or cost < best[1]:
+                            best = (mode, cost)
+                if best is None:
+                    continue
+                candidate = distance + best[1]
+                if candidate < distances.get(neighbour, float('inf')):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = (node, best[0], best[1])
+                    heapq.heappush(queue, (candidate, neighbour))
+
+        if target not in distances:
+            return None
+        hops = []
+        node = target
+        while node != source:
+            prior, mode, cost = previous[node]
+            hops.append({'from': self.names[prior], 'to': self.names[node], 'mode': mode, 'cost': cost,
+                         'providers': sorted(self.edges[prior][node][mode].providers)})
+            node = prior
+        hops.reverse()
+        return {'origin': self.names[source], 'destination': self.names[target],
+                'total_cost': distances[target], 'weight': weight, 'hops': hops}
+
+_route_graph = None
+
+def _view():
+    global _route_graph
+    if _route_graph is None:
+        import data_manager
+        _route_graph = data_manager.TripFileView(RouteGraph.from_records)
+    return _route_graph
+
+def get_route_graph() -> RouteGraph:
+    """The shared route graph over the trips file, built on first use, kept up to date on
+    saves, and rebuilt when another process has changed the file.
+
+    Saves change the graph in place; query it inside shared_route_graph()
+    when other threads may save trips.
+    """
+    return _view().get()
+
+def shared_route_graph():
+    """Context manager giving the shared route graph, with trip saves held off until the block ends:
+        with shared_route_graph() as graph:
+            route = graph.cheapest_route(origin, destination)
+    """
+    return _view().reading()
+
+def reset_route_graph() -> None:
+    """Drop the shared graph (e.g. after the data files are replaced); the next call rebuilds it."""
+    if _route_graph is not None:
+        _route_graph.reset()
+
+print("Route Graph module loaded successfully.")
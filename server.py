@@ -0,0 +1,778 @@
+# FILE: server.py
+# JSON API over the data files, so several users can work at once:
+#     python server.py [--host 127.0.0.1] [--port 8080] [--workers 8] [--session-ttl 3600] [--quiet]
+# Log in with POST /login {"username": ..., "password": ...} and send the
+# returned token as "Authorization: Bearer <token>" on every other request.
+#
+#     GET  /trips[?active=true]             POST /trips
+#     GET  /trips/ID   PUT /trips/ID        DELETE /trips/ID
+#     GET  /trips/ID/legs                   POST /trips/ID/legs       DELETE /trips/ID/legs/LEG_ID
+#     POST /trips/ID/travellers             DELETE /trips/ID/travellers/TRAVELLER_ID
+#     GET  /travellers   GET /travellers/ID POST /travellers
+#     GET  /invoices[?outstanding=true]     GET /invoices/ID          POST /invoices
+#     POST /invoices/ID/payments
+#     GET  /reports      GET /reports/KIND
+#
+# Requests are handled by a fixed pool of worker threads. Between requests a
+# keep-alive connection is parked with the server's idle watcher rather than
+# keeping a worker blocked on its next read, so idle clients cost a file
+# descriptor, not a worker; the watcher closes them after IDLE_TIMEOUT seconds.
+# Records are served
+# from a DataCache that keeps each data file in memory and reloads it only
+# when the file changes on disk, so a request costs a stat() per file rather
+# than a JSON parse. Each write holds data_manager's lock on the files it
+# changes, so writes to different files run side by side.
+# Trip Coordinators only see and change their own trips and invoices.
+
+import argparse
+import json
+import re
+import secrets
+import selectors
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import data_manager
+from auth import AuthenticationService
+from models import TripCoordinator, Traveller, Trip, TripLeg, Payment, Invoice, TransportMode, TripLegType
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+SESSION_TTL = 3600
+IDLE_TIMEOUT = 15
+MAX_BODY_BYTES = 1024 * 1024
+
+def _new_id(prefix: str) -> str:
+    """An ID in the app's PREFIX + timestamp style, with a random suffix so concurrent requests never collide."""
+    return f"{prefix}{datetime.now().strftime('%Y%m%d%H%M%S')}{secrets.token_hex(2).upper()}"
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+class APIError(Exception):
+    """An error reported to the client as {"error": message} with the given HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class DataCache:
+    """The records of each data file, held in memory and reloaded only when the file changes.
+
+    A file is identified by data_manager's (path, inode, mtime, size) signature, so
+    writes made by the console app or another process are picked up on the
+    next request. Returned records are shared between threads: read them,
+    never modify them.
+    """
+
+    # name -> (data_manager path attribute, ID field)
+    FILES = {
+        'users': ('USER_FILE', 'user_id'),
+        'travellers': ('TRAVELLER_FILE', 'traveller_id'),
+        'trips': ('TRIP_FILE', 'trip_id'),
+        'invoices': ('INVOICE_FILE', 'invoice_id')
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (signature, records, records by ID)
+        self._files: Dict[str, Tuple[tuple, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]] = {}
+        # key -> (signatures of the files it was built from, value)
+        self._derived: Dict[str, Tuple[tuple, Any]] = {}
+        self.loads = 0
+
+    def _entry(self, name: str):
+        attribute, id_field = self.FILES[name]
+        path = getattr(data_manager, attribute)
+        # The read lock keeps the signature and the records in step. No cache-wide
+        # lock is held while loading: a handler may already hold file locks.
+        with data_manager.locked(reads=(path,)):
+            signature = data_manager._file_signature(path)
+            entry = self._files.get(name)
+            if entry is None or entry[0] != signature:
+                records = data_manager._load_json(path)
+                entry = (signature, records, {record[id_field]: record for record in records})
+                with self._lock:
+                    self._files[name] = entry
+                    self.loads += 1
+        return entry
+
+    def records(self, name: str) -> List[Dict[str, Any]]:
+        return self._entry(name)[1]
+
+    def get(self, name: str, record_id: str) -> Optional[Dict[str, Any]]:
+        return self._entry(name)[2].get(record_id)
+
+    def derived(self, key: str, names: Sequence[str], build: Callable[[], Any]) -> Any:
+        """A value computed from some data files (a report, object lookups), rebuilt when any of them changes."""
+        signatures = tuple(self._entry(name)[0] for name in names)
+        cached = self._derived.get(key)
+        if cached is None or cached[0] != signatures:
+            cached = (signatures, build())
+            self._derived[key] = cached
+        return cached[1]
+
+    def users_by_id(self) -> Dict[str, Any]:
+        return self.derived('users_by_id', ('users',),
+                            lambda: {user.user_id: user for user in data_manager.load_users()})
+
+    def travellers_by_id(self) -> Dict[str, Any]:
+        return self.derived('travellers_by_id', ('travellers',),
+                            lambda: {t.traveller_id: t for t in data_manager.load_travellers()})
+
+    def trip(self, trip_id: str) -> Optional[Trip]:
+        """A fresh Trip object for a stored trip, safe to modify and save."""
+        record = self.get('trips', trip_id)
+        if record is None:
+            return None
+        return data_manager.trip_from_record(record, self.users_by_id(), self.travellers_by_id())
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._derived.clear()
+
+class SessionStore:
+    """Bearer tokens of logged-in users; a token expires after `ttl` seconds without use."""
+
+    def __init__(self, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Tuple[Any, float]] = {}
+
+    def create(self, user) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = (user, time.monotonic() + self.ttl)
+        return token
+
+    def user(self, token: str):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session[1] < now:
+                del self._sessions[token]
+                return None
+            self._sessions[token] = (session[0], now + self.ttl)
+            return session[0]
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+def _user_json(user) -> Dict[str, Any]:
+    return {'user_id': user.user_id, 'username': user.username, 'name': user.name, 'role': user.role.value}
+
+def _invoice_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    paid = sum(payment['amount'] for payment in record.get('payments', []))
+    invoice = dict(record)
+    invoice['balance'] = record['total_amount'] - paid
+    return invoice
+
+def _flag(query: Dict[str, List[str]], name: str) -> bool:
+    return query.get(name, ['false'])[0].lower() in ('1', 'true', 'yes')
+
+def _field(body: Dict[str, Any], name: str, kind: type = str, default: Any = None, required: bool = True) -> Any:
+    if name not in body or body[name] in (None, ''):
+        if required and default is None:
+            raise APIError(HTTPStatus.BAD_REQUEST, f"Missing field '{name}'.")
+        return default
+    value = body[name]
+    try:
+        if kind is datetime:
+            return datetime.fromisoformat(value)
+        if kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError
+            return value
+        return kind(value)
+    except (TypeError, ValueError):
+        raise APIError(HTTPStatus.BAD_REQUEST, f"Invalid value for '{name}'.")
+
+class APIHandler(BaseHTTPRequestHandler):
+    """Routes each request to a handle_* method, which returns (status, payload) or raises APIError."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'TravelAPI/1.0'
+    # A client that stalls partway through sending a request gives its worker back after this many seconds
+    timeout = 15
+    # Headers and body are written separately; without this small responses wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    # (method, path pattern, handler name, login required)
+    ROUTES = [
+        ('POST', r'/login', 'handle_login', False),
+        ('POST', r'/logout', 'handle_logout', True),
+        ('GET', r'/trips', 'handle_list_trips', True),
+        ('POST', r'/trips', 'handle_create_trip', True),
+        ('GET', r'/trips/([^/]+)', 'handle_get_trip', True),
+        ('PUT', r'/trips/([^/]+)', 'handle_update_trip', True),
+        ('DELETE', r'/trips/([^/]+)', 'handle_delete_trip', True),
+        ('GET', r'/trips/([^/]+)/legs', 'handle_list_legs', True),
+        ('POST', r'/trips/([^/]+)/legs', 'handle_add_leg', True),
+        ('DELETE', r'/trips/([^/]+)/legs/([^/]+)', 'handle_delete_leg', True),
+        ('POST', r'/trips/([^/]+)/travellers', 'handle_assign', True),
+        ('DELETE', r'/trips/([^/]+)/travellers/([^/]+)', 'handle_unassign', True),
+        ('GET', r'/travellers', 'handle_list_travellers', True),
+        ('POST', r'/travellers', 'handle_create_traveller', True),
+        ('GET', r'/travellers/([^/]+)', 'handle_get_traveller', True),
+        ('GET', r'/invoices', 'handle_list_invoices', True),
+        ('POST', r'/invoices', 'handle_create_invoice', True),
+        ('GET', r'/invoices/([^/]+)', 'handle_get_invoice', True),
+        ('POST', r'/invoices/([^/]+)/payments', 'handle_add_payment', True),
+        ('GET', r'/reports', 'handle_list_reports', True),
+        ('GET', r'/reports/([^/]+)', 'handle_report', True)
+    ]
+    _compiled = [(method, re.compile(pattern + r'/?'), name, login) for method, pattern, name, login in ROUTES]
+
+    def handle(self):
+        # One request per turn on a worker; APIServer parks the connection until the next one arrives
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self):
+        # A kept-alive connection keeps its buffered reader for the next request
+        if self.close_connection:
+            super().finish()
+        else:
+            self.wfile.flush()
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        self.user = None
+        try:
+            # Read the whole body first so a keep-alive connection stays in step even if a handler ignores it
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if not 0 <= length <= MAX_BODY_BYTES:
+                self.close_connection = True
+                raise APIError(HTTPStatus.BAD_REQUEST if length < 0 else HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               "Invalid or too large request body.")
+            self.raw_body = self.rfile.read(length) if length else b''
+            handler, args = self._route(method, url.path)
+            status, payload = handler(*args)
+        except APIError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            self.log_error("Unhandled error for %s %s: %r", method, self.path, e)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal server error."}
+        self._send(status, payload)
+
+    def _route(self, method: str, path: str):
+        allowed = False
+        for route_method, pattern, name, login in self._compiled:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            if login:
+                self.user = self._authenticate()
+            return getattr(self, name), match.groups()
+        if allowed:
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported for {path}.")
+        raise APIError(HTTPStatus.NOT_FOUND, f"No endpoint at {path}.")
+
+    def _authenticate(self):
+        header = self.headers.get('Authorization', '')
+        scheme, _, token = header.partition(' ')
+        user = self.server.sessions.user(token.strip()) if scheme.lower() == 'bearer' else None
+        if user is None:
+            raise APIError(HTTPStatus.UNAUTHORIZED, "Log in first: send 'Authorization: Bearer <token>'.")
+        self.token = token.strip()
+        return user
+
+    def _body(self) -> Dict[str, Any]:
+        try:
+            body = json.loads(self.raw_body or b'{}')
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be JSON.")
+        if not isinstance(body, dict):
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+        return body
+
+    def _send(self, status: HTTPStatus, payload: Any) -> None:
+        if payload is None or isinstance(payload, bytes):
+            data = payload or b''
+        else:
+            data = json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        if payload is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # --- Access control ---
+
+    def _is_coordinator(self) -> bool:
+        return isinstance(self.user, TripCoordinator)
+
+    def _visible(self, trip_record: Dict[str, Any]) -> bool:
+        return not self._is_coordinator() or trip_record.get('coordinator_id') == self.user.user_id
+
+    def _trip_record(self, trip_id: str) -> Dict[str, Any]:
+        record = self.server.cache.get('trips', trip_id)
+        if record is None or not self._visible(record):
+            raise APIError(HTTPStatus.NOT_FOUND, f"Trip {trip_id} not found.")
+        return record
+
+    def _invoice_record(self, invoice_id: str) -> Dict[str, Any]:
+        record = self.server.cache.get('invoices', invoice_id)
+        trip = record and self.server.cache.get('trips', record['trip_id'])
+        if record is None or trip is None or not self._visible(trip):
+            raise APIError(HTTPStatus.NOT_FOUND, f"Invoice {invoice_id} not found.")
+        return record
+
+    def _coordinator(self, coordinator_id: Optional[str]):
+        if self._is_coordinator():
+            return self.user
+        if coordinator_id is None:
+            return None
+        coordinator = self.server.cache.users_by_id().get(coordinator_id)
+        if not isinstance(coordinator, TripCoordinator):
+            raise APIError(HTTPStatus.BAD_REQUEST, f"{coordinator_id} is not a Trip Coordinator.")
+        return coordinator
+
+    def _locked_for(self, *written: str):
+        """data_manager locks for a read-modify-write of the `written` files.
+
+        The files read to build model objects are read-locked up front as
+        well; taking them later, while holding a write lock, could deadlock
+        against a writer that holds them.
+        """
+        reads = (data_manager.USER_FILE, data_manager.TRAVELLER_FILE, data_manager.TRIP_FILE)
+        return data_manager.locked(writes=written, reads=[path for path in reads if path not in written])
+
+    # --- Sessions ---
+
+    def handle_login(self):
+        body = self._body()
+        username, password = _field(body, 'username'), _field(body, 'password')
+        with self.server.auth_lock:
+            auth = self.server.auth
+            auth.users = list(self.server.cache.users_by_id().values())
+            success, message, user = auth.login(username, password)
+            auth.logout()
+        if not success:
+            raise APIError(HTTPStatus.UNAUTHORIZED, message)
+        return HTTPStatus.OK, {'token': self.server.sessions.create(user), 'user': _user_json(user)}
+
+    def handle_logout(self):
+        self.server.sessions.revoke(self.token)
+        return HTTPStatus.NO_CONTENT, None
+
+    # --- Trips and legs ---
+
+    def _encoded(self, key: str, names: Sequence[str], build: Callable[[], Any]) -> bytes:
+        """A response body encoded once per version of the files it is built from.
+
+        Serialising a full listing costs far more than looking it up, so
+        repeated reads of unchanged data are served as ready-made bytes.
+        """
+        return self.server.cache.derived(f'json:{key}', names,
+                                         lambda: json.dumps(build(), default=_json_default).encode())
+
+    def handle_list_trips(self):
+        active_only = _flag(self.query, 'active')
+        coordinator_id = self.user.user_id if self._is_coordinator() else None
+        return HTTPStatus.OK, self._encoded(
+            f'trips:{coordinator_id}:{active_only}', ('trips',),
+            lambda: [record for record in self.server.cache.records('trips')
+                     if self._visible(record) and (not active_only or record.get('is_active', True))])
+
+    def handle_get_trip(self, trip_id):
+        return HTTPStatus.OK, self._trip_record(trip_id)
+
+    def handle_create_trip(self):
+        body = self._body()
+        trip = Trip(trip_id=_new_id('TR'), name=_field(body, 'name'), start_date=_field(body, 'start_date', datetime),
+                    duration_days=_field(body, 'duration_days', int),
+                    coordinator=self._coordinator(_field(body, 'coordinator_id', required=False)))
+        if trip.duration_days < 1:
+            raise APIError(HTTPStatus.BAD_REQUEST, "duration_days must be at least 1.")
+        data_manager.save_trip(trip)
+        return HTTPStatus.CREATED, self.server.cache.get('trips', trip.trip_id)
+
+    def handle_update_trip(self, trip_id):
+        body = self._body()
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            trip = self.server.cache.trip(trip_id)
+            trip.name = _field(body, 'name', default=trip.name)
+            trip.start_date = _field(body, 'start_date', datetime, default=trip.start_date)
+            trip.duration_days = _field(body, 'duration_days', int, default=trip.duration_days)
+            trip.is_active = _field(body, 'is_active', bool, default=trip.is_active)
+            if 'coordinator_id' in body:
+                trip.coordinator = self._coordinator(body['coordinator_id'])
+            if trip.duration_days < 1:
+                raise APIError(HTTPStatus.BAD_REQUEST, "duration_days must be at least 1.")
+            data_manager.save_trip(trip)
+        return HTTPStatus.OK, self.server.cache.get('trips', trip_id)
+
+    def handle_delete_trip(self, trip_id):
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            data_manager.delete_trip(trip_id)
+        return HTTPStatus.NO_CONTENT, None
+
+    def handle_list_legs(self, trip_id):
+        return HTTPStatus.OK, sorted(self._trip_record(trip_id).get('trip_legs', []), key=lambda leg: leg['sequence'])
+
+    def handle_add_leg(self, trip_id):
+        body = self._body()
+        try:
+            transport_mode = TransportMode(_field(body, 'transport_mode'))
+            leg_type = TripLegType(_field(body, 'leg_type'))
+        except ValueError as e:
+            raise APIError(HTTPStatus.BAD_REQUEST, str(e))
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            trip = self.server.cache.trip(trip_id)
+            leg = TripLeg(leg_id=_new_id('LG'),
+                          sequence=_field(body, 'sequence', int,
+                                          default=max((l.sequence for l in trip.trip_legs), default=0) + 1),
+                          start_location=_field(body, 'start_location'), destination=_field(body, 'destination'),
+                          transport_provider=_field(body, 'transport_provider'), transport_mode=transport_mode,
+                          leg_type=leg_type, cost=_field(body, 'cost', float, default=0.0),
+                          description=_field(body, 'description', default=''))
+            trip.trip_legs.append(leg)
+            data_manager.save_trip(trip)
+        from itinerary_validator import validate_trip
+        return HTTPStatus.CREATED, {'leg': next(l for l in self.server.cache.get('trips', trip_id)['trip_legs']
+                                                if l['leg_id'] == leg.leg_id),
+                                    'itinerary_issues': validate_trip(trip)}
+
+    def handle_delete_leg(self, trip_id, leg_id):
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            trip = self.server.cache.trip(trip_id)
+            legs = [leg for leg in trip.trip_legs if leg.leg_id != leg_id]
+            if len(legs) == len(trip.trip_legs):
+                raise APIError(HTTPStatus.NOT_FOUND, f"Leg {leg_id} not found on trip {trip_id}.")
+            trip.trip_legs = legs
+            data_manager.save_trip(trip)
+        return HTTPStatus.NO_CONTENT, None
+
+    # --- Travellers and assignments ---
+
+    def handle_list_travellers(self):
+        return HTTPStatus.OK, self._encoded('travellers', ('travellers',), lambda: self.server.cache.records('travellers'))
+
+    def handle_get_traveller(self, traveller_id):
+        record = self.server.cache.get('travellers', traveller_id)
+        if record is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Traveller {traveller_id} not found.")
+        return HTTPStatus.OK, record
+
+    def handle_create_traveller(self):
+        body = self._body()
+        traveller = Traveller(traveller_id=_new_id('T'), name=_field(body, 'name'),
+                              address=_field(body, 'address', default=''),
+                              date_of_birth=_field(body, 'date_of_birth', datetime),
+                              emergency_contact=_field(body, 'emergency_contact', default=''),
+                              government_id=_field(body, 'government_id', default=''))
+        data_manager.save_traveller(traveller)
+        return HTTPStatus.CREATED, self.server.cache.get('travellers', traveller.traveller_id)
+
+    def handle_assign(self, trip_id):
+        body = self._body()
+        traveller_id = _field(body, 'traveller_id')
+        allow_overlap = _field(body, 'allow_overlap', bool, default=False, required=False)
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            if self.server.cache.get('travellers', traveller_id) is None:
+                raise APIError(HTTPStatus.NOT_FOUND, f"Traveller {traveller_id} not found.")
+            if not data_manager.assign_traveller_to_trip(trip_id, traveller_id, allow_overlap=allow_overlap):
+                raise APIError(HTTPStatus.CONFLICT,
+                               f"Traveller {traveller_id} is already on this trip or on an overlapping one.")
+        return HTTPStatus.OK, self.server.cache.get('trips', trip_id)
+
+    def handle_unassign(self, trip_id, traveller_id):
+        with self._locked_for(data_manager.TRIP_FILE):
+            self._trip_record(trip_id)
+            if not data_manager.remove_traveller_from_trip(trip_id, traveller_id):
+                raise APIError(HTTPStatus.NOT_FOUND, f"Traveller {traveller_id} is not on trip {trip_id}.")
+        return HTTPStatus.NO_CONTENT, None
+
+    # --- Invoices and payments ---
+
+    def handle_list_invoices(self):
+        outstanding = _flag(self.query, 'outstanding')
+        coordinator_id = self.user.user_id if self._is_coordinator() else None
+
+        def build():
+            cache = self.server.cache
+            invoices = []
+            for record in cache.records('invoices'):
+                trip = cache.get('trips', record['trip_id'])
+                if trip is None or not self._visible(trip):
+                    continue
+                invoice = _invoice_json(record)
+                if not outstanding or invoice['balance'] > 0:
+                    invoices.append(invoice)
+            return invoices
+        return HTTPStatus.OK, self._encoded(f'invoices:{coordinator_id}:{outstanding}', ('invoices', 'trips'), build)
+
+    def handle_get_invoice(self, invoice_id):
+        return HTTPStatus.OK, _invoice_json(self._invoice_record(invoice_id))
+
+    def handle_create_invoice(self):
+        body = self._body()
+        trip_id = _field(body, 'trip_id')
+        with self._locked_for(data_manager.INVOICE_FILE):
+            self._trip_record(trip_id)
+            trip = self.server.cache.trip(trip_id)
+            if not trip.trip_legs:
+                raise APIError(HTTPStatus.CONFLICT, "This trip has no legs. Add trip legs before invoicing.")
+            total = _field(body, 'total_amount', float, default=sum(leg.cost for leg in trip.trip_legs))
+            if total <= 0:
+                raise APIError(HTTPStatus.CONFLICT, "The invoice total must be greater than zero.")
+            invoice = Invoice(invoice_id=_new_id('INV'), trip=trip, issue_date=datetime.now(), total_amount=total)
+            data_manager.save_invoice(invoice)
+        return HTTPStatus.CREATED, _invoice_json(self.server.cache.get('invoices', invoice.invoice_id))
+
+    def handle_add_payment(self, invoice_id):
+        body = self._body()
+        amount = _field(body, 'amount', float)
+        method = _field(body, 'method', default='Cash')
+        if amount <= 0:
+            raise APIError(HTTPStatus.BAD_REQUEST, "amount must be greater than zero.")
+        with self._locked_for(data_manager.INVOICE_FILE):
+            record = self._invoice_record(invoice_id)
+            invoice = data_manager.invoice_from_record(record, self.server.cache.trip(record['trip_id']))
+            balance = invoice.calculate_balance()
+            if balance <= 0:
+                raise APIError(HTTPStatus.CONFLICT, f"Invoice {invoice_id} is already fully paid.")
+            invoice.payments.append(Payment(payment_id=_new_id('PAY'), invoice=invoice,
+                                            amount=min(amount, balance), date=datetime.now(), method=method))
+            if invoice.is_fully_paid():
+                invoice.status = "Paid"
+            data_manager.save_invoice(invoice)
+        return HTTPStatus.CREATED, _invoice_json(self.server.cache.get('invoices', invoice_id))
+
+    # --- Reports ---
+
+    def handle_list_reports(self):
+        from report_export import STREAMED_REPORTS
+        return HTTPStatus.OK, sorted(STREAMED_REPORTS)
+
+    def handle_report(self, kind):
+        from report_export import STREAMED_REPORTS
+        if kind not in STREAMED_REPORTS:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Unknown report '{kind}'.")
+        if self._is_coordinator():
+            raise APIError(HTTPStatus.FORBIDDEN, "Reports cover every trip and are for Trip Managers and Administrators.")
+        # Computed once per version of the data files, then served from memory
+        return HTTPStatus.OK, self._encoded(f'report:{kind}', tuple(DataCache.FILES),
+                                            lambda: {'report': kind, 'data': STREAMED_REPORTS[kind]()})
+
+class APIServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that hands each request to a fixed pool of worker
+    threads instead of starting a new thread per connection. Idle keep-alive
+    connections wait in a selector on one watcher thread, not on a worker."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], workers: int = DEFAULT_WORKERS,
+                 session_ttl: float = SESSION_TTL, quiet: bool = False, idle_timeout: float = IDLE_TIMEOUT):
+        super().__init__(address, APIHandler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+        self.cache = DataCache()
+        self.sessions = SessionStore(session_ttl)
+        self.auth = AuthenticationService()
+        self.auth_lock = threading.Lock()
+        self.quiet = quiet
+        self.idle_timeout = idle_timeout
+        # Handlers are queued here by workers; only the watcher thread touches the selector
+        self._parking: List[APIHandler] = []
+        self._parking_lock = threading.Lock()
+        self._closing = False
+        self._wakeup, self._waker = socket.socketpair()
+        self._waker.setblocking(False)
+        self._watcher = threading.Thread(target=self._watch_idle, name='api-idle', daemon=True)
+        self._watcher.start()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._first_request, request, client_address)
+
+    def _first_request(self, request, client_address):
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self._after_request(handler)
+
+    def _next_request(self, handler: APIHandler):
+        try:
+            handler.handle()
+            handler.finish()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.close_connection = True
+        self._after_request(handler)
+
+    def _after_request(self, handler: APIHandler):
+        if handler.close_connection:
+            self._close(handler)
+        elif self._buffered(handler):
+            # The client pipelined its next request; it is already read, so serve it now
+            self._submit(handler)
+        else:
+            with self._parking_lock:
+                closing = self._closing
+                if not closing:
+                    self._parking.append(handler)
+            if closing:
+                self._close(handler)
+            else:
+                self._wake()
+
+    def _buffered(self, handler: APIHandler) -> bool:
+        handler.connection.settimeout(0)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            handler.connection.settimeout(handler.timeout)
+
+    def _submit(self, handler: APIHandler):
+        try:
+            self.pool.submit(self._next_request, handler)
+        except RuntimeError:
+            # The pool has shut down
+            self._close(handler)
+
+    def _close(self, handler: APIHandler):
+        handler.close_connection = True
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def _wake(self):
+        try:
+            self._waker.send(b'\0')
+        except OSError:
+            # Already full of wake-ups, or closing
+            pass
+
+    def _watch_idle(self):
+        """Hand parked connections back to the pool when their next request
+        arrives, and close those idle for longer than idle_timeout."""
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup, selectors.EVENT_READ)
+        while True:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is self._wakeup:
+                    try:
+                        self._wakeup.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                self._submit(key.data[0])
+            with self._parking_lock:
+                parked, self._parking = self._parking, []
+                closing = self._closing
+            now = time.monotonic()
+            for handler in parked:
+                selector.register(handler.connection, selectors.EVENT_READ, (handler, now))
+            for key in list(selector.get_map().values()):
+                if key.fileobj is not self._wakeup and (closing or now - key.data[1] > self.idle_timeout):
+                    selector.unregister(key.fileobj)
+                    self._close(key.data[0])
+            if closing:
+                break
+        selector.close()
+
+    def handle_error(self, request, client_address):
+        # A client closing its keep-alive connection is routine, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        with self._parking_lock:
+            self._closing = True
+        self._wake()
+        self._watcher.join()
+        # Requests still in flight close their connections instead of parking them
+        self.pool.shutdown(wait=True)
+        self._wakeup.close()
+        self._waker.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the travel data as a JSON API.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"worker threads handling requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--session-ttl', type=float, default=SESSION_TTL,
+                        help=f"seconds before an unused login token expires (default: {SESSION_TTL})")
+    parser.add_argument('--quiet', action='store_true', help="don't log each request")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        server = APIServer((args.host, args.port), args.workers, args.session_ttl, args.quiet)
+    except OSError as e:
+        print(f"Could not start the server: {e}", file=sys.stderr)
+        return 1
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
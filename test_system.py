@@ -3,11 +3,43 @@
 
 import unittest
 import hashlib
-from datetime import datetime
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
 from models import (User, Administrator, TripManager, TripCoordinator, Traveller,
                    Trip, TripLeg, Invoice, Payment, Itinerary,
                    UserRole, TransportMode, TripLegType)
 
+class DataFileTestCase(unittest.TestCase):
+    """Base class that points data_manager at a temporary data directory"""
+    
+    def setUp(self):
+        import data_manager
+        self.dm = data_manager
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_paths = {}
+        for name in dir(data_manager):
+            if name.endswith('_FILE') or name == 'DATA_DIR':
+                value = getattr(data_manager, name)
+                self.original_paths[name] = value
+                new_value = self.temp_dir.name if name == 'DATA_DIR' else os.path.join(self.temp_dir.name, os.path.basename(value))
+                setattr(data_manager, name, new_value)
+    
+    def tearDown(self):
+        for name, value in self.original_paths.items():
+            setattr(self.dm, name, value)
+        self.temp_dir.cleanup()
+    
+    def write_trips_behind(self, change):
+        """Apply change() to the stored trip records the way another process would: no listeners run"""
+        import json
+        records = self.dm._load_json(self.dm.TRIP_FILE)
+        change(records)
+        with open(self.dm.TRIP_FILE + '.other', 'w') as f:
+            json.dump(records, f)
+        os.replace(self.dm.TRIP_FILE + '.other', self.dm.TRIP_FILE)
+
 class TestAuthentication(unittest.TestCase):
     """Test authentication functionality"""
     
@@ -259,6 +291,1967 @@ class TestDataValidation(unittest.TestCase):
         
         self.assertTrue(trip.start_date > datetime.now())
 
+class TestReportCache(unittest.TestCase):
+    """Test content-addressed caching of generated reports"""
+    
+    def setUp(self):
+        """Redirect reports into a temporary directory"""
+        from report_generator import ReportGenerator
+        self.ReportGenerator = ReportGenerator
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = self.temp_dir.name
+        
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.trips = [Trip("T001", "Trip A", datetime(2025, 6, 1), 7, coordinator),
+                      Trip("T002", "Trip B", datetime(2025, 7, 1), 5, coordinator)]
+    
+    def tearDown(self):
+        self.ReportGenerator.REPORTS_DIR = self.original_dir
+        self.temp_dir.cleanup()
+    
+    def test_unchanged_data_returns_cached_file(self):
+        """Test that identical input reuses the existing report"""
+        success, first = self.ReportGenerator.generate_trip_statistics(self.trips)
+        self.assertTrue(success)
+        mtime = os.path.getmtime(first)
+        
+        success, second = self.ReportGenerator.generate_trip_statistics(self.trips)
+        self.assertEqual(first, second)
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 1)
+        self.assertGreaterEqual(os.path.getmtime(second), mtime)
+    
+    def test_changed_data_renders_new_file(self):
+        """Test that a data change produces a different report"""
+        _, first = self.ReportGenerator.generate_trip_statistics(self.trips)
+        self.trips[1].is_active = False
+        _, second = self.ReportGenerator.generate_trip_statistics(self.trips)
+        
+        self.assertNotEqual(first, second)
+    
+    def test_prune_removes_least_recently_used(self):
+        """Test size and age limits on the reports directory"""
+        now = time.time()
+        for i, age in enumerate([40, 3, 2, 1]):
+            path = os.path.join(self.temp_dir.name, f"trip_stats_{i:016x}.png")
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (now - age * 86400, now - age * 86400))
+        
+        # trip_stats_..0 is expired, trip_stats_..1 is the oldest remaining over the size budget
+        removed = self.ReportGenerator.prune_reports_dir(max_bytes=200, max_age_days=30)
+        
+        self.assertEqual(removed, 2)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)),
+                         [f"trip_stats_{2:016x}.png", f"trip_stats_{3:016x}.png"])
+    
+    def test_prune_leaves_files_that_are_not_cached_charts(self):
+        """Test exports, the dashboard and coordinator packs are never pruned"""
+        others = [os.path.join("data", "trip_stats.csv"), "dashboard.html",
+                  os.path.join("C001", "trip_stats_0123456789abcdef.png"), os.path.join("C001", "pack.json")]
+        old = time.time() - 100 * 86400
+        for name in others:
+            path = os.path.join(self.temp_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (old, old))
+        
+        self.assertEqual(self.ReportGenerator.prune_reports_dir(max_bytes=0, max_age_days=1), 0)
+        for name in others:
+            self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, name)), name)
+
+class TestRenderOptions(unittest.TestCase):
+    """Test configurable report output format and resolution"""
+    
+    def setUp(self):
+        """Redirect reports into a temporary directory"""
+        from report_generator import ReportGenerator, RenderOptions
+        self.ReportGenerator = ReportGenerator
+        self.RenderOptions = RenderOptions
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = self.temp_dir.name
+        
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.trips = [Trip("T001", "Trip A", datetime(2025, 6, 1), 7, coordinator)]
+    
+    def tearDown(self):
+        self.ReportGenerator.REPORTS_DIR = self.original_dir
+        self.temp_dir.cleanup()
+    
+    def test_invalid_format_rejected(self):
+        """Test that unknown formats raise an error"""
+        with self.assertRaises(ValueError):
+            self.RenderOptions(fmt='bmp')
+    
+    def test_vector_formats(self):
+        """Test SVG and PDF output"""
+        for fmt in ('svg', 'pdf'):
+            success, path = self.ReportGenerator.generate_trip_statistics(
+                self.trips, self.RenderOptions(fmt=fmt))
+            self.assertTrue(success)
+            self.assertTrue(path.endswith(f".{fmt}"))
+            self.assertGreater(os.path.getsize(path), 0)
+    
+    def test_thumbnail_is_smaller_variant(self):
+        """Test that the thumbnail is a separate, smaller PNG"""
+        _, full = self.ReportGenerator.generate_trip_statistics(self.trips, self.RenderOptions(dpi=100))
+        _, thumb = self.ReportGenerator.generate_trip_statistics(self.trips, self.RenderOptions(thumbnail=True))
+        
+        self.assertNotEqual(full, thumb)
+        self.assertTrue(thumb.endswith("_thumb.png"))
+        self.assertLess(os.path.getsize(thumb), os.path.getsize(full))
+    
+    def test_size_budget_lowers_resolution(self):
+        """Test that raster output is reduced to fit max_bytes"""
+        _, unbounded = self.ReportGenerator.generate_trip_statistics(self.trips, self.RenderOptions(dpi=150))
+        budget = os.path.getsize(unbounded) // 2
+        _, bounded = self.ReportGenerator.generate_trip_statistics(
+            self.trips, self.RenderOptions(dpi=150, max_bytes=budget))
+        
+        self.assertLessEqual(os.path.getsize(bounded), budget)
+
+class TestReportAggregation(unittest.TestCase):
+    """Test vectorised report aggregations"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.invoices = []
+        amounts = [300.0, 500.0, 100.0, 500.0, 200.0, 500.0, 50.0]
+        for i, amount in enumerate(amounts):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i % 3, 1), 7, coordinator)
+            self.invoices.append(Invoice(f"INV{i}", trip, datetime(2025, 1 + i % 2, 10), amount))
+        self.invoices[0].add_payment(300.0, datetime.now(), "Card")
+        self.invoices[1].add_payment(100.0, datetime.now(), "Cash")
+        self.invoices[1].add_payment(50.0, datetime.now(), "Card")
+        self.invoices[6].add_payment(60.0, datetime.now(), "Transfer")
+    
+    def test_financial_summary_matches_per_invoice_calculation(self):
+        """Test totals, status counts and payment methods"""
+        import report_data
+        summary = report_data.financial_summary(self.invoices)
+        
+        self.assertAlmostEqual(summary['total_revenue'], 2150.0)
+        self.assertAlmostEqual(summary['total_paid'], 510.0)
+        self.assertAlmostEqual(summary['total_outstanding'], 1640.0)
+        self.assertEqual(summary['paid_count'], sum(1 for inv in self.invoices if inv.is_fully_paid()))
+        self.assertEqual(summary['payment_methods'], [("Card", 350.0), ("Cash", 100.0), ("Transfer", 60.0)])
+    
+    def test_top_invoices_match_stable_sort(self):
+        """Test top-k selection keeps sorted() order for ties"""
+        import report_data
+        expected = sorted(self.invoices, key=lambda x: x.total_amount, reverse=True)[:5]
+        summary = report_data.financial_summary(self.invoices)
+        
+        self.assertEqual(summary['top_invoices'], [(inv.trip.name, inv.total_amount) for inv in expected])
+    
+    def test_revenue_trends_grouped_by_month(self):
+        """Test monthly revenue and trip counts"""
+        import report_data
+        trends = report_data.revenue_trends(self.invoices, [inv.trip for inv in self.invoices])
+        
+        self.assertEqual(trends['months'], ["2025-01", "2025-02"])
+        self.assertEqual(trends['revenues'], [650.0, 1500.0])
+        self.assertEqual(trends['trip_counts'], [3, 2])
+
+class TestMonthlyRollups(DataFileTestCase):
+    """Test monthly rollups maintained on write"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        super().setUp()
+        self.coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.traveller = Traveller("TR001", "John Doe", "123 Test St",
+                                   datetime(1990, 5, 15), "555-1234", "AB123456")
+        self.dm.save_traveller(self.traveller)
+        self.trip = Trip("T001", "Test Trip", datetime(2025, 6, 1), 7, self.coordinator)
+        self.dm.save_trip(self.trip)
+        self.invoice = Invoice("INV001", self.trip, datetime(2025, 5, 20), 200.00)
+        self.dm.save_invoice(self.invoice)
+    
+    def _rows(self):
+        return {row['month']: row for row in self.dm.load_monthly_rollups()}
+    
+    def test_writes_update_rollups(self):
+        """Test that saves and assignments keep rollups current"""
+        self.invoice.add_payment(50.00, datetime.now(), "Card")
+        self.dm.save_invoice(self.invoice)
+        self.dm.assign_traveller_to_trip("T001", "TR001")
+        
+        rows = self._rows()
+        self.assertEqual(rows["2025-05"]["revenue"], 200.00)
+        self.assertEqual(rows["2025-05"]["paid"], 50.00)
+        self.assertEqual(rows["2025-05"]["outstanding"], 150.00)
+        self.assertEqual(rows["2025-06"]["trip_count"], 1)
+        self.assertEqual(rows["2025-06"]["traveller_count"], 1)
+    
+    def test_moving_and_deleting_records(self):
+        """Test that old contributions are subtracted"""
+        self.trip.start_date = datetime(2025, 8, 1)
+        self.dm.save_trip(self.trip)
+        self.assertNotIn("2025-06", self._rows())
+        self.assertEqual(self._rows()["2025-08"]["trip_count"], 1)
+        
+        self.dm.delete_invoice("INV001")
+        self.dm.delete_trip("T001")
+        self.assertEqual(self._rows(), {})
+    
+    def test_rollups_match_full_rebuild(self):
+        """Test incremental rollups equal a rebuild from history"""
+        second = Invoice("INV002", self.trip, datetime(2025, 7, 2), 99.99)
+        second.add_payment(0.33, datetime.now(), "Cash")
+        self.dm.save_invoice(second)
+        self.dm.remove_traveller_from_trip("T001", "TR001")
+        incremental = self.dm.load_monthly_rollups()
+        
+        self.assertEqual(incremental, self.dm.rebuild_monthly_rollups())
+    
+    def test_trends_from_rollups_match_history(self):
+        """Test that trend data from rollups equals the full calculation"""
+        import report_data
+        self.dm.save_invoice(Invoice("INV002", self.trip, datetime(2025, 6, 2), 80.00))
+        
+        from_rollups = report_data.revenue_trends_from_rollups(self.dm.load_monthly_rollups())
+        from_history = report_data.revenue_trends(self.dm.load_invoices(), self.dm.load_trips())
+        self.assertEqual(from_rollups, from_history)
+
+class TestStreamingAggregation(DataFileTestCase):
+    """Test chunked out-of-core report aggregation"""
+    
+    def _write_invoice_file(self, count, trips=None):
+        """Write an invoices file record by record, without building it in memory.
+        
+        Invoice i belongs to trip T<i>, or T<i % trips> when trips is given."""
+        import json
+        with open(self.dm.INVOICE_FILE, 'w') as f:
+            f.write('[')
+            for i in range(count):
+                if i:
+                    f.write(',')
+                json.dump({'invoice_id': f"INV{i}", 'trip_id': f"T{i % trips if trips else i}",
+                           'issue_date': f"2025-{1 + i % 12:02d}-01T00:00:00",
+                           'total_amount': float(i % 997), 'status': 'Pending',
+                           'payments': [{'payment_id': f"P{i}", 'amount': 10.0,
+                                         'date': "2025-01-01T00:00:00", 'method': 'Card'}]}, f, indent=4)
+            f.write(']')
+    
+    def test_streamed_results_match_in_memory(self):
+        """Test that chunked aggregation equals the in-memory aggregation"""
+        import report_data
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.dm.save_user(coordinator)
+        for i in range(7):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, coordinator)
+            trip.is_active = i % 3 != 0
+            self.dm.save_trip(trip)
+            invoice = Invoice(f"INV{i}", trip, datetime(2025, 1 + i % 4, 5), [300.0, 500.0, 500.0][i % 3])
+            if i % 2:
+                invoice.add_payment(invoice.total_amount, datetime.now(), ["Card", "Cash"][i % 4 // 2])
+            self.dm.save_invoice(invoice)
+        trips, invoices = self.dm.load_trips(), self.dm.load_invoices()
+        
+        self.assertEqual(report_data.stream_trip_statistics(chunk_size=2), report_data.trip_statistics(trips))
+        self.assertEqual(report_data.stream_revenue_trends(chunk_size=2), report_data.revenue_trends(invoices, trips))
+        streamed = report_data.stream_financial_summary(chunk_size=2)
+        in_memory = report_data.financial_summary(invoices)
+        self.assertEqual(streamed['top_invoices'], in_memory['top_invoices'])
+        self.assertEqual(streamed['payment_methods'], in_memory['payment_methods'])
+        self.assertEqual(streamed['paid_count'], in_memory['paid_count'])
+        self.assertAlmostEqual(streamed['total_revenue'], in_memory['total_revenue'])
+    
+    def test_merged_partials_equal_single_pass(self):
+        """Test that merging per-chunk accumulators gives the same result"""
+        import report_data
+        self._write_invoice_file(50)
+        chunks = list(self.dm.iter_record_chunks(self.dm.INVOICE_FILE, 7))
+        
+        single = report_data.FinancialAccumulator()
+        merged = report_data.FinancialAccumulator()
+        for chunk in chunks:
+            single.update(chunk)
+            partial = report_data.FinancialAccumulator()
+            partial.update(chunk)
+            merged.merge(partial)
+        
+        self.assertEqual(merged.result({}), single.result({}))
+    
+    def test_peak_memory_independent_of_input_size(self):
+        """Test that peak memory stays flat as the input grows tenfold"""
+        import report_data
+        import tracemalloc
+        peaks = []
+        for count in (1000, 10000):
+            self._write_invoice_file(count)
+            tracemalloc.start()
+            report_data.stream_financial_summary(chunk_size=200)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+    
+    def test_joined_streams_grow_with_trips_not_invoices(self):
+        """Test aging and leaderboard streams, which hold an entry per trip, stay flat as invoices grow"""
+        import json
+        import tracemalloc
+        import leaderboard
+        import report_data
+        with open(self.dm.TRIP_FILE, 'w') as f:
+            json.dump([{'trip_id': f"T{i}", 'name': f"Trip {i}", 'start_date': "2025-01-01T00:00:00",
+                        'duration_days': 3, 'coordinator_id': f"C{i % 5}", 'traveller_ids': [],
+                        'trip_legs': [{'destination': "Paris", 'transport_provider': "BA", 'cost': 10.0}]}
+                       for i in range(100)], f)
+        for stream in (report_data.stream_receivables_aging, leaderboard.stream_leaderboards):
+            peaks = []
+            for count in (1000, 10000):
+                self._write_invoice_file(count, trips=100)
+                tracemalloc.start()
+                stream(chunk_size=200)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            self.assertLess(peaks[1], peaks[0] * 1.5, stream.__name__)
+
+class TestReportExport(DataFileTestCase):
+    """Test CSV/JSON outputs of the report aggregates"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        super().setUp()
+        self.output_dir = os.path.join(self.temp_dir.name, "exports")
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.dm.save_user(coordinator)
+        for i in range(3):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, coordinator)
+            self.dm.save_trip(trip)
+            invoice = Invoice(f"INV{i}", trip, datetime(2025, 1 + i, 5), 100.0 * (i + 1))
+            invoice.add_payment(50.0, datetime.now(), "Card")
+            self.dm.save_invoice(invoice)
+    
+    def test_csv_rows(self):
+        """Test the flattened CSV layout"""
+        import csv
+        import report_data
+        import report_export
+        data = report_data.financial_summary(self.dm.load_invoices())
+        path = report_export.export_report('financial_summary', data, 'csv', self.output_dir)
+        
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['section', 'label', 'value'])
+        self.assertIn(['total_revenue', '', '600.0'], rows)
+        self.assertIn(['payment_methods', 'Card', '150.0'], rows)
+        self.assertIn(['top_invoices', 'Trip 2', '300.0'], rows)
+    
+    def test_json_document(self):
+        """Test the JSON export contains the aggregates"""
+        import json
+        import report_data
+        import report_export
+        data = report_data.revenue_trends(self.dm.load_invoices(), self.dm.load_trips())
+        path = report_export.export_report('revenue_trends', data, 'json', self.output_dir)
+        
+        with open(path) as f:
+            document = json.load(f)
+        self.assertEqual(document['report'], 'revenue_trends')
+        self.assertEqual(document['data']['months'], ["2025-01", "2025-02", "2025-03"])
+    
+    def test_command_line_exports_all_reports(self):
+        """Test the non-interactive entry point"""
+        import report_export
+        exit_code = report_export.main(['--output-dir', self.output_dir])
+        
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(os.listdir(self.output_dir)), 2 * len(report_export.STREAMED_REPORTS))
+    
+    def test_export_does_not_import_matplotlib(self):
+        """Test that exporting works without loading matplotlib"""
+        import json
+        import subprocess
+        import sys
+        # The child exports this test's seeded data files, never the repository's data/ directory
+        code = ("import os, sys, data_manager\n"
+                "for name in dir(data_manager):\n"
+                "    if name.endswith('_FILE') or name == 'DATA_DIR':\n"
+                "        path = getattr(data_manager, name)\n"
+                "        setattr(data_manager, name, sys.argv[2] if name == 'DATA_DIR' else\n"
+                "                os.path.join(sys.argv[2], os.path.basename(path)))\n"
+                "import report_export\n"
+                "status = report_export.main(['--output-dir', sys.argv[1]])\n"
+                "sys.exit(3 if 'matplotlib' in sys.modules else status)")
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', code, self.output_dir, self.temp_dir.name],
+                                cwd=self.temp_dir.name, env=environment, capture_output=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        
+        with open(os.path.join(self.output_dir, 'financial_summary.json')) as f:
+            self.assertEqual(json.load(f)['data']['total_revenue'], 600.0)
+
+class TestAgeBucketing(unittest.TestCase):
+    """Test exact age calculation and configurable age groups"""
+    
+    def _traveller(self, traveller_id, date_of_birth):
+        return Traveller(traveller_id, "Name", "Address", date_of_birth, "Contact", "GOV")
+    
+    def test_birthday_not_yet_reached(self):
+        """Test a traveller is not a year older until their birthday"""
+        import report_data
+        travellers = [self._traveller("T1", datetime(2006, 6, 15))]
+        
+        before = report_data.traveller_statistics(travellers, reference_date=datetime(2025, 6, 14))
+        on_day = report_data.traveller_statistics(travellers, reference_date=datetime(2025, 6, 15))
+        self.assertEqual(dict(before['age_groups'])['0-18'], 1)
+        self.assertEqual(dict(on_day['age_groups'])['19-30'], 1)
+    
+    def test_leap_day_birthday(self):
+        """Test 29 February birthdays roll over on 1 March in non-leap years"""
+        import numpy as np
+        import report_data
+        births = np.array(['2000-02-29'] * 3, dtype='datetime64[D]')
+        references = np.array(['2001-02-28', '2001-03-01', '2004-02-29'], dtype='datetime64[D]')
+        
+        self.assertEqual(report_data.exact_ages(births, references).tolist(), [0, 1, 4])
+    
+    def test_custom_age_edges(self):
+        """Test group labels and counts follow the configured edges"""
+        import report_data
+        travellers = [self._traveller(f"T{i}", datetime(2025 - age, 1, 1))
+                      for i, age in enumerate([5, 12, 40, 65, 80])]
+        stats = report_data.traveller_statistics(travellers, reference_date=datetime(2025, 6, 1),
+                                                 age_edges=[13, 65])
+        
+        self.assertEqual(report_data.age_labels([19, 31, 51, 71]), ['0-18', '19-30', '31-50', '51-70', '71+'])
+        self.assertEqual(report_data.age_labels([19, 31]), ['0-18', '19-30', '31+'])
+        self.assertEqual(stats['age_groups'], [('0-12', 2), ('13-64', 1), ('65+', 2)])
+    
+    def test_per_trip_breakdown_uses_trip_start(self):
+        """Test per-trip counts age travellers at the trip's start date"""
+        import report_data
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        traveller = self._traveller("T1", datetime(2006, 6, 15))
+        early = Trip("TR1", "Early", datetime(2025, 6, 1), 5, coordinator)
+        late = Trip("TR2", "Late", datetime(2025, 7, 1), 5, coordinator)
+        early.travellers.append(traveller)
+        late.travellers.append(traveller)
+        stats = report_data.traveller_statistics([traveller], reference_date=datetime(2025, 8, 1),
+                                                 trips=[early, late])
+        
+        self.assertEqual(stats['per_trip'], [("Early", [1, 0, 0, 0, 0]), ("Late", [0, 1, 0, 0, 0])])
+
+class TestRevenueSeries(unittest.TestCase):
+    """Test revenue trends at other granularities, rolling sums and year-over-year"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.trips, self.invoices = [], []
+        dates = [datetime(2023, 7, 3), datetime(2023, 7, 9), datetime(2023, 8, 14),
+                 datetime(2024, 7, 1), datetime(2024, 9, 30)]
+        for i, date in enumerate(dates):
+            trip = Trip(f"T{i}", f"Trip {i}", date, 7, coordinator)
+            self.trips.append(trip)
+            self.invoices.append(Invoice(f"INV{i}", trip, date, 100.0 * (i + 1)))
+    
+    def test_buckets_are_contiguous(self):
+        """Test empty buckets are kept and totals are preserved"""
+        import report_data
+        monthly = report_data.revenue_series(self.invoices, self.trips, 'month')
+        quarterly = report_data.revenue_series(self.invoices, self.trips, 'quarter')
+        
+        self.assertEqual(len(monthly['periods']), 15)
+        self.assertEqual(monthly['periods'][:2], ['2023-07', '2023-08'])
+        self.assertEqual(monthly['revenues'][:3], [300.0, 300.0, 0.0])
+        self.assertEqual(quarterly['periods'], ['2023-Q3', '2023-Q4', '2024-Q1', '2024-Q2', '2024-Q3'])
+        self.assertAlmostEqual(sum(quarterly['revenues']), 1500.0)
+        self.assertEqual(sum(quarterly['trip_counts']), 5)
+    
+    def test_weekly_buckets_start_on_monday(self):
+        """Test ISO week labels, with Sunday in the same week as the Monday before"""
+        import report_data
+        weekly = report_data.revenue_series(self.invoices, self.trips, 'week')
+        
+        self.assertEqual(weekly['periods'][0], '2023-W27')
+        self.assertEqual(weekly['revenues'][0], 300.0)
+        self.assertEqual(weekly['periods'][-1], '2024-W40')
+    
+    def test_rolling_and_previous_year(self):
+        """Test rolling sums and year-over-year values match a direct calculation"""
+        import report_data
+        data = report_data.revenue_series(self.invoices, self.trips, 'month', window=3, year_over_year=True)
+        revenues = data['revenues']
+        
+        expected_rolling = [sum(revenues[max(0, i - 2):i + 1]) for i in range(len(revenues))]
+        self.assertEqual(data['rolling'], expected_rolling)
+        self.assertEqual(data['previous_year'][:12], [None] * 12)
+        self.assertEqual(data['previous_year'][12], revenues[0])
+    
+    def test_invalid_options_rejected(self):
+        """Test unknown granularities and empty windows are refused"""
+        import report_data
+        with self.assertRaises(ValueError):
+            report_data.revenue_series(self.invoices, self.trips, 'year')
+        with self.assertRaises(ValueError):
+            report_data.revenue_series(self.invoices, self.trips, 'week', window=0)
+
+class TestLeaderboards(DataFileTestCase):
+    """Test heap-based top-k leaderboards"""
+    
+    def test_top_k_matches_stable_sort(self):
+        """Test TopK keeps the highest scores and breaks ties by arrival order"""
+        import random
+        from leaderboard import TopK
+        rng = random.Random(1)
+        pairs = [(f"K{i}", rng.randint(0, 20)) for i in range(500)]
+        ranking = TopK(7)
+        ranking.update(pairs)
+        
+        self.assertEqual(ranking.result(), sorted(pairs, key=lambda p: p[1], reverse=True)[:7])
+    
+    def test_merged_partial_heaps_equal_single_pass(self):
+        """Test merging TopK objects over consecutive chunks"""
+        import random
+        from leaderboard import TopK
+        rng = random.Random(2)
+        pairs = [(f"K{i}", rng.randint(0, 50)) for i in range(300)]
+        single = TopK(5)
+        single.update(pairs)
+        merged = TopK(5)
+        for start in range(0, len(pairs), 40):
+            part = TopK(5)
+            part.update(pairs[start:start + 40])
+            merged.merge(part)
+        
+        self.assertEqual(merged.result(), single.result())
+    
+    def _save_sample_data(self):
+        coordinators = [TripCoordinator(f"C00{i}", f"coord{i}", "pass", f"Coord {i}") for i in range(3)]
+        for coordinator in coordinators:
+            self.dm.save_user(coordinator)
+        for i in range(6):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, coordinators[i % 3])
+            trip.trip_legs.append(TripLeg(f"L{i}a", 1, "London", ["Paris", "Rome"][i % 2], ["Eurostar", "BA"][i % 2],
+                                          TransportMode.TRAIN, TripLegType.TRANSFER, cost=100.0 * (i + 1)))
+            trip.trip_legs.append(TripLeg(f"L{i}b", 2, "Paris", "Paris", "Taxi",
+                                          TransportMode.TAXI, TripLegType.TRANSFER, cost=20.0))
+            self.dm.save_trip(trip)
+            invoice = Invoice(f"INV{i}", trip, datetime(2025, 1, 5), 1000.0 + 100 * i)
+            invoice.add_payment(150.0 * i, datetime.now(), "Card")
+            self.dm.save_invoice(invoice)
+    
+    def test_leaderboards_rank_each_dimension(self):
+        """Test revenue, leg count, spend and outstanding rankings"""
+        import leaderboard
+        self._save_sample_data()
+        boards = leaderboard.leaderboards(self.dm.load_trips(), self.dm.load_invoices(), k=2)
+        
+        self.assertEqual(boards['coordinators_by_revenue'], [("Coord 2", 2700.0), ("Coord 1", 2500.0)])
+        self.assertEqual(boards['destinations_by_legs'], [("Paris", 9), ("Rome", 3)])
+        self.assertEqual(boards['providers_by_spend'], [("BA", 1200.0), ("Eurostar", 900.0)])
+        self.assertEqual(boards['trips_by_outstanding'], [("Trip 0", 1000.0), ("Trip 1", 950.0)])
+    
+    def test_streamed_leaderboards_match_in_memory(self):
+        """Test chunked leaderboards equal the in-memory ones"""
+        import leaderboard
+        self._save_sample_data()
+        
+        self.assertEqual(leaderboard.stream_leaderboards(chunk_size=2, k=3),
+                         leaderboard.leaderboards(self.dm.load_trips(), self.dm.load_invoices(), k=3))
+    
+    def test_trips_sharing_a_name_are_ranked_separately(self):
+        """Test outstanding balances are totalled per trip, not per trip name"""
+        import leaderboard
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.dm.save_user(coordinator)
+        for i, amount in enumerate([300.0, 200.0, 400.0]):
+            trip = Trip(f"T{i}", "Paris Weekend", datetime(2025, 3, 1 + i), 3, coordinator)
+            self.dm.save_trip(trip)
+            self.dm.save_invoice(Invoice(f"INV{i}", trip, datetime(2025, 1, 5), amount))
+        
+        expected = [("Paris Weekend", 400.0), ("Paris Weekend", 300.0)]
+        boards = leaderboard.leaderboards(self.dm.load_trips(), self.dm.load_invoices(), k=2)
+        self.assertEqual(boards['trips_by_outstanding'], expected)
+        self.assertEqual(leaderboard.stream_leaderboards(chunk_size=2, k=2)['trips_by_outstanding'], expected)
+
+class TestReceivablesAging(DataFileTestCase):
+    """Test receivables aging buckets"""
+    
+    def _save_sample_data(self):
+        """Save invoices issued 0-120 days before 1 June 2025 for two coordinators"""
+        from datetime import timedelta
+        self.as_of = datetime(2025, 6, 1)
+        coordinators = [TripCoordinator("C001", "alice", "pass", "Alice"), TripCoordinator("C002", "bob", "pass", "Bob")]
+        for coordinator in coordinators:
+            self.dm.save_user(coordinator)
+        for i, days in enumerate([0, 30, 31, 60, 61, 90, 91, 120]):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 7, 1), 7, coordinators[i % 2])
+            self.dm.save_trip(trip)
+            invoice = Invoice(f"INV{i}", trip, self.as_of - timedelta(days=days), 100.0)
+            invoice.add_payment(100.0 if i == 7 else 25.0 * (i % 2), datetime.now(), "Card")
+            self.dm.save_invoice(invoice)
+    
+    def test_bucket_boundaries_and_balances(self):
+        """Test day boundaries, partial payments and exclusion of paid invoices"""
+        import report_data
+        self._save_sample_data()
+        aging = report_data.receivables_aging(self.dm.load_invoices(), self.as_of)
+        
+        self.assertEqual(aging['buckets'], [('0-30', 175.0), ('31-60', 175.0), ('61-90', 175.0), ('90+', 100.0)])
+        self.assertEqual(aging['invoice_counts'], [('0-30', 2), ('31-60', 2), ('61-90', 2), ('90+', 1)])
+        self.assertAlmostEqual(aging['total_outstanding'], 625.0)
+    
+    def test_per_coordinator_breakdown(self):
+        """Test balances are split by the trip's coordinator"""
+        import report_data
+        self._save_sample_data()
+        aging = report_data.receivables_aging(self.dm.load_invoices(), self.as_of)
+        
+        self.assertEqual(aging['by_coordinator'], [("Alice", [100.0, 100.0, 100.0, 100.0]),
+                                                   ("Bob", [75.0, 75.0, 75.0, 0.0])])
+    
+    def test_streamed_aging_matches_in_memory(self):
+        """Test chunked aging equals the in-memory aggregation and exports as CSV"""
+        import csv
+        import report_data
+        import report_export
+        self._save_sample_data()
+        streamed = report_data.stream_receivables_aging(chunk_size=3, as_of=self.as_of)
+        
+        self.assertEqual(streamed, report_data.receivables_aging(self.dm.load_invoices(), self.as_of))
+        path = report_export.export_report('receivables_aging', streamed, 'csv', self.temp_dir.name)
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertIn(['coordinator:Bob', '61-90', '75.0'], rows)
+    
+    def test_per_trip_rows_are_opt_in(self):
+        """Test the accumulator keeps per-coordinator rows only, unless per-trip rows are asked for"""
+        import report_data
+        self._save_sample_data()
+        records = self.dm._load_json(self.dm.INVOICE_FILE)
+        trip_coordinators = {f"T{i}": ["Alice", "Bob"][i % 2] for i in range(8)}
+        expected = report_data.receivables_aging(self.dm.load_invoices(), self.as_of)
+        
+        default = report_data.AgingAccumulator(self.as_of, trip_coordinators)
+        default.update(records)
+        self.assertIsNone(default.by_trip)
+        self.assertEqual(default.result(), expected)
+        
+        per_trip = report_data.AgingAccumulator(self.as_of, trip_coordinators, per_trip=True)
+        for start in range(0, len(records), 3):
+            part = report_data.AgingAccumulator(self.as_of, trip_coordinators, per_trip=True)
+            part.update(records[start:start + 3])
+            per_trip.merge(part)
+        self.assertEqual(per_trip.result(), expected)
+        self.assertEqual(per_trip.by_trip["T5"].tolist(), [0.0, 0.0, 75.0, 0.0])
+
+class TestFigureTemplates(unittest.TestCase):
+    """Test reuse of report figure templates"""
+    
+    def setUp(self):
+        """Redirect reports into a temporary directory and start with no templates"""
+        from report_generator import ReportGenerator
+        self.ReportGenerator = ReportGenerator
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = self.temp_dir.name
+        ReportGenerator._thread_templates().clear()
+        
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        self.invoices = []
+        for i in range(8):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, coordinator)
+            invoice = Invoice(f"INV{i}", trip, datetime(2025, 1 + i, 1), 100.0 * (i + 1))
+            invoice.add_payment(50.0, datetime.now(), ["Card", "Cash"][i % 2])
+            self.invoices.append(invoice)
+    
+    def tearDown(self):
+        self.ReportGenerator.REPORTS_DIR = self.original_dir
+        self.ReportGenerator._thread_templates().clear()
+        self.temp_dir.cleanup()
+    
+    def _png_bytes(self, data):
+        from report_generator import RenderOptions
+        success, path = self.ReportGenerator.render_report('financial_summary', data, RenderOptions(dpi=40))
+        self.assertTrue(success)
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def test_template_reused_for_same_shape(self):
+        """Test one template serves datasets of the same shape and another is built for a new shape"""
+        for invoices in (self.invoices[:6], self.invoices[2:], self.invoices[1:7]):
+            self.ReportGenerator.generate_financial_summary(invoices)
+        self.assertEqual(len(self.ReportGenerator._thread_templates()), 1)
+        
+        self.ReportGenerator.generate_financial_summary(self.invoices[:3])
+        self.assertEqual(len(self.ReportGenerator._thread_templates()), 2)
+    
+    def test_refilled_template_matches_fresh_template(self):
+        """Test a reused template draws exactly what a newly built one does"""
+        import report_data
+        first = report_data.financial_summary(self.invoices[:6])
+        second = report_data.financial_summary(self.invoices[2:])
+        fresh = self._png_bytes(second)
+        
+        self.ReportGenerator._thread_templates().clear()
+        for name in os.listdir(self.temp_dir.name):
+            os.remove(os.path.join(self.temp_dir.name, name))
+        self._png_bytes(first)
+        for name in os.listdir(self.temp_dir.name):
+            os.remove(os.path.join(self.temp_dir.name, name))
+        self.assertEqual(self._png_bytes(second), fresh)
+    
+    def test_pie_update_matches_new_pie(self):
+        """Test moved wedges end at the same angles as a newly drawn pie"""
+        from matplotlib.figure import Figure
+        from report_generator import _update_pie
+        ax_new, ax_moved = Figure().subplots(1, 2)
+        new = ax_new.pie([3, 1], labels=['a', 'b'], autopct='%1.1f%%', startangle=90)
+        moved = ax_moved.pie([1, 1], labels=['', ''], autopct='%1.1f%%', startangle=90)
+        _update_pie(*moved, [3, 1], ['a', 'b'])
+        
+        for expected, actual in zip(new[0], moved[0]):
+            self.assertAlmostEqual(expected.theta1, actual.theta1)
+            self.assertAlmostEqual(expected.theta2, actual.theta2)
+        self.assertEqual([t.get_text() for t in moved[2]], [t.get_text() for t in new[2]])
+    
+    def test_unsupported_layouts_fall_back_to_fresh_figures(self):
+        """Test per-trip traveller reports and disabled templates still render"""
+        from report_generator import RenderOptions
+        traveller = Traveller("TR1", "Name", "Address", datetime(1990, 1, 1), "Contact", "GOV")
+        self.invoices[0].trip.travellers.append(traveller)
+        success, _ = self.ReportGenerator.generate_traveller_statistics(
+            [traveller], RenderOptions(dpi=40), trips=[self.invoices[0].trip])
+        self.assertTrue(success)
+        self.assertEqual(len(self.ReportGenerator._thread_templates()), 0)
+    
+    def test_concurrent_renders_use_their_own_templates(self):
+        """Test threads rendering at once each draw on their own template and get correct files"""
+        import threading
+        import report_data
+        datasets = [report_data.financial_summary(self.invoices[i:i + 6]) for i in range(3)]
+        expected = []
+        for data in datasets:
+            expected.append(self._png_bytes(data))
+        for name in os.listdir(self.temp_dir.name):
+            os.remove(os.path.join(self.temp_dir.name, name))
+        
+        templates, results = {}, {}
+        def render(i):
+            results[i] = self._png_bytes(datasets[i % 3])
+            templates[i] = list(self.ReportGenerator._thread_templates().values())
+        threads = [threading.Thread(target=render, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual([results[i] for i in range(6)], [expected[i % 3] for i in range(6)])
+        owned = [id(template) for i in range(6) for template in templates[i]]
+        self.assertEqual(len(owned), len(set(owned)))
+    
+    def test_template_and_fresh_figure_save_alike(self):
+        """Test both render paths crop the saved image the same way, as they share a cache file name"""
+        import struct
+        import report_data
+        data = report_data.financial_summary(self.invoices[:6])
+        sizes = []
+        for use_templates in (True, False):
+            self.ReportGenerator.USE_TEMPLATES = use_templates
+            try:
+                for name in os.listdir(self.temp_dir.name):
+                    os.remove(os.path.join(self.temp_dir.name, name))
+                png = self._png_bytes(data)
+            finally:
+                self.ReportGenerator.USE_TEMPLATES = True
+            sizes.append(struct.unpack('>II', png[16:24]))  # IHDR width and height
+        self.assertEqual(sizes[0], sizes[1])
+
+class TestReportPacks(unittest.TestCase):
+    """Test per-coordinator report packs"""
+    
+    def setUp(self):
+        """Set up two coordinators' data and a temporary output directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.coordinators = [TripCoordinator("C001", "alice", "pass", "Alice"),
+                             TripCoordinator("C002", "bob", "pass", "Bob")]
+        self.trips, self.invoices = [], []
+        for i in range(6):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, self.coordinators[i % 2])
+            trip.travellers.append(Traveller(f"TR{i}", "Name", "Address", datetime(1980 + i, 1, 1), "Contact", "GOV"))
+            self.trips.append(trip)
+            self.invoices.append(Invoice(f"INV{i}", trip, datetime(2025, 1 + i, 1), 100.0 * (i + 1)))
+        self.trips.append(Trip("T9", "Unassigned", datetime(2025, 1, 1), 3))
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def _build(self, as_of=datetime(2025, 8, 1), **kwargs):
+        from report_batch import build_report_packs
+        from report_generator import RenderOptions
+        return build_report_packs(self.trips, self.invoices, self.temp_dir.name,
+                                  options=RenderOptions(dpi=30, figsize=(6, 4)), as_of=as_of, **kwargs)
+    
+    def test_partition_by_coordinator(self):
+        """Test trips, invoices and travellers are split by coordinator"""
+        from report_batch import partition_by_coordinator
+        partitions = partition_by_coordinator(self.trips, self.invoices)
+        
+        self.assertEqual(sorted(partitions), ["C001", "C002"])
+        self.assertEqual([t.trip_id for t in partitions["C002"]['trips']], ["T1", "T3", "T5"])
+        self.assertEqual([i.invoice_id for i in partitions["C001"]['invoices']], ["INV0", "INV2", "INV4"])
+        self.assertEqual(len(partitions["C001"]['travellers']), 3)
+    
+    def test_only_changed_packs_rerendered(self):
+        """Test unchanged packs are skipped and changed ones replace their charts"""
+        import json
+        from report_batch import PACK_MANIFEST, PACK_REPORTS
+        self.assertEqual(self._build(workers=1), {"C001": "rendered", "C002": "rendered"})
+        with open(os.path.join(self.temp_dir.name, "C002", PACK_MANIFEST)) as f:
+            before = json.load(f)
+        self.assertEqual(sorted(before['files']), sorted(PACK_REPORTS))
+        
+        self.assertEqual(self._build(workers=1), {"C001": "unchanged", "C002": "unchanged"})
+        
+        self.invoices[1].add_payment(50.0, datetime(2025, 7, 1), "Card")
+        self.assertEqual(self._build(workers=1), {"C001": "unchanged", "C002": "rendered"})
+        with open(os.path.join(self.temp_dir.name, "C002", PACK_MANIFEST)) as f:
+            after = json.load(f)
+        self.assertNotEqual(after['files']['financial_summary'], before['files']['financial_summary'])
+        self.assertEqual(after['files']['trip_stats'], before['files']['trip_stats'])
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "C002", before['files']['financial_summary'])))
+    
+    def test_unchanged_packs_are_not_rerendered_the_next_day(self):
+        """Test the pack fingerprint depends on the input data, not the run date"""
+        self.assertEqual(self._build(workers=1), {"C001": "rendered", "C002": "rendered"})
+        self.assertEqual(self._build(workers=1, as_of=datetime(2025, 8, 2)), {"C001": "unchanged", "C002": "unchanged"})
+    
+    def test_packs_leave_the_shared_reports_dir_alone(self):
+        """Test pack renders pass their directory along instead of changing REPORTS_DIR"""
+        from unittest import mock
+        from report_generator import ReportGenerator
+        shared = os.path.join(self.temp_dir.name, "shared")
+        original_dir, render_report = ReportGenerator.REPORTS_DIR, ReportGenerator.render_report
+        seen = []
+        def checking_render(*args, **kwargs):
+            seen.append(ReportGenerator.REPORTS_DIR)
+            return render_report(*args, **kwargs)
+        ReportGenerator.REPORTS_DIR = shared
+        try:
+            with mock.patch.object(ReportGenerator, 'render_report', side_effect=checking_render):
+                self._build(workers=1)
+        finally:
+            ReportGenerator.REPORTS_DIR = original_dir
+        
+        self.assertEqual(set(seen), {shared})
+        self.assertFalse(os.path.exists(shared))
+    
+    def test_parallel_workers_render_packs(self):
+        """Test packs rendered in worker processes land in each coordinator's directory"""
+        self.assertEqual(self._build(workers=2), {"C001": "rendered", "C002": "rendered"})
+        for coordinator_id in ("C001", "C002"):
+            names = os.listdir(os.path.join(self.temp_dir.name, coordinator_id))
+            self.assertEqual(len([name for name in names if name.endswith('.png')]), 5)
+
+class TestDashboard(DataFileTestCase):
+    """Test the single-file HTML dashboard"""
+    
+    def setUp(self):
+        super().setUp()
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord <A&B>")
+        self.dm.save_user(coordinator)
+        for i in range(3):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 1 + i, 1), 7, coordinator)
+            traveller = Traveller(f"TR{i}", "Name", "Address", datetime(1980 + i, 1, 1), "Contact", "GOV")
+            self.dm.save_traveller(traveller)
+            trip.travellers.append(traveller)
+            self.dm.save_trip(trip)
+            invoice = Invoice(f"INV{i}", trip, datetime(2025, 1 + i, 1), 100.0 * (i + 1))
+            invoice.add_payment(50.0, datetime.now(), "Card")
+            self.dm.save_invoice(invoice)
+        self.output_path = os.path.join(self.temp_dir.name, "dashboard.html")
+    
+    def test_dashboard_is_self_contained(self):
+        """Test every report section is inline SVG in one HTML file"""
+        import dashboard
+        path = dashboard.generate_dashboard(output_path=self.output_path)
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        
+        for heading in ("Trips", "Finance", "Travellers", "Revenue"):
+            self.assertIn(f"<h2>{heading}</h2>", html)
+        self.assertEqual(html.count("<svg"), 9)
+        self.assertNotIn("<img", html)
+        self.assertNotIn("src=", html)
+        self.assertIn("£600.00", html)
+    
+    def test_names_are_escaped(self):
+        """Test user-provided names cannot inject markup"""
+        import dashboard
+        with open(dashboard.generate_dashboard(output_path=self.output_path), encoding='utf-8') as f:
+            html = f.read()
+        
+        self.assertIn("Coord &lt;A&amp;B&gt;", html)
+        self.assertNotIn("<A&B>", html)
+    
+    def test_data_is_loaded_once(self):
+        """Test that generating the dashboard parses each data file only once"""
+        from unittest import mock
+        import dashboard
+        with mock.patch.object(self.dm, '_parse_json_file', wraps=self.dm._parse_json_file) as parse:
+            dashboard.generate_dashboard(output_path=self.output_path)
+        self.assertEqual(sorted(call.args[0] for call in parse.call_args_list),
+                         sorted([self.dm.USER_FILE, self.dm.TRAVELLER_FILE, self.dm.TRIP_FILE, self.dm.INVOICE_FILE]))
+    
+    def test_negative_bars_hang_below_zero(self):
+        """Test a negative value (e.g. an overpaid balance) draws a bar below the axis, not a negative height"""
+        import re
+        import dashboard
+        svg = dashboard.bar_chart(["Revenue", "Paid", "Outstanding"], [100.0, 130.0, -30.0], "Balance")
+        bars = [(float(y), float(h)) for y, h in re.findall(r'<rect x="[^"]+" y="([^"]+)" width="[^"]+" height="([^"]+)"', svg)]
+        self.assertTrue(all(height >= 0 for _, height in bars))
+        zero = bars[0][0] + bars[0][1]  # a positive bar ends at zero
+        self.assertAlmostEqual(bars[1][0] + bars[1][1], zero, places=0)
+        self.assertAlmostEqual(bars[2][0], zero, places=0)  # the negative bar starts there
+        self.assertIn('class="tick">-', svg)
+    
+    def test_dashboard_does_not_import_matplotlib(self):
+        """Test the dashboard is produced without loading matplotlib"""
+        import subprocess
+        import sys
+        code = ("import os, sys, data_manager, dashboard\n"
+                "for name in dir(data_manager):\n"
+                "    if name.endswith('_FILE'):\n"
+                "        setattr(data_manager, name, os.path.join(sys.argv[1], os.path.basename(getattr(data_manager, name))))\n"
+                "data_manager.DATA_DIR = sys.argv[1]\n"
+                "dashboard.main(['--output', sys.argv[2]])\n"
+                "sys.exit(3 if 'matplotlib' in sys.modules else 0)")
+        result = subprocess.run([sys.executable, '-c', code, self.temp_dir.name, self.output_path],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(os.path.exists(self.output_path))
+
+class TestRouteGraph(DataFileTestCase):
+    """Test the route graph and cheapest-route queries"""
+    
+    def _graph(self):
+        from route_graph import RouteGraph
+        graph = RouteGraph()
+        graph.add_leg("London", "Paris", TransportMode.TRAIN, 120.0, "Eurostar")
+        graph.add_leg("London", "Paris", TransportMode.FLIGHT, 90.0, "BA")
+        graph.add_leg("Paris", "Rome", TransportMode.TRAIN, 150.0, "Trenitalia")
+        graph.add_leg("Paris", "Rome", TransportMode.FLIGHT, 80.0, "Alitalia")
+        graph.add_leg("London", "Rome", TransportMode.FLIGHT, 300.0, "BA")
+        return graph
+    
+    def test_cheapest_route_and_mode_restriction(self):
+        """Test Dijkstra picks the cheapest path and honours allowed modes"""
+        graph = self._graph()
+        route = graph.cheapest_route("london", "  ROME ")
+        
+        self.assertEqual(route['total_cost'], 170.0)
+        self.assertEqual([(hop['from'], hop['to'], hop['mode']) for hop in route['hops']],
+                         [("London", "Paris", "Flight"), ("Paris", "Rome", "Flight")])
+        self.assertEqual(graph.cheapest_route("London", "Rome", modes=[TransportMode.TRAIN])['total_cost'], 270.0)
+        self.assertIsNone(graph.cheapest_route("London", "Rome", modes=["Bus"]))
+        self.assertIsNone(graph.cheapest_route("Rome", "London"))
+    
+    def test_min_and_median_edge_costs(self):
+        """Test each edge keeps min and median cost per mode"""
+        graph = self._graph()
+        graph.add_leg("London", "Paris", TransportMode.TRAIN, 60.0, "Eurostar")
+        graph.add_leg("London", "Paris", TransportMode.TRAIN, 200.0, "Eurostar")
+        options = graph.edge_options("London", "Paris")
+        
+        self.assertEqual(options['Train']['min_cost'], 60.0)
+        self.assertEqual(options['Train']['median_cost'], 120.0)
+        self.assertEqual(graph.cheapest_route("London", "Paris", weight='median')['hops'][0]['mode'], "Flight")
+        self.assertTrue(graph.remove_leg("London", "Paris", TransportMode.TRAIN, 60.0, "Eurostar"))
+        self.assertEqual(graph.edge_options("London", "Paris")['Train']['median_cost'], 160.0)
+        with self.assertRaises(ValueError):
+            graph.cheapest_route("London", "Paris", weight='max')
+    
+    def test_graph_follows_saved_and_deleted_trips(self):
+        """Test the shared graph is updated incrementally by save_trip and delete_trip"""
+        import route_graph
+        route_graph.reset_route_graph()
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        trip = Trip("T1", "Trip", datetime(2025, 3, 1), 5, coordinator)
+        trip.trip_legs.append(TripLeg("L1", 1, "Leeds", "York", "Northern", TransportMode.TRAIN,
+                                      TripLegType.TRANSFER, cost=15.0))
+        self.dm.save_trip(trip)
+        try:
+            graph = route_graph.get_route_graph()
+            self.assertEqual(graph.cheapest_route("Leeds", "York")['total_cost'], 15.0)
+            
+            trip.trip_legs[0].cost = 9.0
+            trip.trip_legs.append(TripLeg("L2", 2, "York", "Hull", "Northern", TransportMode.TRAIN,
+                                          TripLegType.TRANSFER, cost=11.0))
+            self.dm.save_trip(trip)
+            self.assertEqual(graph.cheapest_route("Leeds", "Hull")['total_cost'], 20.0)
+            self.assertEqual(graph.leg_count, 2)
+            
+            trip.trip_legs.pop()
+            self.dm.save_trip(trip)
+            self.assertEqual(graph.names, route_graph.RouteGraph.from_records(self.dm._load_json(self.dm.TRIP_FILE)).names)
+            self.assertIsNone(graph.cheapest_route("Hull", "Hull"))
+            
+            self.dm.delete_trip("T1")
+            self.assertIsNone(graph.cheapest_route("Leeds", "Hull"))
+            self.assertEqual((graph.leg_count, graph.names), (0, {}))
+        finally:
+            route_graph.reset_route_graph()
+    
+    def test_saves_wait_for_shared_graph_queries(self):
+        """Test a save from another thread is applied only after a shared_route_graph() block ends"""
+        import threading
+        import route_graph
+        route_graph.reset_route_graph()
+        trip = Trip("T1", "Trip", datetime(2025, 3, 1), 5, None)
+        trip.trip_legs.append(TripLeg("L1", 1, "Leeds", "York", "Northern", TransportMode.TRAIN,
+                                      TripLegType.TRANSFER, cost=15.0))
+        self.dm.save_trip(trip)
+        trip.trip_legs[0].cost = 4.0
+        saver = threading.Thread(target=self.dm.save_trip, args=(trip,))
+        try:
+            with route_graph.shared_route_graph() as graph:
+                saver.start()
+                saver.join(0.3)
+                self.assertTrue(saver.is_alive())
+                self.assertEqual(graph.cheapest_route("Leeds", "York")['total_cost'], 15.0)
+            saver.join()
+            self.assertEqual(graph.cheapest_route("Leeds", "York")['total_cost'], 4.0)
+        finally:
+            route_graph.reset_route_graph()
+    
+    def test_graph_follows_writes_from_other_processes(self):
+        """Test legs written to trips.json by another process show up in the shared graph"""
+        import route_graph
+        route_graph.reset_route_graph()
+        trip = Trip("T1", "Trip", datetime(2025, 3, 1), 5, None)
+        trip.trip_legs.append(TripLeg("L1", 1, "Leeds", "York", "Northern", TransportMode.TRAIN,
+                                      TripLegType.TRANSFER, cost=15.0))
+        self.dm.save_trip(trip)
+        try:
+            self.assertEqual(route_graph.get_route_graph().cheapest_route("Leeds", "York")['total_cost'], 15.0)
+            self.write_trips_behind(lambda records: records[0]['trip_legs'][0].update(cost=4.0))
+            self.assertEqual(route_graph.get_route_graph().cheapest_route("Leeds", "York")['total_cost'], 4.0)
+        finally:
+            route_graph.reset_route_graph()
+
+class TestItineraryValidation(DataFileTestCase):
+    """Test itinerary continuity validation"""
+    
+    def _trip(self, trip_id, stops, sequences=None):
+        trip = Trip(trip_id, f"Trip {trip_id}", datetime(2025, 4, 1), 5, TripCoordinator("C001", "coord", "pass", "Coord"))
+        for i, (start, destination) in enumerate(stops):
+            sequence = sequences[i] if sequences else i + 1
+            trip.trip_legs.append(TripLeg(f"{trip_id}L{i}", sequence, start, destination, "Provider",
+                                          TransportMode.TRAIN, TripLegType.TRANSFER, cost=10.0))
+        return trip
+    
+    def test_batch_validation_finds_each_issue(self):
+        """Test missing legs, duplicate sequences and broken continuity are reported per trip"""
+        from itinerary_validator import validate_trips
+        trips = [
+            self._trip("OK", [("London", "Paris"), ("paris ", "Rome")]),
+            self._trip("EMPTY", []),
+            self._trip("DUP", [("London", "Paris"), ("Paris", "Rome")], sequences=[1, 1]),
+            # Legs stored out of order are checked by sequence
+            self._trip("GAP", [("Rome", "Milan"), ("London", "Paris")], sequences=[2, 1]),
+        ]
+        issues = validate_trips(trips)
+        
+        self.assertNotIn("OK", issues)
+        self.assertEqual(issues["EMPTY"], ["Trip has no legs"])
+        self.assertEqual(issues["DUP"], ["Sequence 1 is used by more than one leg"])
+        self.assertEqual(issues["GAP"], ["Leg 2 starts at Rome but leg 1 ends at Paris"])
+    
+    def test_audit_revalidates_on_save(self):
+        """Test the shared audit follows save_trip and delete_trip"""
+        import itinerary_validator
+        itinerary_validator.reset_itinerary_audit()
+        trip = self._trip("T1", [("London", "Paris"), ("Lyon", "Rome")])
+        self.dm.save_trip(trip)
+        try:
+            audit = itinerary_validator.get_itinerary_audit()
+            self.assertEqual(len(audit.issues_for("T1")), 1)
+            
+            trip.trip_legs[1].start_location = "Paris"
+            self.dm.save_trip(trip)
+            self.assertEqual(audit.issues_for("T1"), [])
+            
+            self.dm.save_trip(self._trip("T2", []))
+            self.assertEqual(audit.issues_for("T2"), ["Trip has no legs"])
+            self.dm.delete_trip("T2")
+            self.assertNotIn("T2", audit.issues)
+        finally:
+            itinerary_validator.reset_itinerary_audit()
+    
+    def test_audit_follows_writes_from_other_processes(self):
+        """Test a leg fixed in trips.json by another process clears the shared audit's issue"""
+        import itinerary_validator
+        itinerary_validator.reset_itinerary_audit()
+        self.dm.save_trip(self._trip("T1", [("London", "Paris"), ("Lyon", "Rome")]))
+        try:
+            self.assertEqual(len(itinerary_validator.get_itinerary_audit().issues_for("T1")), 1)
+            self.write_trips_behind(lambda records: records[0]['trip_legs'][1].update(start_location="Paris"))
+            self.assertEqual(itinerary_validator.get_itinerary_audit().issues_for("T1"), [])
+        finally:
+            itinerary_validator.reset_itinerary_audit()
+    
+    def test_saves_wait_for_shared_audit_reads(self):
+        """Test a save from another thread is applied only after a shared_itinerary_audit() block ends"""
+        import threading
+        import itinerary_validator
+        itinerary_validator.reset_itinerary_audit()
+        self.dm.save_trip(self._trip("T1", [("London", "Paris"), ("Lyon", "Rome")]))
+        saver = threading.Thread(target=self.dm.save_trip,
+                                 args=(self._trip("T1", [("London", "Paris"), ("Paris", "Rome")]),))
+        try:
+            with itinerary_validator.shared_itinerary_audit() as audit:
+                saver.start()
+                saver.join(0.3)
+                self.assertTrue(saver.is_alive())
+                self.assertEqual(len(audit.issues_for("T1")), 1)
+            saver.join()
+            self.assertEqual(audit.issues_for("T1"), [])
+        finally:
+            itinerary_validator.reset_itinerary_audit()
+    
+    def test_audit_command(self):
+        """Test the batch audit command's output and exit status"""
+        import io
+        from contextlib import redirect_stdout
+        import itinerary_validator
+        self.dm.save_trip(self._trip("T1", [("London", "Paris"), ("Paris", "Rome")]))
+        self.dm.save_trip(self._trip("T2", [("London", "Paris"), ("Lyon", "Rome")]))
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = itinerary_validator.main([])
+        self.assertEqual(status, 1)
+        self.assertIn("T2 (Trip T2):", output.getvalue())
+        self.assertIn("2 trip(s) checked, 1 with issues.", output.getvalue())
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(itinerary_validator.main(["--trip-id", "T1"]), 0)
+
+class TestBookingIndex(DataFileTestCase):
+    """Test traveller double-booking detection"""
+    
+    def _record(self, trip_id, day, duration, traveller_ids):
+        return {'trip_id': trip_id, 'start_date': datetime(2025, 6, day).isoformat(),
+                'duration_days': duration, 'traveller_ids': traveller_ids}
+    
+    def test_index_finds_overlapping_bookings(self):
+        """Test lookups return only trips whose date ranges overlap"""
+        from booking_index import BookingIndex, trip_interval
+        index = BookingIndex.from_records([
+            self._record("A", 1, 10, ["TR1"]),   # 1-10 June
+            self._record("B", 12, 3, ["TR1"]),   # 12-14 June
+            self._record("C", 20, 2, ["TR2"]),
+        ])
+        
+        self.assertEqual(index.conflicts("TR1", *trip_interval(self._record("X", 9, 5, []))), ["A", "B"])
+        self.assertEqual(index.conflicts("TR1", *trip_interval(self._record("X", 11, 1, []))), [])
+        self.assertEqual(index.conflicts("TR1", *trip_interval(self._record("X", 15, 5, []))), [])
+        self.assertEqual(index.conflicts("TR1", *trip_interval(self._record("A", 5, 2, []))), ["A"])
+        self.assertEqual(index.conflicts("TR1", *trip_interval(self._record("A", 5, 2, [])), "A"), [])
+    
+    def test_sweep_matches_pairwise_comparison(self):
+        """Test the batch conflict report finds exactly the overlapping pairs"""
+        import random
+        from booking_index import booking_conflicts, trip_interval
+        rng = random.Random(3)
+        records = [self._record(f"T{i}", rng.randint(1, 28), rng.randint(1, 5), rng.sample(["A", "B", "C"], 2))
+                   for i in range(40)]
+        expected = set()
+        for i, first in enumerate(records):
+            for second in records[i + 1:]:
+                (a_start, a_end), (b_start, b_end) = trip_interval(first), trip_interval(second)
+                if a_start < b_end and b_start < a_end:
+                    for traveller_id in set(first['traveller_ids']) & set(second['traveller_ids']):
+                        expected.add((traveller_id, frozenset((first['trip_id'], second['trip_id']))))
+        
+        found = {(c['traveller_id'], frozenset(c['trip_ids'])) for c in booking_conflicts(records)}
+        self.assertEqual(found, expected)
+    
+    def test_window_narrows_when_longest_booking_is_removed(self):
+        """Test removing a traveller's longest trip leaves the index equal to a rebuild"""
+        from booking_index import BookingIndex
+        records = [self._record("T1", 1, 20, ["A"]), self._record("T2", 25, 2, ["A"]), self._record("T3", 27, 3, ["A"])]
+        index = BookingIndex.from_records(records)
+        self.assertEqual(index.longest["A"], 20)
+        
+        index.on_trip_change(records[0], None)
+        rebuilt = BookingIndex.from_records(records[1:])
+        self.assertEqual((index.bookings, index.longest), (rebuilt.bookings, rebuilt.longest))
+        self.assertEqual(index.longest["A"], 3)
+    
+    def test_saves_wait_for_shared_index_queries(self):
+        """Test a save from another thread is applied only after a shared_booking_index() block ends"""
+        import threading
+        import booking_index
+        booking_index.reset_booking_index()
+        self.dm.save_traveller(Traveller("TR1", "Jo", "Address", datetime(1990, 1, 1), "Contact", "GOV1"))
+        self.dm.save_trip(Trip("T1", "June", datetime(2025, 6, 1), 10, None))
+        window = booking_index.trip_interval(self._record("X", 5, 1, []))
+        saver = threading.Thread(target=self.dm.assign_traveller_to_trip, args=("T1", "TR1"))
+        try:
+            with booking_index.shared_booking_index() as index:
+                saver.start()
+                saver.join(0.3)
+                self.assertTrue(saver.is_alive())
+                self.assertEqual(index.conflicts("TR1", *window), [])
+            saver.join()
+            self.assertEqual(index.conflicts("TR1", *window), ["T1"])
+        finally:
+            booking_index.reset_booking_index()
+    
+    def test_assignment_rejected_when_overlapping(self):
+        """Test assign_traveller_to_trip(allow_overlap=False) uses the index kept up to date by saves"""
+        import booking_index
+        booking_index.reset_booking_index()
+        coordinator = TripCoordinator("C001", "coord", "pass", "Coord")
+        traveller = Traveller("TR1", "Jo", "Address", datetime(1990, 1, 1), "Contact", "GOV1")
+        self.dm.save_traveller(traveller)
+        self.dm.save_trip(Trip("T1", "June", datetime(2025, 6, 1), 10, coordinator))
+        self.dm.save_trip(Trip("T2", "Overlap", datetime(2025, 6, 5), 3, coordinator))
+        self.dm.save_trip(Trip("T3", "July", datetime(2025, 7, 1), 3, coordinator))
+        try:
+            self.assertTrue(self.dm.assign_traveller_to_trip("T1", "TR1", allow_overlap=False))
+            self.assertFalse(self.dm.assign_traveller_to_trip("T2", "TR1", allow_overlap=False))
+            self.assertTrue(self.dm.assign_traveller_to_trip("T3", "TR1", allow_overlap=False))
+            
+            self.dm.remove_traveller_from_trip("T1", "TR1")
+            self.assertTrue(self.dm.assign_traveller_to_trip("T2", "TR1", allow_overlap=False))
+            self.assertTrue(self.dm.assign_traveller_to_trip("T1", "TR1"))
+            self.assertEqual(len(booking_index.booking_conflicts(self.dm.iter_json_records(self.dm.TRIP_FILE))), 1)
+        finally:
+            booking_index.reset_booking_index()
+    
+    def test_index_follows_writes_from_other_processes(self):
+        """Test a booking written to trips.json behind the index's back is still seen as a conflict"""
+        import booking_index
+        booking_index.reset_booking_index()
+        self.dm.save_traveller(Traveller("TR1", "Jo", "Address", datetime(1990, 1, 1), "Contact", "GOV1"))
+        self.dm.save_trip(Trip("T1", "June", datetime(2025, 6, 1), 10, None))
+        self.dm.save_trip(Trip("T2", "Overlap", datetime(2025, 6, 5), 3, None))
+        write_behind = self.write_trips_behind
+        try:
+            index = booking_index.get_booking_index()
+            self.dm.save_trip(Trip("T3", "July", datetime(2025, 7, 1), 3, None))
+            self.assertIs(booking_index.get_booking_index(), index)  # own saves are applied, not rebuilt
+            
+            write_behind(lambda records: records[0]['traveller_ids'].append("TR1"))
+            self.assertFalse(self.dm.assign_traveller_to_trip("T2", "TR1", allow_overlap=False))
+            
+            # A write from elsewhere followed by one of ours: the delta alone is not enough
+            write_behind(lambda records: records[0].update(traveller_ids=[]))
+            booking_index.get_booking_index()
+            write_behind(lambda records: records[0]['traveller_ids'].append("TR1"))
+            self.dm.save_trip(Trip("T4", "August", datetime(2025, 8, 1), 3, None))
+            self.assertEqual(booking_index.get_booking_index().conflicts("TR1", *booking_index.trip_interval(
+                self._record("X", 2, 1, []))), ["T1"])
+        finally:
+            booking_index.reset_booking_index()
+
+class TestDailyOccupancy(DataFileTestCase):
+    """Test the per-day occupancy calendar"""
+    
+    def _trip(self, trip_id, day, duration, travellers, active=True):
+        trip = Trip(trip_id, f"Trip {trip_id}", datetime(2025, 6, day), duration,
+                    TripCoordinator("C001", "coord", "pass", "Coord"))
+        trip.is_active = active
+        trip.travellers = [Traveller(f"{trip_id}-{i}", "Name", "Address", datetime(1990, 1, 1), "Contact", "GOV")
+                           for i in range(travellers)]
+        return trip
+    
+    def test_counts_per_day(self):
+        """Test trips cover duration_days days and inactive trips are left out"""
+        import report_data
+        trips = [self._trip("A", 1, 3, 2), self._trip("B", 3, 2, 5), self._trip("C", 2, 5, 9, active=False)]
+        occupancy = report_data.daily_occupancy(trips)
+        
+        self.assertEqual(occupancy['days'], ['2025-06-01', '2025-06-02', '2025-06-03', '2025-06-04'])
+        self.assertEqual(occupancy['trips'], [1, 1, 2, 1])
+        self.assertEqual(occupancy['travellers'], [2, 2, 7, 5])
+        self.assertEqual((occupancy['peak_day'], occupancy['peak_travellers'], occupancy['peak_trips']),
+                         ('2025-06-03', 7, 2))
+        
+        window = report_data.daily_occupancy(trips, datetime(2025, 6, 2), datetime(2025, 6, 6))
+        self.assertEqual(window['travellers'], [2, 7, 5, 0, 0])
+    
+    def test_matches_day_by_day_count(self):
+        """Test the prefix-sum calendar equals counting every trip on every day"""
+        import random
+        from datetime import timedelta
+        import report_data
+        rng = random.Random(4)
+        trips = [self._trip(f"T{i}", rng.randint(1, 28), rng.randint(1, 10), rng.randint(0, 4)) for i in range(60)]
+        start, end = datetime(2025, 6, 5), datetime(2025, 6, 30)
+        occupancy = report_data.daily_occupancy(trips, start, end)
+        
+        expected = []
+        day = start
+        while day <= end:
+            expected.append(sum(len(t.travellers) for t in trips
+                                if t.start_date <= day < t.start_date + timedelta(days=t.duration_days)))
+            day += timedelta(days=1)
+        self.assertEqual(occupancy['travellers'], expected)
+    
+    def test_streamed_occupancy_matches_and_renders(self):
+        """Test chunked occupancy equals the in-memory calendar, exports and renders"""
+        import report_data
+        import report_export
+        from report_generator import ReportGenerator, RenderOptions
+        for i, (day, duration, travellers) in enumerate([(1, 3, 2), (3, 2, 5), (10, 4, 1)]):
+            trip = self._trip(f"T{i}", day, duration, travellers)
+            for traveller in trip.travellers:
+                self.dm.save_traveller(traveller)
+            self.dm.save_trip(trip)
+        
+        streamed = report_data.stream_daily_occupancy(chunk_size=2)
+        self.assertEqual(streamed, report_data.daily_occupancy(self.dm.load_trips()))
+        rows = list(report_export.report_rows('daily_occupancy', streamed))
+        self.assertIn(('travellers', '2025-06-03', 7), rows)
+        
+        original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = self.temp_dir.name
+        try:
+            success, path = ReportGenerator.generate_daily_occupancy(self.dm.load_trips(), RenderOptions(dpi=50))
+        finally:
+            ReportGenerator.REPORTS_DIR = original_dir
+        self.assertTrue(success)
+        self.assertTrue(os.path.exists(path))
+
+class TestStartDateIndex(DataFileTestCase):
+    """Test the persisted start-date index and the departures agenda"""
+    
+    def _save_trips(self):
+        coordinators = [TripCoordinator("C001", "alice", "pass", "Alice"), TripCoordinator("C002", "bob", "pass", "Bob")]
+        for coordinator in coordinators:
+            self.dm.save_user(coordinator)
+        trips = []
+        for i, day in enumerate([20, 3, 11, 3, 28, 15]):
+            trip = Trip(f"T{i}", f"Trip {i}", datetime(2025, 6, day), 4, coordinators[i % 2])
+            trip.is_active = i != 5
+            self.dm.save_trip(trip)
+            trips.append(trip)
+        return trips
+    
+    def test_range_query_follows_writes(self):
+        """Test range queries stay ordered and current through saves, assignments and deletes"""
+        trips = self._save_trips()
+        found = self.dm.trips_starting_between(datetime(2025, 6, 3), datetime(2025, 6, 20))
+        self.assertEqual([e['trip_id'] for e in found], ["T1", "T3", "T2", "T5"])
+        
+        trips[4].start_date = datetime(2025, 6, 5)
+        self.dm.save_trip(trips[4])
+        self.dm.delete_trip("T2")
+        traveller = Traveller("TR1", "Jo", "Address", datetime(1990, 1, 1), "Contact", "GOV1")
+        self.dm.save_traveller(traveller)
+        self.dm.assign_traveller_to_trip("T3", "TR1")
+        found = self.dm.trips_starting_between(datetime(2025, 6, 3), datetime(2025, 6, 20))
+        
+        self.assertEqual([e['trip_id'] for e in found], ["T1", "T3", "T4", "T5"])
+        self.assertEqual(found[1]['traveller_count'], 1)
+        self.assertEqual([e['trip_id'] for e in self.dm.trips_starting_between(
+            datetime(2025, 6, 1), datetime(2025, 7, 1), coordinator_id="C002")], ["T1", "T3", "T5"])
+        self.assertEqual(self.dm._load_json(self.dm.START_INDEX_FILE), self.dm.rebuild_start_index())
+    
+    def test_missing_or_replaced_index_is_reread(self):
+        """Test the index is rebuilt when missing and re-read when the file changes"""
+        self._save_trips()
+        os.remove(self.dm.START_INDEX_FILE)
+        self.assertEqual(len(self.dm.trips_starting_between(datetime(2025, 6, 1), datetime(2025, 7, 1))), 6)
+        
+        entries = self.dm._load_json(self.dm.START_INDEX_FILE)
+        self.dm._save_json(self.dm.START_INDEX_FILE, entries[:2])
+        self.assertEqual(len(self.dm.trips_starting_between(datetime(2025, 6, 1), datetime(2025, 7, 1))), 2)
+    
+    def test_agenda_export(self):
+        """Test the non-interactive agenda skips inactive trips and resolves coordinator names"""
+        import csv
+        import io
+        from contextlib import redirect_stdout
+        import agenda
+        self._save_trips()
+        output = os.path.join(self.temp_dir.name, "agenda.csv")
+        with redirect_stdout(io.StringIO()):
+            status = agenda.main(["--from", "2025-06-10", "--days", "10", "--output", output])
+        
+        self.assertEqual(status, 0)
+        with open(output, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(r['start_date'], r['trip_id'], r['coordinator']) for r in rows],
+                         [("2025-06-11", "T2", "Alice")])
+        with self.assertRaises(ValueError):
+            agenda.upcoming_departures(0)
+
+class TestCommandLine(DataFileTestCase):
+    """Test the non-interactive command-line interface"""
+    
+    def _run(self, *argv):
+        import io
+        from contextlib import redirect_stdout, redirect_stderr
+        import cli
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = cli.main(list(argv))
+        return status, out.getvalue(), err.getvalue()
+    
+    def test_travellers_import(self):
+        """Test CSV import adds and updates travellers and rejects invalid files without writing"""
+        good = os.path.join(self.temp_dir.name, "good.csv")
+        with open(good, 'w') as f:
+            f.write("traveller_id,name,date_of_birth,government_id\nTR1,Ann Lee,1990-02-03,G1\n,Bob Ray,1985-11-30,G2\n")
+        bad = os.path.join(self.temp_dir.name, "bad.csv")
+        with open(bad, 'w') as f:
+            f.write("name,date_of_birth\nCy,1990-13-01\n,1990-01-01\n")
+        
+        self.assertEqual(self._run("travellers", "import", good, "--dry-run")[0], 0)
+        self.assertEqual(self.dm.load_travellers(), [])
+        status, out, _ = self._run("travellers", "import", good)
+        self.assertEqual((status, out.strip()), (0, "Imported 2 traveller(s): 2 added, 0 updated."))
+        status, out, _ = self._run("travellers", "import", good)
+        self.assertIn("0 added, 2 updated", out)
+        
+        status, _, err = self._run("travellers", "import", bad)
+        self.assertEqual(status, 1)
+        self.assertIn("line 2: invalid date_of_birth", err)
+        self.assertIn("line 3: name is empty", err)
+        self.assertEqual(len(self.dm.load_travellers()), 2)
+    
+    def test_trips_list_filters_and_json_lines(self):
+        """Test trip listing by coordinator username, date range and as JSON Lines"""
+        import json
+        coordinators = [TripCoordinator("C001", "alice", "pass", "Alice"), TripCoordinator("C002", "bob", "pass", "Bob")]
+        for coordinator in coordinators:
+            self.dm.save_user(coordinator)
+        for i in range(4):
+            self.dm.save_trip(Trip(f"T{i}", f"Trip {i}", datetime(2025, 6, 1) + timedelta(days=10 * i), 3, coordinators[i % 2]))
+        # Saved after T1 and T2 but starts between them
+        self.dm.save_trip(Trip("T4", "Trip 4", datetime(2025, 6, 15), 3, coordinators[0]))
+        
+        status, out, _ = self._run("trips", "list", "--coordinator", "alice", "--json")
+        self.assertEqual(status, 0)
+        self.assertEqual([json.loads(line)['trip_id'] for line in out.splitlines()], ["T0", "T2", "T4"])
+        status, out, _ = self._run("trips", "list", "--from", "2025-06-11", "--to", "2025-06-21")
+        self.assertEqual([line.split("\t")[:2] for line in out.splitlines()],
+                         [["T1", "2025-06-11"], ["T4", "2025-06-15"], ["T2", "2025-06-21"]])
+        self.assertEqual(self._run("trips", "list", "--coordinator", "nobody")[0], 1)
+    
+    def test_reports_render_and_usage_errors(self):
+        """Test reports render writes charts and usage errors exit with status 2"""
+        from report_generator import ReportGenerator
+        self.dm.save_trip(Trip("T1", "Trip", datetime(2025, 6, 1), 3, TripCoordinator("C001", "a", "p", "Alice")))
+        original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = self.temp_dir.name
+        try:
+            status, out, _ = self._run("reports", "render", "daily_occupancy", "--dpi", "50")
+            self.assertEqual(self._run("reports", "render")[0], 2)
+            self.assertEqual(self._run("reports", "render", "nonsense")[0], 2)
+        finally:
+            ReportGenerator.REPORTS_DIR = original_dir
+        self.assertEqual(status, 0)
+        self.assertTrue(os.path.exists(out.strip()))
+        with self.assertRaises(SystemExit) as context:
+            self._run("trips", "delete")
+        self.assertEqual(context.exception.code, 2)
+    
+    def test_reports_render_on_empty_data_fails_cleanly(self):
+        """Test rendering with no data files reports each empty report and exits with status 1"""
+        from report_generator import ReportGenerator
+        original_dir = ReportGenerator.REPORTS_DIR
+        ReportGenerator.REPORTS_DIR = os.path.join(self.temp_dir.name, "reports")
+        try:
+            status, out, err = self._run("reports", "render", "daily_occupancy")
+            all_status, _, all_err = self._run("reports", "render", "--all")
+        finally:
+            ReportGenerator.REPORTS_DIR = original_dir
+        
+        self.assertEqual((status, out), (1, ""))
+        self.assertEqual(err.strip(), "daily_occupancy: No trip data available for occupancy.")
+        self.assertEqual(all_status, 1)
+        self.assertEqual(len(all_err.strip().splitlines()), 7)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "reports")))
+
+class TestAPIServer(DataFileTestCase):
+    """Test the JSON API server and its data cache"""
+    
+    def setUp(self):
+        super().setUp()
+        import threading
+        import booking_index
+        from server import APIServer
+        from models import Administrator
+        booking_index.reset_booking_index()
+        self.dm.save_user(Administrator("A001", "admin", hashlib.sha256(b"secret").hexdigest(), "Admin"))
+        self.dm.save_user(TripCoordinator("C001", "alice", hashlib.sha256(b"pw").hexdigest(), "Alice"))
+        self.dm.save_user(TripCoordinator("C002", "bob", hashlib.sha256(b"pw").hexdigest(), "Bob"))
+        self.server = APIServer(('127.0.0.1', 0), workers=2, quiet=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def tearDown(self):
+        import booking_index
+        self.server.shutdown()
+        self.server.server_close()
+        booking_index.reset_booking_index()
+        super().tearDown()
+    
+    def _request(self, method, path, body=None, token=None):
+        import http.client
+        import json
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        try:
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        return response.status, json.loads(data) if data else None
+    
+    def _login(self, username, password):
+        status, body = self._request('POST', '/login', {'username': username, 'password': password})
+        self.assertEqual(status, 200)
+        return body['token']
+    
+    def test_session_tokens(self):
+        """Test that endpoints need a valid token and logout revokes it"""
+        self.assertEqual(self._request('GET', '/trips')[0], 401)
+        self.assertEqual(self._request('POST', '/login', {'username': 'admin', 'password': 'wrong'})[0], 401)
+        token = self._login('admin', 'secret')
+        self.assertEqual(self._request('GET', '/trips', token=token), (200, []))
+        self.assertEqual(self._request('GET', '/nowhere', token=token)[0], 404)
+        self.assertEqual(self._request('DELETE', '/travellers', token=token)[0], 405)
+        self.assertEqual(self._request('POST', '/logout', token=token)[0], 204)
+        self.assertEqual(self._request('GET', '/trips', token=token)[0], 401)
+    
+    def test_trip_to_payment_flow_and_coordinator_scope(self):
+        """Test creating a trip, leg, assignment, invoice and payment, and that coordinators only see their trips"""
+        admin = self._login('admin', 'secret')
+        status, trip = self._request('POST', '/trips', {'name': 'Alps', 'start_date': '2025-06-01', 'duration_days': 5,
+                                                        'coordinator_id': 'C001'}, admin)
+        self.assertEqual((status, trip['coordinator_id']), (201, 'C001'))
+        trip_id = trip['trip_id']
+        self.assertEqual(self._request('POST', '/invoices', {'trip_id': trip_id}, admin)[0], 409)
+        status, leg = self._request('POST', f'/trips/{trip_id}/legs',
+                                    {'start_location': 'London', 'destination': 'Paris', 'transport_provider': 'Eurostar',
+                                     'transport_mode': 'Train', 'leg_type': 'Transfer Point', 'cost': 200}, admin)
+        self.assertEqual((status, leg['leg']['sequence'], leg['itinerary_issues']), (201, 1, []))
+        status, traveller = self._request('POST', '/travellers', {'name': 'Ann', 'date_of_birth': '1990-01-01'}, admin)
+        self.assertEqual(status, 201)
+        status, trip = self._request('POST', f'/trips/{trip_id}/travellers', {'traveller_id': traveller['traveller_id']}, admin)
+        self.assertEqual(trip['traveller_ids'], [traveller['traveller_id']])
+        
+        alice, bob = self._login('alice', 'pw'), self._login('bob', 'pw')
+        status, invoice = self._request('POST', '/invoices', {'trip_id': trip_id}, alice)
+        self.assertEqual((status, invoice['total_amount'], invoice['balance']), (201, 200.0, 200.0))
+        status, invoice = self._request('POST', f"/invoices/{invoice['invoice_id']}/payments", {'amount': 500}, alice)
+        self.assertEqual((invoice['balance'], invoice['status']), (0.0, 'Paid'))
+        self.assertEqual(self._request('GET', '/invoices?outstanding=true', token=alice), (200, []))
+        
+        self.assertEqual(self._request('GET', '/trips', token=bob), (200, []))
+        self.assertEqual(self._request('GET', f'/trips/{trip_id}', token=bob)[0], 404)
+        self.assertEqual(self._request('GET', '/reports/trip_stats', token=bob)[0], 403)
+        self.assertEqual(self._request('GET', '/reports/trip_stats', token=admin)[0], 200)
+    
+    def test_idle_keep_alive_connections_do_not_hold_workers(self):
+        """Test that idle keep-alive connections leave the workers free and are served again when they wake"""
+        import time
+        from load_test import hold_idle_connections, run_load_test
+        from server import IDLE_TIMEOUT
+        host, port = self.server.server_address[:2]
+        admin = self._login('admin', 'secret')
+        # Twice as many idle connections as workers; each used to hold its worker for IDLE_TIMEOUT seconds
+        idle = hold_idle_connections(host, port, admin, '/trips', 4)
+        try:
+            started = time.perf_counter()
+            result = run_load_test(host, port, admin, ['/trips', '/travellers'], 2, 20, idle=4)
+            self.assertLess(time.perf_counter() - started, IDLE_TIMEOUT / 3)
+            self.assertEqual((result['requests'], result['errors']), (20, 0))
+            for connection in idle:
+                connection.request('GET', '/trips', headers={'Authorization': f'Bearer {admin}'})
+                response = connection.getresponse()
+                self.assertEqual((response.status, response.read()), (200, b'[]'))
+        finally:
+            for connection in idle:
+                connection.close()
+    
+    def test_idle_connections_are_closed_after_idle_timeout(self):
+        """Test that the server closes a keep-alive connection left idle for longer than its idle timeout"""
+        import socket
+        import threading
+        from server import APIServer
+        server = APIServer(('127.0.0.1', 0), workers=1, quiet=True, idle_timeout=0.2)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with socket.create_connection(server.server_address[:2], timeout=10) as client:
+                client.sendall(b'GET /trips HTTP/1.1\r\nHost: test\r\n\r\n')
+                response = b''
+                while b'\r\n\r\n' not in response:
+                    response += client.recv(4096)
+                self.assertIn(b' 401 ', response.split(b'\r\n')[0])
+                # The body is short; read to the end of the stream, which comes when the server closes it
+                while client.recv(4096):
+                    pass
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    def test_cache_reloads_only_changed_files(self):
+        """Test that the data cache reuses parsed files until they change on disk"""
+        from server import DataCache
+        cache = DataCache()
+        self.dm.save_trip(Trip("T1", "First", datetime(2025, 6, 1), 3, None))
+        self.assertEqual([r['trip_id'] for r in cache.records('trips')], ["T1"])
+        cache.records('trips')
+        cache.get('trips', "T1")
+        self.assertEqual(cache.loads, 1)
+        
+        self.dm.save_trip(Trip("T2", "Second", datetime(2025, 7, 1), 3, None))
+        self.assertEqual(cache.get('trips', "T2")['name'], "Second")
+        self.assertEqual(cache.loads, 2)
+        calls = []
+        build = lambda: calls.append(1) or len(cache.records('trips'))
+        self.assertEqual((cache.derived('count', ('trips',), build), cache.derived('count', ('trips',), build)), (2, 2))
+        self.assertEqual(len(calls), 1)
+    
+    def test_cache_sees_same_size_save_in_same_tick(self):
+        """Test that a save renamed into place with the old mtime and size is still picked up"""
+        from server import DataCache
+        cache = DataCache()
+        self.dm.save_trip(Trip("T1", "Alpha", datetime(2025, 6, 1), 3, None))
+        self.assertEqual(cache.get('trips', "T1")['name'], "Alpha")
+        old = os.stat(self.dm.TRIP_FILE)
+        
+        self.dm.save_trip(Trip("T1", "Omega", datetime(2025, 6, 1), 3, None))
+        os.utime(self.dm.TRIP_FILE, ns=(old.st_atime_ns, old.st_mtime_ns))
+        self.assertEqual(os.stat(self.dm.TRIP_FILE).st_size, old.st_size)
+        self.assertEqual(cache.get('trips', "T1")['name'], "Omega")
+
+class TestFileLocking(DataFileTestCase):
+    """Test reader/writer locking of the data files"""
+    
+    def test_read_write_lock(self):
+        """Test that readers share the lock, writers exclude them, and reads cannot be upgraded"""
+        import threading
+        lock = self.dm.ReadWriteLock()
+        lock.acquire_read()
+        other_reader = threading.Thread(target=lambda: (lock.acquire_read(), lock.release_read()))
+        other_reader.start()
+        other_reader.join(timeout=5)
+        self.assertFalse(other_reader.is_alive())
+        with self.assertRaises(RuntimeError):
+            lock.acquire_write()
+        
+        written = threading.Event()
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), written.set(), lock.release_write()))
+        writer.start()
+        self.assertFalse(written.wait(timeout=0.2))
+        lock.release_read()
+        self.assertTrue(written.wait(timeout=5))
+        writer.join()
+        
+        lock.acquire_write()
+        lock.acquire_read()
+        lock.acquire_write()
+        lock.release_write()
+        lock.release_read()
+        lock.release_write()
+    
+    def test_concurrent_threads_lose_no_updates(self):
+        """Test many threads saving travellers, assigning them and invoicing keep every update"""
+        import threading
+        from benchmarks import _stress_writer
+        from models import Invoice
+        trip = Trip("SHARED", "Shared", datetime(2025, 1, 1), 3, None)
+        self.dm.save_trip(trip)
+        
+        def invoice_writer(worker):
+            for i in range(10):
+                self.dm.save_invoice(Invoice(f"INV{worker}-{i}", trip, datetime(2025, 1, 1), 10.0))
+        threads = [threading.Thread(target=_stress_writer, args=(self.temp_dir.name, w, 15)) for w in range(6)]
+        threads += [threading.Thread(target=invoice_writer, args=(w,)) for w in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(self.dm.load_travellers()), 90)
+        self.assertEqual(len(self.dm._load_json(self.dm.TRIP_FILE)[0]['traveller_ids']), 90)
+        self.assertEqual(len(self.dm._load_json(self.dm.INVOICE_FILE)), 30)
+        self.assertEqual(self.dm.load_monthly_rollups(), self.dm.rebuild_monthly_rollups())
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs fork() to share the patched data paths")
+    def test_concurrent_processes_lose_no_updates(self):
+        """Test writers in separate processes are serialised by the file locks"""
+        import multiprocessing
+        from benchmarks import _stress_writer
+        self.dm.save_trip(Trip("SHARED", "Shared", datetime(2025, 1, 1), 3, None))
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=_stress_writer, args=(self.temp_dir.name, w, 15)) for w in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+        
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        self.assertEqual(len(self.dm.load_travellers()), 60)
+        self.assertEqual(len(self.dm._load_json(self.dm.TRIP_FILE)[0]['traveller_ids']), 60)
+
+class TestAtomicWrites(DataFileTestCase):
+    """Test atomic saves and group-committed fsyncs"""
+    
+    def test_failed_save_keeps_previous_version(self):
+        """Test that a save failing mid-write leaves the old file intact and no temp file behind"""
+        path = self.dm.TRIP_FILE
+        self.dm._save_json(path, [{'trip_id': "T1"}])
+        with self.assertRaises(TypeError):
+            self.dm._save_json(path, [{'trip_id': "T2"}, {'trip_id': object()}])
+        self.assertEqual(self.dm._load_json(path), [{'trip_id': "T1"}])
+        self.assertFalse(os.path.exists(path + '.tmp'))
+    
+    def test_batched_writes_sync_each_file_once(self):
+        """Test that saves inside batched_writes() are synced once per file at the end of the outermost block"""
+        from unittest import mock
+        with mock.patch('os.fsync') as fsync:
+            for i in range(3):
+                self.dm._save_json(self.dm.TRAVELLER_FILE, [{'n': i}])
+            self.assertEqual(fsync.call_count, 6)  # file and directory per save
+            
+            fsync.reset_mock()
+            with self.dm.batched_writes():
+                for i in range(5):
+                    self.dm._save_json(self.dm.TRAVELLER_FILE, [{'n': i}])
+                with self.dm.batched_writes():
+                    self.dm._save_json(self.dm.USER_FILE, [])
+                self.assertEqual(fsync.call_count, 0)
+                self.assertEqual(self.dm._load_json(self.dm.TRAVELLER_FILE), [{'n': 4}])
+            self.assertEqual(fsync.call_count, 3)  # two files, one directory
+    
+    def test_truncated_file_is_not_overwritten(self):
+        """Test that a save refuses to replace a truncated data file instead of wiping its records"""
+        self.dm.save_trip(Trip("T1", "First", datetime(2025, 6, 1), 3, None))
+        self.dm.save_trip(Trip("T2", "Second", datetime(2025, 7, 1), 3, None))
+        with open(self.dm.TRIP_FILE) as f:
+            truncated = f.read()[:-40]
+        with open(self.dm.TRIP_FILE, 'w') as f:
+            f.write(truncated)
+        
+        with self.assertRaises(self.dm.DataFileError):
+            self.dm.load_trips()
+        with self.assertRaises(self.dm.DataFileError):
+            self.dm.save_trip(Trip("T3", "Third", datetime(2025, 8, 1), 3, None))
+        with open(self.dm.TRIP_FILE) as f:
+            self.assertEqual(f.read(), truncated)
+    
+    def test_corrupt_derived_files_are_rebuilt(self):
+        """Test that corrupt rollups and start-date index are rebuilt from the data files"""
+        import io
+        from contextlib import redirect_stdout
+        self.dm.save_trip(Trip("T1", "First", datetime(2025, 6, 1), 3, None))
+        self.dm.load_monthly_rollups()
+        for path in (self.dm.ROLLUP_FILE, self.dm.START_INDEX_FILE):
+            with open(path, 'w') as f:
+                f.write('[{"month": ')
+        self.dm._start_index_cache = None
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.dm.save_trip(Trip("T2", "Second", datetime(2025, 7, 1), 3, None))
+            self.assertEqual([r['month'] for r in self.dm.load_monthly_rollups()], ["2025-06", "2025-07"])
+            found = self.dm.trips_starting_between(datetime(2025, 1, 1), datetime(2026, 1, 1))
+        self.assertEqual([entry['trip_id'] for entry in found], ["T1", "T2"])
+        self.assertIn("is not valid JSON", output.getvalue())
+
+class TestAsyncDataManager(DataFileTestCase):
+    """Test the asyncio data access layer"""
+    
+    def _traveller(self, n):
+        return Traveller(f"A{n:04d}", f"Traveller {n}", "Address", datetime(1990, 1, 1), "Contact", f"ID{n}")
+    
+    def test_concurrent_loads_share_one_parse(self):
+        """Test that hundreds of concurrent loads parse each data file once"""
+        import asyncio
+        from unittest import mock
+        import async_data_manager as adm
+        from models import Invoice
+        trip = Trip("T1", "Trip", datetime(2025, 1, 1), 3, None)
+        self.dm.save_traveller(self._traveller(1))
+        self.dm.save_trip(trip)
+        self.dm.assign_traveller_to_trip("T1", "A0001")
+        self.dm.save_invoice(Invoice("INV1", trip, datetime(2025, 1, 1), 10.0))
+        
+        async def load_many():
+            return await asyncio.gather(*[adm.load_trips() for _ in range(200)],
+                                        *[adm.load_invoices() for _ in range(200)])
+        with mock.patch.object(self.dm, '_load_json', wraps=self.dm._load_json) as load_json:
+            results = asyncio.run(load_many())
+        
+        parsed = [call.args[0] for call in load_json.call_args_list]
+        self.assertEqual(sorted(parsed), sorted([self.dm.USER_FILE, self.dm.TRAVELLER_FILE,
+                                                 self.dm.TRIP_FILE, self.dm.INVOICE_FILE]))
+        self.assertEqual(len(results), 400)
+        self.assertEqual([t.travellers[0].traveller_id for t in results[0]], ["A0001"])
+        self.assertEqual([inv.trip.trip_id for inv in results[-1]], ["T1"])
+        self.assertIsNot(results[0][0], results[1][0])  # each caller gets its own objects
+    
+    def test_concurrent_writes_lose_no_updates(self):
+        """Test that hundreds of concurrent saves and assignments are all kept"""
+        import asyncio
+        import async_data_manager as adm
+        self.dm.save_trip(Trip("SHARED", "Shared", datetime(2025, 1, 1), 3, None))
+        
+        async def save_and_assign(n):
+            await adm.save_traveller(self._traveller(n))
+            return await adm.assign_traveller_to_trip("SHARED", f"A{n:04d}")
+        
+        async def write_many():
+            return await asyncio.gather(*[save_and_assign(n) for n in range(150)],
+                                        *[adm.load_travellers() for _ in range(50)])
+        results = asyncio.run(write_many())
+        
+        self.assertEqual(results[:150], [True] * 150)
+        self.assertEqual(len(self.dm.load_travellers()), 150)
+        self.assertEqual(len(self.dm._load_json(self.dm.TRIP_FILE)[0]['traveller_ids']), 150)
+    
+    def test_read_after_write_sees_write(self):
+        """Test that a load started after a save completes is not served an older in-flight parse"""
+        import asyncio
+        import async_data_manager as adm
+        
+        async def scenario():
+            early = asyncio.ensure_future(adm.load_trips())
+            await asyncio.sleep(0)  # the early parse is now in flight
+            await adm.save_trip(Trip("T1", "Trip", datetime(2025, 1, 1), 3, None))
+            after = await adm.load_trips()
+            await adm.delete_trip("T1")
+            return await early, after, await adm.load_trips()
+        early, after, deleted = asyncio.run(scenario())
+        
+        self.assertIn(len(early), (0, 1))
+        self.assertEqual([trip.trip_id for trip in after], ["T1"])
+        self.assertEqual(deleted, [])
+
+class TestParallelLoad(DataFileTestCase):
+    """Test loading all data files concurrently with load_all()"""
+    
+    def setUp(self):
+        super().setUp()
+        from benchmarks import _write_sample_files
+        _write_sample_files(self.dm, 30)
+    
+    def _check_matches_sequential(self, loaded):
+        users, travellers, trips, invoices = loaded
+        self.assertEqual([u.user_id for u in users], [u.user_id for u in self.dm.load_users()])
+        self.assertEqual([t.traveller_id for t in travellers], [t.traveller_id for t in self.dm.load_travellers()])
+        self.assertEqual([(t.trip_id, t.coordinator.user_id, [tr.traveller_id for tr in t.travellers]) for t in trips],
+                         [(t.trip_id, t.coordinator.user_id, [tr.traveller_id for tr in t.travellers])
+                          for t in self.dm.load_trips()])
+        self.assertEqual([(i.invoice_id, i.trip.trip_id, len(i.payments)) for i in invoices],
+                         [(i.invoice_id, i.trip.trip_id, len(i.payments)) for i in self.dm.load_invoices()])
+        # One object graph: invoices point at the returned trips, trips at the returned travellers
+        trip_ids = {id(t) for t in trips}
+        self.assertTrue(all(id(i.trip) in trip_ids for i in invoices))
+        traveller_ids = {id(t) for t in travellers}
+        self.assertTrue(all(id(tr) in traveller_ids for t in trips for tr in t.travellers))
+    
+    def test_threads_match_sequential_load(self):
+        """Test that load_all() with threads returns the same linked data as the sequential loaders"""
+        self.assertEqual(len(self.dm.load_all(use_processes=False)[3]), 30)
+        self._check_matches_sequential(self.dm.load_all(use_processes=False))
+    
+    def test_processes_match_sequential_load(self):
+        """Test that load_all() with worker processes, chosen by size when use_processes is None, matches too"""
+        from unittest import mock
+        with mock.patch.object(self.dm, 'PARALLEL_LOAD_PROCESS_BYTES', 0), \
+             mock.patch('os.cpu_count', return_value=8), \
+             mock.patch.object(self.dm, 'ProcessPoolExecutor', wraps=self.dm.ProcessPoolExecutor) as pool:
+            loaded = self.dm.load_all()
+        self.assertEqual(pool.call_count, 1)
+        self._check_matches_sequential(loaded)
+    
+    def test_worker_processes_are_spawned_from_any_thread(self):
+        """Test load_all() on a background thread, with another thread holding a file lock, does not fork"""
+        import threading
+        from unittest import mock
+        results, held, release = [], threading.Event(), threading.Event()
+        def hold_user_lock():
+            with self.dm.locked(reads=(self.dm.USER_FILE,)):
+                held.set()
+                release.wait()
+        holder = threading.Thread(target=hold_user_lock)
+        holder.start()
+        held.wait()
+        try:
+            with mock.patch.object(self.dm, 'ProcessPoolExecutor', wraps=self.dm.ProcessPoolExecutor) as pool:
+                loader = threading.Thread(target=lambda: results.append(self.dm.load_all(use_processes=True)))
+                loader.start()
+                loader.join(60)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        self._check_matches_sequential(results[0])
+    
+    def test_missing_and_corrupt_files(self):
+        """Test that missing files load as empty and a corrupt one is raised"""
+        os.remove(self.dm.USER_FILE)
+        os.remove(self.dm.INVOICE_FILE)
+        users, travellers, trips, invoices = self.dm.load_all()
+        self.assertEqual((users, invoices), ([], []))
+        self.assertEqual(len(trips), 30)
+        self.assertTrue(all(t.coordinator is None for t in trips))
+        
+        with open(self.dm.INVOICE_FILE, 'w') as f:
+            f.write('[{"invoice_id": ')
+        with self.assertRaises(self.dm.DataFileError):
+            self.dm.load_all()
+
+class TestLoginPrefetch(DataFileTestCase):
+    """Test loading the data in the background after login"""
+    
+    def setUp(self):
+        super().setUp()
+        from benchmarks import _write_sample_files
+        _write_sample_files(self.dm, 20)
+    
+    def test_prefetch_returns_loaded_data(self):
+        """Test that a prefetch runs in the background and returns what load_all() would"""
+        prefetch = self.dm.Prefetch()
+        users, travellers, trips, invoices = prefetch.result(timeout=30)
+        self.assertTrue(prefetch.done())
+        self.assertEqual([t.trip_id for t in trips], [t.trip_id for t in self.dm.load_trips()])
+        self.assertEqual(len(invoices), 20)
+        self.assertEqual(len(travellers), 40)
+        self.assertIsNone(prefetch.error)
+    
+    def test_changed_or_failed_prefetch_is_not_used(self):
+        """Test that a prefetch is discarded if a file changed after it started or the load failed"""
+        from unittest import mock
+        prefetch = self.dm.Prefetch()
+        self.assertIsNotNone(prefetch.result(timeout=30))
+        self.dm.delete_trip("TR0000000")
+        self.assertIsNone(prefetch.result())
+        
+        with mock.patch.object(self.dm, 'load_all', side_effect=OSError("disk gone")):
+            prefetch = self.dm.Prefetch()
+            self.assertIsNone(prefetch.result(timeout=30))
+        self.assertIsInstance(prefetch.error, OSError)
+    
+    def test_first_screen_takes_the_prefetch(self):
+        """Test that only the first screen after login gets the prefetched data, and logout drops it"""
+        from main import TravelManagementSystem
+        app = TravelManagementSystem()
+        self.assertIsNone(app.take_prefetched())
+        app.prefetch = self.dm.Prefetch()
+        self.assertEqual(len(app.take_prefetched()[2]), 20)
+        self.assertIsNone(app.take_prefetched())
+        
+        app.prefetch = self.dm.Prefetch()
+        app.logout()
+        self.assertIsNone(app.take_prefetched())
+
 def run_tests():
     """Run all tests and display results"""
     # Create test suite
@@ -273,6 +2266,31 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestItineraryGeneration))
     suite.addTests(loader.loadTestsFromTestCase(TestEnumerations))
     suite.addTests(loader.loadTestsFromTestCase(TestDataValidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestRenderOptions))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportAggregation))
+    suite.addTests(loader.loadTestsFromTestCase(TestMonthlyRollups))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingAggregation))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestAgeBucketing))
+    suite.addTests(loader.loadTestsFromTestCase(TestRevenueSeries))
+    suite.addTests(loader.loadTestsFromTestCase(TestLeaderboards))
+    suite.addTests(loader.loadTestsFromTestCase(TestReceivablesAging))
+    suite.addTests(loader.loadTestsFromTestCase(TestFigureTemplates))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportPacks))
+    suite.addTests(loader.loadTestsFromTestCase(TestDashboard))
+    suite.addTests(loader.loadTestsFromTestCase(TestRouteGraph))
+    suite.addTests(loader.loadTestsFromTestCase(TestItineraryValidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestBookingIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestDailyOccupancy))
+    suite.addTests(loader.loadTestsFromTestCase(TestStartDateIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestCommandLine))
+    suite.addTests(loader.loadTestsFromTestCase(TestAPIServer))
+    suite.addTests(loader.loadTestsFromTestCase(TestFileLocking))
+    suite.addTests(loader.loadTestsFromTestCase(TestAtomicWrites))
+    suite.addTests(loader.loadTestsFromTestCase(TestAsyncDataManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelLoad))
+    suite.addTests(loader.loadTestsFromTestCase(TestLoginPrefetch))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)